@@ -16,32 +16,26 @@
 
 
 from urllib.parse import quote
-from requests import get
-from requests import ReadTimeout
-from requests.exceptions import ConnectionError
-from time import sleep
 from bs4 import BeautifulSoup
 import urllib.request
 import xmltodict, json
 from re import sub, match, search, compile
 from urllib.parse import quote, unquote
-from requests import get, ReadTimeout
-from requests.exceptions import ConnectionError
-from time import sleep
 
 from oc_idmanager import *
 from oc_idmanager.base import IdentifierManager
+from oc_idmanager.oc_data_storage.in_memory_manager import InMemoryStorageManager
 
 
 class ArXivManager(IdentifierManager):
     """This class implements an identifier manager for arxiv identifier"""
 
-    def __init__(self, data={}, use_api_service=True):
+    def __init__(self, data=None, use_api_service=True, storage_manager=None, **params):
         """arxiv manager constructor."""
-        super(ArXivManager,self).__init__()
+        super(ArXivManager,self).__init__(**params)
         self._use_api_service = use_api_service
         self._p = "arxiv:"
-        self._data = data
+        self.storage_manager = InMemoryStorageManager(data) if storage_manager is None else storage_manager
         self._api = f'https://export.arxiv.org/api/query?search_query=all:'
         self._api_v = f'https://arxiv.org/abs/'
         self._headers = {
@@ -50,33 +44,6 @@ class ArXivManager(IdentifierManager):
         }
 
 
-    def is_valid(self, id_string, get_extra_info=False):
-        """Check if an arxiv is valid.
-
-        Args:
-            id_string (str): the arxiv to check
-
-        Returns:
-            bool: true if the arxiv is valid, false otherwise.
-        """
-        arxiv = self.normalise(id_string, include_prefix=True)
-
-        if not arxiv:
-            return False
-        else:
-            if arxiv not in self._data or self._data[arxiv] is None:
-                if get_extra_info:
-                    info = self.exists(arxiv, get_extra_info=True)
-                    self._data[arxiv] = info[1]
-                    return (info[0] and self.syntax_ok(arxiv)), info[1]
-                self._data[arxiv] = dict()
-                self._data[arxiv]["valid"] = True if (self.exists(arxiv) and self.syntax_ok(arxiv)) else False
-                return self._data[arxiv].get("valid")
-
-            if get_extra_info:
-                return self._data[arxiv].get("valid"), self._data[arxiv]
-            return self._data[arxiv].get("valid")
-
     def normalise(self, id_string, include_prefix=False):
         """It returns the arxiv normalized.
 
@@ -131,6 +98,9 @@ class ArXivManager(IdentifierManager):
         Returns:
             bool: True if the arxiv exists (is registered), False otherwise.
         """
+        prefiltered = self._get_prefiltered_result(arxiv_full, get_extra_info)
+        if prefiltered is not None:
+            return prefiltered
         valid_bool = True
         if self._use_api_service:
             arxiv_full_norm = self.normalise(arxiv_full, include_prefix=False)
@@ -145,49 +115,24 @@ class ArXivManager(IdentifierManager):
                 else:
                     api = self._api
 
-                tentative = 3
-                while tentative:
-                    tentative -= 1
-                    try:
-                        r = get(
-                            api + quote(arxiv_full_norm),
-                            headers=self._headers,
-                            timeout=30,
-                        )
-                        if r.status_code == 200:
-                            if not version:
-                                #data = r.decode('utf-8').text
-                                xml_re = r.text
-                                obj = xmltodict.parse(f'{xml_re}')
-                                feed = obj.get("feed")
-                                results = feed.get("opensearch:totalResults")
-                                try:
-                                    results_n = int(results.get("#text"))
-                                except:
-                                    results_n = 0
-                                if results_n >0:
-                                    if get_extra_info:
-                                        return True, self.extra_info(obj)
-                                    return True
-                                else:
-                                    if get_extra_info:
-                                        return False, {"valid": False}
-                                    return False
-                            else:
-                                if get_extra_info:
-                                    return True, {"valid": True}
-                                return True
-                        else:
+                r = self._get_response(api + quote(arxiv_full_norm))
+                if r is not None and r.status_code == 200:
+                    if not version:
+                        obj = xmltodict.parse(r.text)
+                        feed = obj.get("feed")
+                        results = feed.get("opensearch:totalResults")
+                        try:
+                            results_n = int(results.get("#text"))
+                        except:
+                            results_n = 0
+                        if results_n > 0:
                             if get_extra_info:
-                                return False, {"valid": False}
-                            return False
-
-                    except ReadTimeout:
-                        # Do nothing, just try again
-                        pass
-                    except ConnectionError:
-                        # Sleep 5 seconds, then try again
-                        sleep(5)
+                                return True, self.extra_info(obj)
+                            return True
+                    else:
+                        if get_extra_info:
+                            return True, {"valid": True}
+                        return True
                 valid_bool = False
             else:
                 if get_extra_info:
@@ -15,7 +15,20 @@
 # SOFTWARE.
 
 
+import asyncio
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from contextvars import copy_context
+from functools import partial
+from weakref import WeakKeyDictionary
+
+from oc_idmanager.circuit_breaker import APIUnavailableError
+from oc_idmanager.support import (call_api, deadline as api_deadline, get_async_executor, get_crosswalk, get_response,
+                                  get_session)
+
+# The semaphore of each event loop bounding its checks waiting for the shared executor, with the executor
+_async_semaphores = WeakKeyDictionary()
 
 
 class IdentifierManager(metaclass=ABCMeta):
@@ -24,7 +37,52 @@ class IdentifierManager(metaclass=ABCMeta):
     for checking the validity of an identifier and for normalising it."""
 
     def __init__(self, **params):
-        """Identifier manager constructor."""
+        """Identifier manager constructor.
+
+        Args:
+            prefilter (optional): a set-like object (e.g. an oc_idmanager.oc_data_storage.BloomFilter)
+                containing the normalised ids, including their prefix, known to be registered. If
+                specified, the ids not in the prefilter are considered not registered without calling
+                any API. Defaults to None.
+            trust_prefilter (bool, optional): True to consider registered the ids in the prefilter without
+                calling any API, unless additional information is required. Defaults to False.
+            offline_index (optional): a set-like object (e.g. an oc_idmanager.oc_data_storage.SortedIndex)
+                containing all the normalised ids, including their prefix, registered at the time it was
+                built. If specified, the existence of the ids is checked against it only, without calling
+                any API. Defaults to None.
+            session (requests.Session, optional): the HTTP session used to call the APIs (e.g. one returned
+                by oc_idmanager.support.create_session). Defaults to None, i.e. the session shared by all the
+                identifier managers, returned by oc_idmanager.support.get_session.
+            retry_policy (oc_idmanager.support.RetryPolicy, optional): the policy followed to retry the failed
+                API calls. Defaults to None, i.e. the policy shared by all the identifier managers, returned by
+                oc_idmanager.support.get_retry_policy.
+            rate_limiter (oc_idmanager.rate_limiter.RateLimiter, optional): the rate limiter keeping the API calls
+                within the rate allowed by each host. Defaults to None, i.e. the rate limiter shared by all the
+                identifier managers, returned by oc_idmanager.support.get_rate_limiter.
+            circuit_breaker (oc_idmanager.circuit_breaker.CircuitBreaker, optional): the circuit breaker making
+                the API calls to an unavailable host fail immediately with an APIUnavailableError. Defaults to None,
+                i.e. the circuit breaker shared by all the identifier managers, returned by
+                oc_idmanager.support.get_circuit_breaker.
+            timeout (float or tuple, optional): the timeout of each API call, in seconds, or a tuple with the
+                connect and the read timeouts. Defaults to None, i.e. oc_idmanager.support.DEFAULT_TIMEOUT.
+            executor (concurrent.futures.Executor, optional): the executor running the checks of the asynchronous
+                methods. Defaults to None, i.e. the executor shared by all the identifier managers, returned by
+                oc_idmanager.support.get_async_executor, whose threads bound the checks in flight.
+            crosswalk (oc_idmanager.crosswalk.CrossWalk, optional): the cross-walk of the ids of the same works
+                in different schemes, whose ids are considered registered without calling any API, unless
+                additional information is required. Defaults to None, i.e. the cross-walk shared by all the
+                identifier managers, returned by oc_idmanager.support.get_crosswalk.
+        """
+        self.prefilter = None
+        self.trust_prefilter = False
+        self.offline_index = None
+        self.session = None
+        self.retry_policy = None
+        self.rate_limiter = None
+        self.circuit_breaker = None
+        self.timeout = None
+        self.executor = None
+        self.crosswalk = None
         for key in params:
             setattr(self, key, params[key])
 
@@ -34,7 +92,10 @@ class IdentifierManager(metaclass=ABCMeta):
         }
 
     def is_valid(self, id_string, get_extra_info=False):
-        """Returns true if the id is valid, false otherwise.
+        """Returns true if the id is valid, false otherwise. The id goes through a pipeline of checks,
+        from the cheapest to the most expensive, each run at most once: normalisation, syntax, check
+        digit, storage and, only for the ids passing the previous checks and not in the storage,
+        existence. The result of the existence check is stored.
 
         Args:
             id_string (str): id to check
@@ -44,7 +105,97 @@ class IdentifierManager(metaclass=ABCMeta):
             dict : a dictionary with additional information, if required (get_extra_info=True)
 
         """
-        return True
+        id_string = self.normalise(id_string, include_prefix=True)
+        if id_string is None:
+            return (False, {"valid": False}) if get_extra_info else False
+        if not self.syntax_ok(id_string) or not self.check_digit(id_string):
+            return (False, {"valid": False}) if get_extra_info else False
+        storage_manager = getattr(self, "storage_manager", None)
+        info = None if storage_manager is None else storage_manager.get_value(id_string)
+        if info is None:
+            if type(self).exists is IdentifierManager.exists:
+                # The existence of the ids of this scheme cannot be checked
+                return (True, {"valid": True}) if get_extra_info else True
+            if get_extra_info:
+                valid, info = self.exists(id_string, get_extra_info=True)
+            else:
+                valid = self.exists(id_string)
+                info = {"valid": valid}
+            if storage_manager is not None:
+                storage_manager.set_value(id_string, info)
+            return (valid, info) if get_extra_info else valid
+        if get_extra_info:
+            return info.get("valid"), info
+        return info.get("valid")
+
+    def is_valid_many(self, id_strings, workers=8, get_extra_info=False, deadline=None):
+        """Returns the validity of many ids. The ids are normalised and deduplicated, and the ids not
+        found in the storage are checked concurrently by a pool of threads or, if the identifier manager
+        can check many ids with a request (i.e. it overrides exists_many), in batches.
+
+        Args:
+            id_strings (iterable): the ids to check
+            workers (int, optional): the maximum number of ids checked concurrently. Defaults to 8.
+            get_extra_info (bool, optional): True to get a dictionary with additional info about each id
+            deadline (float, optional): the time available to check all the ids, in seconds. Defaults to None,
+                i.e. no deadline, besides the one of the context, if any (see oc_idmanager.support.deadline).
+        Returns:
+            list: the result of is_valid for each id, in the same order as the ids, or None for the ids which
+                could not be checked because an API was unavailable or the deadline expired
+        """
+        id_strings = list(id_strings)
+        keys = [self.normalise(id_string, include_prefix=True) for id_string in id_strings]
+        storage_manager = getattr(self, "storage_manager", None)
+        results = dict()
+        missing = dict()
+        with nullcontext() if deadline is None else api_deadline(deadline):
+            for id_string, key in zip(id_strings, keys):
+                if key is None or key in results or key in missing:
+                    continue
+                if storage_manager is not None and storage_manager.get_value(key) is None:
+                    missing[key] = id_string
+                else:
+                    results[key] = self.is_valid(id_string, get_extra_info=get_extra_info)
+            if missing and type(self).exists_many is not IdentifierManager.exists_many:
+                results.update(self._is_valid_batch(missing, get_extra_info))
+            elif missing:
+                check = partial(self._is_valid_if_available, get_extra_info=get_extra_info)
+                if workers > 1 and len(missing) > 1:
+                    with ThreadPoolExecutor(max_workers=min(workers, len(missing))) as executor:
+                        # Each check runs in a copy of the context, so that the deadline applies to it
+                        futures = [executor.submit(copy_context().run, check, id_string) for id_string in missing.values()]
+                        results.update(zip(missing, (future.result() for future in futures)))
+                else:
+                    results.update(zip(missing, map(check, missing.values())))
+        return [self.is_valid(id_string, get_extra_info=get_extra_info) if key is None else results[key]
+                for id_string, key in zip(id_strings, keys)]
+
+    def _is_valid_batch(self, missing, get_extra_info=False):
+        results = dict()
+        checkable = dict()
+        for key, id_string in missing.items():
+            if self.syntax_ok(key) and self.check_digit(key):
+                checkable[key] = id_string
+            else:
+                results[key] = self.is_valid(id_string, get_extra_info=get_extra_info)
+        try:
+            existing = self.exists_many(checkable.values(), get_extra_info=get_extra_info) if checkable else {}
+        except APIUnavailableError:
+            existing = dict()
+        for key in checkable:
+            if key not in existing:
+                results[key] = None
+                continue
+            valid, info = existing[key] if get_extra_info else (existing[key], {"valid": existing[key]})
+            self.storage_manager.set_value(key, info)
+            results[key] = (valid, info) if get_extra_info else valid
+        return results
+
+    def _is_valid_if_available(self, id_string, get_extra_info=False):
+        try:
+            return self.is_valid(id_string, get_extra_info=get_extra_info)
+        except APIUnavailableError:
+            return None
 
     @abstractmethod
     def normalise(self, id_string, include_prefix=False):
@@ -96,6 +247,130 @@ class IdentifierManager(metaclass=ABCMeta):
         """
         return True
 
+    def exists_many(self, id_strings, get_extra_info=False):
+        """Returns the existence of many ids. The child classes whose API can check many ids with a
+        request override it, and is_valid_many uses it to check the ids not in the storage.
+
+        Args:
+            id_strings (iterable): the id strings for the api requests
+            get_extra_info (bool, optional): True to get a dictionary with additional info about each id
+        Returns:
+            dict: the result of exists for each id, by normalised id including its prefix
+        """
+        return {self.normalise(id_string, include_prefix=True): self.exists(id_string, get_extra_info=get_extra_info)
+                for id_string in id_strings}
+
+    async def ais_valid(self, id_string, get_extra_info=False):
+        """Asynchronous counterpart of is_valid: the id is checked in the executor, so that many
+        ids can be checked concurrently by the same event loop. At most as many ids as the threads
+        of the executor are checked at once, while the others wait in the event loop.
+
+        Args:
+            id_string (str): id to check
+            get_extra_info (bool, optional): True to get a dictionary with additional info about the id
+        Returns:
+            bool: True if the id is valid, False otherwise.
+            dict : a dictionary with additional information, if required (get_extra_info=True)
+        """
+        return await self._run_in_executor(self.is_valid, id_string, get_extra_info=get_extra_info)
+
+    async def aexists(self, id_string, get_extra_info=False, allow_extra_api=None):
+        """Asynchronous counterpart of exists: the existence of the id is checked in the executor, so
+        that many ids can be checked concurrently by the same event loop. At most as many ids as the
+        threads of the executor are checked at once, while the others wait in the event loop.
+
+        Args:
+            id_string (str): the id string for the api request
+            get_extra_info (bool, optional): True to get a dictionary with additional info about the id
+            allow_extra_api (list or None, optional): the names of the enabled APIs to call in case the
+                primary one does not provide all the required information
+        Returns:
+            bool: True if the id exists (is registered), False otherwise.
+            dict : a dictionary with additional information, if required
+        """
+        return await self._run_in_executor(
+            self.exists, id_string, get_extra_info=get_extra_info, allow_extra_api=allow_extra_api)
+
+    async def _run_in_executor(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # The context is copied so that the deadline set by the caller, if any, applies to the check
+        function = partial(copy_context().run, method, *args, **kwargs)
+        if self.executor is not None:
+            return await loop.run_in_executor(self.executor, function)
+        executor, workers = get_async_executor()
+        shared_executor, semaphore = _async_semaphores.get(loop, (None, None))
+        if shared_executor is not executor:
+            semaphore = asyncio.Semaphore(workers)
+            _async_semaphores[loop] = executor, semaphore
+        # The checks exceeding the threads wait in the event loop, where they can be cancelled, instead of
+        # being queued in the executor
+        async with semaphore:
+            return await loop.run_in_executor(executor, function)
+
+    @property
+    def _session(self):
+        return get_session() if self.session is None else self.session
+
+    @property
+    def _crosswalk(self):
+        return get_crosswalk() if self.crosswalk is None else self.crosswalk
+
+    def _get_response(self, url, params=None, rate_limit_key=None):
+        return get_response(url, self._headers, params=params, session=self._session, retry_policy=self.retry_policy,
+                            rate_limiter=self.rate_limiter, circuit_breaker=self.circuit_breaker, timeout=self.timeout,
+                            rate_limit_key=rate_limit_key)
+
+    def _call_api(self, url, r_format="json", params=None, rate_limit_key=None):
+        return call_api(url, self._headers, r_format, session=self._session, params=params, retry_policy=self.retry_policy,
+                        rate_limiter=self.rate_limiter, circuit_breaker=self.circuit_breaker, timeout=self.timeout,
+                        rate_limit_key=rate_limit_key)
+
+    def _check_prefilter(self, id_string, get_extra_info=False):
+        """  Returns the answer of the offline index, of the cross-walk or of the prefilter about the
+        existence of an id, if it can be trusted.
+
+        Args:
+            id_string (str): the id string to check
+            get_extra_info (bool, optional): True if additional info about the id is required
+        Returns:
+            bool: False if the id is certainly not registered, True if the id is in the cross-walk or it
+                is probably registered and the prefilter is trusted, None if the existence of the id must
+                be checked otherwise. If an offline index is specified, whether the id is in the index.
+        """
+        id_string = self.normalise(id_string, include_prefix=True)
+        if id_string is None:
+            return None if self.offline_index is None else False
+        if self.offline_index is not None:
+            return id_string in self.offline_index
+        if not get_extra_info and id_string in self._crosswalk:
+            return True
+        if self.prefilter is None:
+            return None
+        if id_string not in self.prefilter:
+            return False
+        if self.trust_prefilter and not get_extra_info:
+            return True
+        return None
+
+    def _get_prefiltered_result(self, id_string, get_extra_info=False):
+        """  Returns the result of exists given by the offline index, the cross-walk or the prefilter
+        (see _check_prefilter), if any.
+
+        Args:
+            id_string (str): the id string to check
+            get_extra_info (bool, optional): True to get a dictionary with additional info about the id
+        Returns:
+            the result of exists, or None if the existence of the id must be checked otherwise
+        """
+        prefiltered = self._check_prefilter(id_string, get_extra_info)
+        if prefiltered is None or not get_extra_info:
+            return prefiltered
+        return prefiltered, self._get_prefiltered_info(id_string, prefiltered)
+
+    def _get_prefiltered_info(self, id_string, valid):
+        # The additional info about an id whose existence is not checked through an API
+        return {"valid": valid}
+
     def extra_info(self, api_response, choose_api=None, info_dict={}):
         """  Returns a dictionary with extra info about the id, if available.
         Not all child classes check id existence because of API policies
@@ -0,0 +1,149 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from threading import Lock
+from time import monotonic
+from typing import Iterable
+from urllib.parse import urlsplit
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class APIUnavailableError(Exception):
+    """This exception is raised when an API is not called because its host is unavailable, i.e.
+    its circuit is open: the ids depending on it are neither valid nor invalid, but unknown."""
+
+    def __init__(self, host: str):
+        super(APIUnavailableError, self).__init__(f"The API host {host} is unavailable")
+        self.host = host
+
+
+class _Circuit(object):
+    def __init__(self, window: int):
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=window)
+        self.opened = 0.0
+        self.probing = False
+
+
+class CircuitBreaker(object):
+    """This class keeps a circuit for each API host. A circuit is closed while the host works,
+    and opens when the rate of failed calls in the last calls exceeds a threshold: while it is
+    open, the calls fail immediately with an APIUnavailableError. After a timeout, it lets a
+    single call through to probe the host (half-open), and it closes again if the call succeeds.
+    Since the hosts may be countless (e.g. those of the URLs), the circuits whose last calls all
+    succeeded are dropped, and only the circuits of the hosts called most recently are kept."""
+
+    def __init__(self, failure_rate: float = 0.5, window: int = 20, min_calls: int = 10, reset_timeout: float = 30.0,
+                 failure_statuses: Iterable[int] = (500, 502, 503, 504), max_hosts: int = 10000):
+        """Circuit breaker constructor.
+
+        Args:
+            failure_rate (float, optional): the rate of failed calls opening the circuit. Defaults to 0.5.
+            window (int, optional): the number of last calls whose failure rate is considered. Defaults to 20.
+            min_calls (int, optional): the minimum number of calls in the window before the circuit can open.
+                Defaults to 10.
+            reset_timeout (float, optional): the time, in seconds, after which an open circuit is probed.
+                Defaults to 30.0.
+            failure_statuses (iterable, optional): the statuses of the responses considered failed calls, in
+                addition to connection errors and timeouts. Defaults to (500, 502, 503, 504).
+            max_hosts (int, optional): the maximum number of circuits kept, the least recently called hosts
+                being forgotten. Defaults to 10000.
+        """
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.failure_statuses = frozenset(failure_statuses)
+        self.max_hosts = max_hosts
+        self._circuits = OrderedDict()
+        self._lock = Lock()
+
+    def _get_circuit(self, url: str) -> _Circuit:
+        host = urlsplit(url).hostname or ""
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            circuit = self._circuits[host] = _Circuit(self.window)
+            while len(self._circuits) > self.max_hosts:
+                self._circuits.popitem(last=False)
+        else:
+            self._circuits.move_to_end(host)
+        return circuit
+
+    def before_call(self, url: str) -> None:
+        """Checks whether the host of the URL can be called.
+
+        Args:
+            url (str): the URL to call
+        Raises:
+            APIUnavailableError: if the circuit of the host is open
+        """
+        with self._lock:
+            # A host without a circuit is closed, and its circuit is created when the outcome is recorded
+            circuit = self._circuits.get(urlsplit(url).hostname or "")
+            if circuit is None:
+                return
+            if circuit.state == OPEN and monotonic() - circuit.opened >= self.reset_timeout:
+                circuit.state = HALF_OPEN
+            if circuit.state == CLOSED:
+                return
+            if circuit.state == HALF_OPEN and not circuit.probing:
+                circuit.probing = True
+                return
+        raise APIUnavailableError(urlsplit(url).hostname)
+
+    def record(self, url: str, failed: bool) -> None:
+        """Records the outcome of a call.
+
+        Args:
+            url (str): the URL called
+            failed (bool): True if the call failed, False otherwise
+        """
+        with self._lock:
+            circuit = self._get_circuit(url)
+            if circuit.state == HALF_OPEN:
+                circuit.probing = False
+                circuit.outcomes.clear()
+                if failed:
+                    circuit.state = OPEN
+                    circuit.opened = monotonic()
+                else:
+                    circuit.state = CLOSED
+                return
+            circuit.outcomes.append(failed)
+            if circuit.state == CLOSED and len(circuit.outcomes) == self.window and not any(circuit.outcomes):
+                # A circuit whose whole window succeeded is the same as a new one
+                del self._circuits[urlsplit(url).hostname or ""]
+            elif circuit.state == CLOSED and len(circuit.outcomes) >= self.min_calls and \
+                    sum(circuit.outcomes) / len(circuit.outcomes) >= self.failure_rate:
+                circuit.state = OPEN
+                circuit.opened = monotonic()
+
+    def get_state(self, host: str) -> str:
+        """Returns the state of the circuit of a host: "closed", "open" or "half-open"."""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None:
+                return CLOSED
+            if circuit.state == OPEN and monotonic() - circuit.opened >= self.reset_timeout:
+                return HALF_OPEN
+            return circuit.state
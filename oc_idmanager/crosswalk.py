@@ -0,0 +1,79 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from oc_idmanager.oc_data_storage.in_memory_manager import InMemoryStorageManager
+from oc_idmanager.oc_data_storage.storage_manager import StorageManager
+
+
+class CrossWalk(object):
+    """This class keeps the ids of the same work in different schemes (e.g. its PMCID, PMID and
+    DOI), as returned together by some APIs, so that the ids are known to be registered and they
+    can be converted into each other without calling any API."""
+
+    def __init__(self, storage_manager: StorageManager | None = None):
+        """Cross-walk constructor.
+
+        Args:
+            storage_manager (StorageManager, optional): the storage of the ids, in which each normalised
+                id, including its prefix, is associated with the ids of the same work by scheme (e.g.
+                {"pmcid": "pmcid:PMC8384044", "pmid": "pmid:34429366"}). Defaults to None, i.e. an
+                InMemoryStorageManager keeping up to 1000000 ids.
+        """
+        self.storage_manager = InMemoryStorageManager(max_entries=1000000) if storage_manager is None else storage_manager
+
+    def add(self, id_strings: Iterable[str]) -> None:
+        """Stores the ids of a work, merging them with the ids of the same work already stored.
+
+        Args:
+            id_strings (iterable): the normalised ids, including their prefix
+        """
+        ids = {id_string.split(":", 1)[0]: id_string for id_string in id_strings if id_string}
+        if len(ids) < 2:
+            return
+        for id_string in list(ids.values()):
+            ids = {**self.get(id_string), **ids}
+        self.storage_manager.set_values((id_string, ids) for id_string in ids.values())
+
+    def get(self, id_string: str) -> dict:
+        """Returns the ids of the work identified by an id.
+
+        Args:
+            id_string (str): the normalised id, including its prefix
+        Returns:
+            dict: the ids of the work by scheme, including the id itself, or an empty dictionary if the id is unknown
+        """
+        return self.storage_manager.get_value(id_string) or {}
+
+    def convert(self, id_string: str, scheme: str) -> str | None:
+        """Returns the id in another scheme of the work identified by an id.
+
+        Args:
+            id_string (str): the normalised id, including its prefix
+            scheme (str): the scheme of the id to return (e.g. "pmid")
+        Returns:
+            str: the normalised id, including its prefix, or None if it is unknown
+        """
+        return self.get(id_string).get(scheme)
+
+    def __contains__(self, id_string: str) -> bool:
+        return id_string in self.storage_manager
@@ -18,24 +18,34 @@
 from __future__ import annotations
 
 import re
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
 from re import match, sub
 from urllib.parse import quote, unquote
 
 from oc_meta.plugins.metadata_manager import MetadataManager
 
 from oc_idmanager.base import IdentifierManager
+from oc_idmanager.circuit_breaker import APIUnavailableError
+from oc_idmanager.oc_data_storage.in_memory_manager import InMemoryStorageManager
 from oc_idmanager.isbn import ISBNManager
 from oc_idmanager.issn import ISSNManager
 from oc_idmanager.orcid import ORCIDManager
-from oc_idmanager.support import call_api
 
 
 class DOIManager(IdentifierManager):
     """This class implements an identifier manager for doi identifier"""
 
-    def __init__(self, data={}, use_api_service=True):
-        """DOI manager constructor."""
-        super(DOIManager,self).__init__()
+    def __init__(self, data=None, use_api_service=True, storage_manager=None, ra_storage_manager=None, **params):
+        """DOI manager constructor.
+
+        Args:
+            ra_storage_manager (StorageManager, optional): the storage of the registration agency of each
+                DOI prefix (e.g. a SqliteStorageManager, to keep it across processes). Defaults to None, i.e.
+                an InMemoryStorageManager.
+        """
+        super(DOIManager,self).__init__(**params)
         self._api = "https://doi.org/api/handles/"
         self._api_airiti = ""
         self._api_cnki = ""
@@ -48,30 +58,21 @@ class DOIManager(IdentifierManager):
         self._api_op = ""
         self._api_public = ""
         self._api_unknown = "https://doi.org/ra/"
+        # The registration agencies whose metadata can be extracted, and the maximum number of DOIs per request to doi.org/ra
+        self._metadata_ras = ("crossref", "datacite", "jalc", "medra")
+        self._ra_batch_size = 50
+        # The fields of the Crossref records used to extract their metadata, and the maximum number of DOIs per request
+        self._crossref_fields = ("DOI", "type", "ISBN", "ISSN", "container-title", "title", "author", "editor", "issued",
+                                 "volume", "issue", "page", "publisher", "member", "prefix")
+        self._crossref_batch_size = 50
         self._use_api_service = use_api_service
         self._p = "doi:"
-        self._data = data
+        self.storage_manager = InMemoryStorageManager(data) if storage_manager is None else storage_manager
+        self.ra_storage_manager = InMemoryStorageManager() if ra_storage_manager is None else ra_storage_manager
         self._issnm = ISSNManager()
         self._isbnm = ISBNManager()
         self._om = ORCIDManager()
 
-    def is_valid(self, id_string, get_extra_info=False):
-        doi = self.normalise(id_string, include_prefix=True)
-        if doi is None:
-            return False
-        else:
-            if doi not in self._data or self._data[doi] is None:
-                if get_extra_info:
-                    info = self.exists(doi, get_extra_info=True)
-                    self._data[doi] = info[1]
-                    return (info[0] and self.syntax_ok(doi)), info[1]
-                self._data[doi] = dict()
-                self._data[doi]["valid"] = True if self.exists(doi) and self.syntax_ok(doi) else False
-                return self.exists(doi) and self.syntax_ok(doi)
-            if get_extra_info:
-                return self._data[doi].get("valid"), self._data[doi]
-            return self._data[doi].get("valid")
-
     def normalise(self, id_string, include_prefix=False):
         try:
             doi_string = sub(
@@ -91,28 +92,196 @@ class DOIManager(IdentifierManager):
         return True if match("^doi:10\.(\d{4,9}|[^\s/]+(\.[^\s/]+)*)/[^\s]+$", id_string, re.IGNORECASE) else False
 
     def exists(self, doi_full, get_extra_info=False, allow_extra_api=None):
+        """Returns True if the DOI is registered, False otherwise.
+
+        Args:
+            doi_full (str): the DOI to check
+            get_extra_info (bool, optional): True to get a dictionary with additional info about the DOI
+            allow_extra_api (str or list, optional): the registration agencies (e.g. ["crossref", "datacite"]),
+                or "auto" for all those supported, whose API is called to get the metadata of a registered DOI,
+                if the DOI is registered by one of them. The registration agency is resolved from the prefix
+                of the DOI. Defaults to None, i.e. no metadata.
+        Returns:
+            bool: True if the DOI is registered, False otherwise.
+            dict : a dictionary with additional information, if required
+        """
+        prefiltered = self._get_prefiltered_result(doi_full, get_extra_info)
+        if prefiltered is not None:
+            return prefiltered
         valid_bool = True
+        doi = self.normalise(doi_full)
         if self._use_api_service:
-            doi = self.normalise(doi_full)
             if doi is not None:
-                json_res = call_api(url=self._api + quote(doi), headers=self._headers)
+                json_res = self._call_api(self._api + quote(doi))
                 if json_res:
                     valid_bool = json_res.get("responseCode") == 1
                     if get_extra_info:
                         extra_info = {'id': doi, 'valid': valid_bool, 'ra': 'unknown'}
-                        if allow_extra_api is None:
-                            return valid_bool, extra_info
-                        elif valid_bool is True and allow_extra_api:
-                            r_format = "xml" if allow_extra_api == "medra" else "json"
-                            extra_api_result = call_api(url=getattr(self, f'_api_{allow_extra_api}') + quote(doi), headers=self._headers, r_format=r_format)
-                            if extra_api_result:
-                                metadata_manager = MetadataManager(allow_extra_api, json_res)
-                                extra_info.update(metadata_manager.extract_metadata())
-                                return valid_bool, extra_info
-                            else:
-                                return valid_bool, {'id': doi, 'valid': valid_bool, 'ra': 'unknown'}
+                        if valid_bool is True and allow_extra_api:
+                            extra_info.update(self._get_metadata(doi, allow_extra_api))
+                        return valid_bool, extra_info
                     return valid_bool
                 valid_bool = False
         if get_extra_info:
             return valid_bool, {'id': doi, 'valid': valid_bool, 'ra': 'unknown'}
-        return valid_bool
\ No newline at end of file
+        return valid_bool
+
+    def _get_prefiltered_info(self, doi, valid):
+        return {'id': self.normalise(doi), 'valid': valid, 'ra': 'unknown'}
+
+    def exists_many(self, dois, get_extra_info=False, allow_extra_api=None, workers=8):
+        """Returns the existence of many DOIs. Since doi.org checks a DOI per request, the DOIs are
+        checked concurrently by a pool of threads, while their metadata, if required, are retrieved in
+        batches: the registration agencies of their prefixes by get_registration_agencies, and the
+        Crossref metadata by get_crossref_metadata. The DOIs which could not be checked because an
+        API was unavailable are not in the result.
+
+        Args:
+            dois (iterable): the DOIs
+            get_extra_info (bool, optional): True to get a dictionary with additional info about each DOI
+            allow_extra_api (str or list, optional): the registration agencies whose API is called to get the
+                metadata of the registered DOIs (see exists). Defaults to None, i.e. no metadata.
+            workers (int, optional): the maximum number of DOIs checked concurrently. Defaults to 8.
+        Returns:
+            dict: the result of exists for each DOI, by normalised DOI including its prefix
+        """
+        dois = list(dict.fromkeys(doi for doi in map(self.normalise, dois) if doi is not None))
+        check = partial(self._exists_if_available, get_extra_info=get_extra_info)
+        if workers > 1 and len(dois) > 1:
+            with ThreadPoolExecutor(max_workers=min(workers, len(dois))) as executor:
+                # Each check runs in a copy of the context, so that the deadline applies to it
+                futures = [executor.submit(copy_context().run, check, doi) for doi in dois]
+                checked = [future.result() for future in futures]
+        else:
+            checked = list(map(check, dois))
+        results = {self._p + doi: result for doi, result in zip(dois, checked) if result is not None}
+        if get_extra_info and allow_extra_api:
+            infos = [info for valid, info in results.values() if valid]
+            ras = self.get_registration_agencies(info['id'] for info in infos)
+            allowed_ras = self._get_allowed_ras(allow_extra_api)
+            crossref_metadata = self.get_crossref_metadata(
+                doi for doi, ra in ras.items() if ra == "crossref") if "crossref" in allowed_ras else dict()
+            for info in infos:
+                ra = ras.get(info['id'])
+                if ra == "crossref" and ra in allowed_ras:
+                    info.update(crossref_metadata.get(info['id'], {'ra': ra}))
+                elif ra is not None:
+                    info.update(self._get_metadata(info['id'], allow_extra_api))
+        return results
+
+    def _exists_if_available(self, doi, get_extra_info=False):
+        try:
+            return self.exists(doi, get_extra_info=get_extra_info)
+        except APIUnavailableError:
+            return None
+
+    def _get_allowed_ras(self, allow_extra_api):
+        allowed_ras = self._metadata_ras if allow_extra_api == "auto" else \
+            [allow_extra_api] if isinstance(allow_extra_api, str) else allow_extra_api
+        return [ra for ra in allowed_ras if ra in self._metadata_ras]
+
+    def _get_metadata(self, doi, allow_extra_api):
+        ra = self.get_registration_agency(doi)
+        if ra is None:
+            return dict()
+        if ra not in self._get_allowed_ras(allow_extra_api):
+            return {'ra': ra}
+        if ra == "crossref":
+            # Only the fields used to extract the metadata are downloaded
+            return self.get_crossref_metadata([doi]).get(doi, {'ra': ra})
+        r_format = "xml" if ra == "medra" else "json"
+        extra_api_result = self._call_api(getattr(self, f'_api_{ra}') + quote(doi), r_format=r_format)
+        if not extra_api_result:
+            return {'ra': ra}
+        return MetadataManager(ra, extra_api_result, None).extract_metadata()
+
+    def get_registration_agency(self, doi):
+        """Returns the registration agency of a DOI.
+
+        Args:
+            doi (str): the DOI
+        Returns:
+            str: the name of the registration agency in lower case (e.g. "crossref"), or None if it is unknown
+        """
+        return self.get_registration_agencies([doi]).get(self.normalise(doi))
+
+    def get_registration_agencies(self, dois):
+        """Returns the registration agency of many DOIs. Since all the DOIs with the same prefix are
+        registered by the same agency, the agency of each prefix is stored, and the agencies of the
+        prefixes not stored yet are resolved by doi.org/ra, with a DOI per prefix and many DOIs per request.
+        The prefixes whose DOI is not found are requested again with their next DOI, until one is found
+        or none is left.
+
+        Args:
+            dois (iterable): the DOIs
+        Returns:
+            dict: the name of the registration agency in lower case of each normalised DOI whose agency is known
+        """
+        ras = dict()
+        unresolved = dict()
+        for doi in dois:
+            doi = self.normalise(doi)
+            if doi is None or doi in ras:
+                continue
+            prefix = doi.split("/", 1)[0]
+            info = self.ra_storage_manager.get_value(prefix)
+            if info is not None:
+                ras[doi] = info["ra"]
+            else:
+                unresolved.setdefault(prefix, list()).append(doi)
+        if not unresolved or not self._use_api_service:
+            return ras
+        tried = dict.fromkeys(unresolved, 0)
+        while tried:
+            prefixes = list(tried)
+            for i in range(0, len(prefixes), self._ra_batch_size):
+                batch = prefixes[i:i + self._ra_batch_size]
+                json_res = self._call_api(self._api_unknown + ",".join(quote(unresolved[prefix][tried[prefix]]) for prefix in batch))
+                if json_res is None:
+                    return ras
+                for record in json_res:
+                    doi = self.normalise(record.get("DOI", ""))
+                    if not record.get("RA") or doi is None:
+                        continue
+                    ra = record["RA"].lower()
+                    prefix = doi.split("/", 1)[0]
+                    self.ra_storage_manager.set_value(prefix, {"ra": ra})
+                    for prefix_doi in unresolved.get(prefix, []):
+                        ras[prefix_doi] = ra
+                    tried.pop(prefix, None)
+                for prefix in batch:
+                    if prefix in tried:
+                        tried[prefix] += 1
+                        if tried[prefix] == len(unresolved[prefix]):
+                            del tried[prefix]
+        return ras
+
+    def get_crossref_metadata(self, dois):
+        """Returns the metadata of many DOIs registered by Crossref. The records of many DOIs are
+        retrieved with a request, filtering the works by DOI, and only the fields used to extract
+        the metadata are downloaded.
+
+        Args:
+            dois (iterable): the DOIs
+        Returns:
+            dict: the metadata of each normalised DOI found in Crossref
+        """
+        dois = list(dict.fromkeys(doi for doi in map(self.normalise, dois) if doi is not None))
+        metadata = dict()
+        if not self._use_api_service:
+            return metadata
+        for i in range(0, len(dois), self._crossref_batch_size):
+            batch = dois[i:i + self._crossref_batch_size]
+            params = {
+                "filter": ",".join(f"doi:{doi}" for doi in batch),
+                "select": ",".join(self._crossref_fields),
+                "rows": len(batch)
+            }
+            json_res = self._call_api(self._api_crossref, params=params)
+            if not json_res:
+                continue
+            for item in json_res.get("message", {}).get("items", []):
+                doi = self.normalise(item.get("DOI", ""))
+                if doi is not None:
+                    metadata[doi] = MetadataManager("crossref", item, None).extract_metadata()
+        return metadata
@@ -0,0 +1,144 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from threading import Lock
+from time import time
+
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+class HTTPCache(object):
+    """This class stores the bodies of the API responses, with their validators (ETag and
+    Last-Modified headers), in an SQLite database, so that they can be revalidated with
+    conditional requests instead of being downloaded again."""
+
+    def __init__(self, database: str, max_age: float = 0):
+        """HTTP cache constructor.
+
+        Args:
+            database (str): the path of the SQLite database
+            max_age (float, optional): the time, in seconds, during which a stored response is used without
+                being revalidated. Defaults to 0, i.e. the stored responses are always revalidated.
+        """
+        self.max_age = max_age
+        self._lock = Lock()
+        self._con = sqlite3.connect(database, isolation_level=None, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS response (key TEXT PRIMARY KEY, headers TEXT NOT NULL, body BLOB NOT NULL, stored REAL NOT NULL)")
+
+    def get(self, key: str) -> tuple | None:
+        """Returns the response stored with a key.
+
+        Args:
+            key (str): the key of the response
+        Returns:
+            tuple: the headers (a CaseInsensitiveDict), the body and the time when the response was stored or last revalidated,
+                or None if no response is stored with the key
+        """
+        with self._lock:
+            row = self._con.execute("SELECT headers, body, stored FROM response WHERE key=?", (key,)).fetchone()
+        if row is None:
+            return None
+        return CaseInsensitiveDict(json.loads(row[0])), bytes(row[1]), row[2]
+
+    def set(self, key: str, headers: dict, body: bytes) -> None:
+        with self._lock:
+            self._con.execute("INSERT OR REPLACE INTO response (key, headers, body, stored) VALUES (?, ?, ?, ?)",
+                              (key, json.dumps(headers), body, time()))
+
+    def touch(self, key: str) -> None:
+        with self._lock:
+            self._con.execute("UPDATE response SET stored=? WHERE key=?", (time(), key))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._con.execute("DELETE FROM response WHERE key=?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._con.execute("DELETE FROM response")
+
+    def close(self) -> None:
+        with self._lock:
+            self._con.close()
+
+
+class CachingAdapter(BaseAdapter):
+    """This class implements a transport adapter which stores the successful responses to the
+    GET requests in an HTTPCache, and revalidates them with conditional requests (If-None-Match
+    and If-Modified-Since headers): when the server answers 304 Not Modified, the stored body is
+    returned as if it had been downloaded again."""
+
+    _validators = (("ETag", "If-None-Match"), ("Last-Modified", "If-Modified-Since"))
+
+    def __init__(self, cache: HTTPCache, adapter: BaseAdapter | None = None):
+        """Caching adapter constructor.
+
+        Args:
+            cache (HTTPCache): the cache of the responses
+            adapter (BaseAdapter, optional): the adapter sending the requests. Defaults to None, i.e. an HTTPAdapter.
+        """
+        super(CachingAdapter, self).__init__()
+        self.cache = cache
+        self.adapter = HTTPAdapter() if adapter is None else adapter
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        if request.method != "GET":
+            return self.adapter.send(request, **kwargs)
+        key = f"{request.headers.get('Accept', '')} {request.url}"
+        entry = self.cache.get(key)
+        if entry is not None:
+            headers, body, stored = entry
+            if time() - stored < self.cache.max_age:
+                return self._build_response(request, headers, body)
+            for header, conditional_header in self._validators:
+                if header in headers:
+                    request.headers[conditional_header] = headers[header]
+        response = self.adapter.send(request, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            # The connection is released to the pool, since the response is replaced by the stored one
+            response.close()
+            self.cache.touch(key)
+            return self._build_response(request, entry[0], entry[1])
+        if response.status_code == 200 and (self.cache.max_age or any(h in response.headers for h, _ in self._validators)):
+            self.cache.set(key, dict(response.headers), response.content)
+        return response
+
+    @staticmethod
+    def _build_response(request: PreparedRequest, headers: dict, body: bytes) -> Response:
+        response = Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        response.url = request.url
+        response.request = request
+        response.from_cache = True
+        return response
+
+    def close(self) -> None:
+        self.adapter.close()
@@ -19,27 +19,16 @@ import re
 from re import match, sub
 
 from oc_idmanager.base import IdentifierManager
+from oc_idmanager.oc_data_storage.in_memory_manager import InMemoryStorageManager
 
 
 class ISBNManager(IdentifierManager):
     """This class implements an identifier manager for isbn identifier"""
-    def __init__(self, data={}):
+    def __init__(self, data=None, storage_manager=None, **params):
         """ISBN manager constructor."""
         self._p = "isbn:"
-        self._data = data
-        super(ISBNManager, self).__init__()
-
-    def is_valid(self, id_string, get_extra_info=False):
-        isbn = self.normalise(id_string, include_prefix=True)
-        if isbn is None:
-            return False
-        else:
-            if isbn not in self._data or self._data[isbn] is None:
-                return (
-                    self.check_digit(isbn)
-                    and self.syntax_ok(isbn)
-                )
-            return self._data[isbn].get("valid")
+        self.storage_manager = InMemoryStorageManager(data) if storage_manager is None else storage_manager
+        super(ISBNManager, self).__init__(**params)
 
     def normalise(self, id_string, include_prefix=False):
         try:
@@ -19,28 +19,17 @@ import re
 from re import match, sub
 
 from oc_idmanager.base import IdentifierManager
+from oc_idmanager.oc_data_storage.in_memory_manager import InMemoryStorageManager
 
 
 class ISSNManager(IdentifierManager):
     """This class implements an identifier manager for issn identifier"""
 
-    def __init__(self, data={}):
+    def __init__(self, data=None, storage_manager=None, **params):
         """ISSN manager constructor."""
-        super(ISSNManager, self).__init__()
+        super(ISSNManager, self).__init__(**params)
         self._p = "issn:"
-        self._data = data
-
-    def is_valid(self, id_string, get_extra_info=False):
-        issn = self.normalise(id_string, include_prefix=True)
-        if issn is None:
-            return False
-        else:
-            if issn not in self._data or self._data[issn] is None:
-                return (
-                    self.syntax_ok(issn)
-                    and self.check_digit(issn)
-                )
-            return self._data[issn].get("valid")
+        self.storage_manager = InMemoryStorageManager(data) if storage_manager is None else storage_manager
 
     def normalise(self, id_string, include_prefix=False):
         try:
@@ -1,41 +1,21 @@
 from re import sub, match
 from oc_idmanager.base import IdentifierManager
+from oc_idmanager.oc_data_storage.in_memory_manager import InMemoryStorageManager
 from urllib.parse import quote
-from time import sleep
-from requests import ReadTimeout, get
 import xml.etree.ElementTree as ET
 from bs4 import BeautifulSoup
 
 class JIDManager(IdentifierManager):
     """This class implements an identifier manager for jid identifier"""
-    def __init__(self, data={}, use_api_service=True):
+    def __init__(self, data=None, use_api_service=True, storage_manager=None, **params):
         """JID manager constructor"""
-        super(JIDManager, self).__init__()
+        super(JIDManager, self).__init__(**params)
         self._api = "https://api.jstage.jst.go.jp/searchapi/"
         self._api2 = "https://www.jstage.jst.go.jp/browse/"
         self.use_api_service = use_api_service 
         self._p = "jid:"
-        self._data = data
+        self.storage_manager = InMemoryStorageManager(data) if storage_manager is None else storage_manager
 
-    def is_valid(self, jid, get_extra_info=False):
-        jid = self.normalise(jid, include_prefix=True)
-
-        if jid is None:
-            return False
-        else:
-            if jid not in self._data or self._data[jid] is None:
-                if get_extra_info:
-                    info = self.exists(jid, get_extra_info=True)
-                    self._data[jid] = info[1]
-                    return (info[0] and self.syntax_ok(jid)), info[1]
-                self._data[jid] = dict()
-                self._data[jid]["valid"] = True if (self.exists(jid) and self.syntax_ok(jid)) else False
-                return self._data[jid].get("valid")
-            
-            if get_extra_info:
-                return self._data[jid].get("valid"), self._data[jid]
-            return self._data[jid].get("valid")
-    
     def normalise(self, id_string, include_prefix=False):
         try:
             if id_string.startswith(self._p):
@@ -56,81 +36,35 @@ class JIDManager(IdentifierManager):
        
     
     def exists(self, jid_full, get_extra_info=False, allow_extra_api=None):
+        prefiltered = self._get_prefiltered_result(jid_full, get_extra_info)
+        if prefiltered is not None:
+            return prefiltered
         valid_bool = True
         if self.use_api_service:
             jid = self.normalise(jid_full)
             if jid is not None:
-                tentative = 3
-                while tentative:
-                    tentative -= 1
-                    try:
-                        r = get(self._api+ "/do?service=2&cdjournal=" + quote(jid), headers=self._headers, timeout=30)
-                        #fromstring() parses XML from a string directly into an Element, which is the root element of the parsed tree
-                        root = ET.fromstring(r.content)
-                        status = root.find(".//{http://www.w3.org/2005/Atom}status").text
-                        if status =="0":
-                            if get_extra_info:
-                                return True, self.extra_info(r.content)
-                            return True
-                        elif status == "ERR_001":
-                            if get_extra_info:
-                                return False, {"valid": False}
-                            return False
-                        else:
-                            tentative=3
-                            while tentative:
-                                tentative -=1
-                                try:
-                                    r = get(self._api+ "/do?service=2&cdjournal=" + quote(jid), headers=self._headers, timeout=30)
-                                    #fromstring() parses XML from a string directly into an Element, which is the root element of the parsed tree
-                                    root = ET.fromstring(r.content)
-                                    status = root.find(".//{http://www.w3.org/2005/Atom}status").text
-                                    if status =="0":
-                                        if get_extra_info:
-                                            return True, self.extra_info(r.content)
-                                        return True
-                                    elif status == "ERR_001":
-                                        if get_extra_info:
-                                            return False, {"valid": False}
-                                        return False
-                                except ReadTimeout:
-                                # Do nothing, just try again
-                                    pass
-                                except ConnectionError:
-                                # Sleep 5 seconds, then try again
-                                    sleep(5)
-
-                            #inserisci chiamata all'altra API
-                            try:
-                                r = get(self._api2 + quote(jid), headers=self._headers, timeout=30)
-                                if r.status_code == 404:
-                                    if get_extra_info:
-                                        return False, {"valid": False}
-                                    return False
-                                elif r.status_code == 200:
-                                    r.encoding = "utf-8"
-                                    soup = BeautifulSoup(r.text, features="lxml")
-                                    txt_obj = str(soup.find(id="page-content"))
-                                    if get_extra_info:
-                                        return True, self.extra_info(txt_obj)
-                                    return True
-                            except ReadTimeout:
-                                # Do nothing, just try again
-                                    pass
-                            except ConnectionError:
-                            # Sleep 5 seconds, then try again
-                                sleep(5)
-
-                            if get_extra_info:
-                                return False, {"valid": False}
-                            return False
-                    except ReadTimeout:
-                        # Do nothing, just try again
-                        pass
-                    except ConnectionError:
-                        # Sleep 5 seconds, then try again
-                        sleep(5)
-
+                r = self._get_response(self._api + "/do?service=2&cdjournal=" + quote(jid))
+                if r is not None and r.status_code == 200:
+                    #fromstring() parses XML from a string directly into an Element, which is the root element of the parsed tree
+                    root = ET.fromstring(r.content)
+                    status = root.find(".//{http://www.w3.org/2005/Atom}status").text
+                    if status == "0":
+                        if get_extra_info:
+                            return True, self.extra_info(r.content)
+                        return True
+                    elif status == "ERR_001":
+                        if get_extra_info:
+                            return False, {"valid": False}
+                        return False
+                # if J-STAGE does not answer, try the other API
+                r = self._get_response(self._api2 + quote(jid))
+                if r is not None and r.status_code == 200:
+                    r.encoding = "utf-8"
+                    soup = BeautifulSoup(r.text, features="lxml")
+                    txt_obj = str(soup.find(id="page-content"))
+                    if get_extra_info:
+                        return True, self.extra_info(txt_obj)
+                    return True
                 valid_bool=False
 
             else:
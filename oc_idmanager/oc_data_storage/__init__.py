@@ -0,0 +1,27 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from oc_idmanager.oc_data_storage.storage_manager import StorageManager
+from oc_idmanager.oc_data_storage.in_memory_manager import InMemoryStorageManager
+from oc_idmanager.oc_data_storage.sqlite_manager import SqliteStorageManager
+from oc_idmanager.oc_data_storage.tiered_manager import TieredStorageManager
+from oc_idmanager.oc_data_storage.indexed_file_manager import IndexedFileStorageManager
+from oc_idmanager.oc_data_storage.file_loader import iter_file_entries, load_file, load_items
+from oc_idmanager.oc_data_storage.snapshot import (SnapshotStorageManager, export_snapshot, import_snapshot,
+                                                   read_snapshot)
+from oc_idmanager.oc_data_storage.bloom_filter import BloomFilter
+from oc_idmanager.oc_data_storage.sorted_index import SortedIndex
@@ -0,0 +1,127 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from __future__ import annotations
+
+import math
+import struct
+from hashlib import blake2b
+from typing import Callable, Iterable
+
+# Header: magic string, format version, number of bits, number of hash functions, number of ids added
+_HEADER = struct.Struct("<8sHQIQ")
+_MAGIC = b"OCIDBLOM"
+_VERSION = 1
+
+
+class BloomFilter(object):
+    """This class implements a Bloom filter, i.e. a compact probabilistic set of ids,
+    which can be built from a dump of the ids registered in a scheme. If an id is not
+    in the filter, it is certainly not registered, while if it is in the filter, it is
+    registered with a probability that depends on the error rate of the filter."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """Bloom filter constructor.
+
+        Args:
+            capacity (int): the expected number of ids
+            error_rate (float, optional): the expected rate of false positives when the filter
+                contains capacity ids. Defaults to 0.01.
+        """
+        capacity = max(capacity, 1)
+        self._size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self._hashes = max(1, int(round(self._size / capacity * math.log(2))))
+        self._bits = bytearray((self._size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, id_string: str) -> Iterable[int]:
+        # Double hashing: the i-th position is h1 + i * h2, computed on a single 128-bit digest
+        digest = blake2b(id_string.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self._size for i in range(self._hashes))
+
+    def add(self, id_string: str) -> None:
+        for position in self._positions(id_string):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, ids: Iterable[str]) -> None:
+        for id_string in ids:
+            self.add(id_string)
+
+    def __contains__(self, id_string: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(id_string))
+
+    def save(self, path: str) -> None:
+        """Writes the filter into a binary file.
+
+        Args:
+            path (str): the path of the file
+        """
+        with open(path, "wb") as fp:
+            fp.write(_HEADER.pack(_MAGIC, _VERSION, self._size, self._hashes, self.count))
+            fp.write(self._bits)
+
+    @classmethod
+    def load(cls, path: str) -> BloomFilter:
+        """Reads a filter written by the method save.
+
+        Args:
+            path (str): the path of the file
+        Returns:
+            BloomFilter: the filter
+        """
+        with open(path, "rb") as fp:
+            magic, version, size, hashes, count = _HEADER.unpack(fp.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"{path} is not a Bloom filter")
+            if version != _VERSION:
+                raise ValueError(f"Unsupported Bloom filter version {version}")
+            bloom_filter = cls.__new__(cls)
+            bloom_filter._size = size
+            bloom_filter._hashes = hashes
+            bloom_filter._bits = bytearray(fp.read())
+            bloom_filter.count = count
+        return bloom_filter
+
+    @classmethod
+    def from_dump(cls, path: str, normalise: Callable[[str], str|None], capacity: int|None = None,
+                  error_rate: float = 0.01) -> BloomFilter:
+        """Builds a filter from a text file containing one id per line, such as a dump
+        of the ids registered in a scheme.
+
+        Args:
+            path (str): the path of the file
+            normalise (callable): the function used to normalise the ids, which should be the method
+                normalise of the identifier manager of the scheme, including the prefix
+                (e.g. lambda id_string: DOIManager().normalise(id_string, include_prefix=True))
+            capacity (int, optional): the expected number of ids. Defaults to the number of lines of the file.
+            error_rate (float, optional): the expected rate of false positives. Defaults to 0.01.
+        Returns:
+            BloomFilter: the filter
+        """
+        if capacity is None:
+            with open(path, "rb") as fp:
+                capacity = sum(1 for _ in fp)
+        bloom_filter = cls(capacity, error_rate)
+        with open(path, encoding="utf-8") as fp:
+            for line in fp:
+                id_string = normalise(line.strip()) if line.strip() else None
+                if id_string:
+                    bloom_filter.add(id_string)
+        return bloom_filter
@@ -0,0 +1,174 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from __future__ import annotations
+
+import gzip
+import json
+import re
+from itertools import islice
+from typing import BinaryIO, Iterable, Iterator, Tuple
+
+from oc_idmanager.oc_data_storage.storage_manager import StorageManager
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+def iter_file_entries(path: str, chunk_size: int = 1 << 20) -> Iterator[Tuple[str, dict, int, int]]:
+    """Streams the ids stored in a file, without loading the whole file in memory.
+    The file can either contain a single JSON object mapping the ids to their information,
+    like test/data/glob.json, or one such object per line (JSONL, if the file name ends
+    with ".jsonl" or ".jsonl.gz"). Gzip-compressed files are supported too.
+
+    Args:
+        path (str): the path of the file
+        chunk_size (int, optional): the number of bytes read at a time. Defaults to 1 MiB.
+    Returns:
+        iterator: an iterator of (id_string, value, offset, length) tuples, where offset and length
+            locate in the uncompressed file the bytes of the value (or of the line, in JSONL files)
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as fp:
+        if path.endswith(".jsonl") or path.endswith(".jsonl.gz"):
+            yield from _iter_jsonl_entries(fp)
+        else:
+            yield from _iter_json_entries(fp, chunk_size)
+
+
+def load_file(path: str, storage_manager: StorageManager, batch_size: int = 10000) -> int:
+    """Stores the ids contained in a file (see iter_file_entries) into a storage, incrementally.
+
+    Args:
+        path (str): the path of the file
+        storage_manager (StorageManager): the storage to fill
+        batch_size (int, optional): the number of ids passed to the storage at a time. Defaults to 10000.
+    Returns:
+        int: the number of ids loaded
+    """
+    items = ((id_string, value) for id_string, value, _, _ in iter_file_entries(path))
+    return load_items(items, storage_manager, batch_size)
+
+
+def load_items(items: Iterable[Tuple[str, dict]], storage_manager: StorageManager, batch_size: int = 10000) -> int:
+    """Stores (id_string, value) tuples into a storage, a batch at a time, so that neither
+    all the items are kept in memory nor the storage is locked for the whole operation.
+
+    Args:
+        items (iterable): an iterable of (id_string, value) tuples
+        storage_manager (StorageManager): the storage to fill
+        batch_size (int, optional): the number of ids passed to the storage at a time. Defaults to 10000.
+    Returns:
+        int: the number of ids stored
+    """
+    count = 0
+    items = iter(items)
+    batch = list(islice(items, batch_size))
+    while batch:
+        storage_manager.set_values(batch)
+        count += len(batch)
+        batch = list(islice(items, batch_size))
+    return count
+
+
+def _iter_jsonl_entries(fp: BinaryIO) -> Iterator[Tuple[str, dict, int, int]]:
+    offset = 0
+    for line in fp:
+        if line.strip():
+            for id_string, value in json.loads(line).items():
+                yield id_string, value, offset, len(line)
+        offset += len(line)
+
+
+def _iter_json_entries(fp: BinaryIO, chunk_size: int) -> Iterator[Tuple[str, dict, int, int]]:
+    # The bytes are decoded as latin-1, so that the position of each character is
+    # also its byte offset in the file. The values are decoded again as UTF-8
+    # only if they contain non-ASCII characters.
+    reader = _Buffer(fp, chunk_size)
+    if reader.skip_whitespace() != "{":
+        raise ValueError("The file does not contain a JSON object")
+    reader.pos += 1
+    while True:
+        char = reader.skip_whitespace()
+        if char == ",":
+            reader.pos += 1
+            char = reader.skip_whitespace()
+        if char == "}":
+            return
+        key_start = reader.pos
+        id_string, key_end = reader.decode()
+        if not reader.buf[key_start:key_end].isascii():
+            id_string = json.loads(reader.buf[key_start:key_end].encode("latin-1"))
+        reader.pos = key_end
+        if reader.skip_whitespace() != ":":
+            raise ValueError(f"Missing ':' after {id_string!r}")
+        reader.pos += 1
+        reader.skip_whitespace()
+        value_start = reader.pos
+        value, value_end = reader.decode()
+        raw_value = reader.buf[value_start:value_end]
+        if not raw_value.isascii():
+            value = json.loads(raw_value.encode("latin-1"))
+        yield id_string, value, reader.offset + value_start, value_end - value_start
+        reader.pos = value_end
+        reader.compact()
+
+
+class _Buffer(object):
+    def __init__(self, fp: BinaryIO, chunk_size: int):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.offset = 0
+        self.eof = False
+
+    def read(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk.decode("latin-1")
+        return True
+
+    def skip_whitespace(self) -> str:
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.read():
+                raise ValueError("Unexpected end of file")
+
+    def decode(self) -> tuple:
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+                # A value ending exactly at the end of the buffer (e.g. a number) may be truncated
+                if end < len(self.buf) or self.eof:
+                    return obj, end
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.read()
+
+    def compact(self) -> None:
+        if self.pos > self.chunk_size:
+            self.buf = self.buf[self.pos:]
+            self.offset += self.pos
+            self.pos = 0
@@ -0,0 +1,145 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from __future__ import annotations
+
+import json
+from collections import OrderedDict
+from threading import Lock
+from time import time
+from typing import Iterable, Tuple
+
+from oc_idmanager.oc_data_storage.storage_manager import StorageManager
+
+
+class InMemoryStorageManager(StorageManager):
+    """This class implements a storage that keeps the information about the ids
+    in a dictionary, which is lost when the process terminates. The storage can be
+    bounded by a maximum number of entries and/or an approximate size in bytes:
+    when the budget is exceeded, the least recently used entries are evicted.
+    Moreover, a time to live can be specified, after which the entries expire."""
+
+    def __init__(self, data: dict|None = None, max_entries: int|None = None, max_bytes: int|None = None,
+                 ttl: float|None = None, **params):
+        """In-memory storage manager constructor.
+
+        Args:
+            data (dict, optional): a dictionary of previously retrieved information about ids
+                (e.g. the content of test/data/glob.json). If the storage is unbounded, the
+                dictionary is used and updated in place, otherwise its content is copied.
+            max_entries (int, optional): the maximum number of ids stored. Defaults to None (unbounded).
+            max_bytes (int, optional): the maximum size in bytes of the ids and of their information,
+                computed on their JSON serialisation. Defaults to None (unbounded).
+            ttl (float, optional): the number of seconds after which an entry expires and it is
+                treated as missing. Defaults to None (the entries never expire).
+        """
+        super(InMemoryStorageManager, self).__init__(**params)
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._bounded = max_entries is not None or max_bytes is not None
+        self._ttl = ttl
+        self._expires = dict()
+        self._lock = Lock()
+        self._sizes = dict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if not self._bounded:
+            self._data = {} if data is None else data
+            if ttl is not None:
+                self._expires = dict.fromkeys(self._data, time() + ttl)
+        else:
+            self._data = OrderedDict()
+            if data:
+                self.set_values(data.items())
+
+    def get_value(self, id_string: str) -> dict|None:
+        with self._lock:
+            value = self._data.get(id_string)
+            if value is not None and self._expires.get(id_string, float("inf")) <= time():
+                self._remove(id_string)
+                value = None
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                if self._bounded:
+                    self._data.move_to_end(id_string)
+            return value
+
+    def set_value(self, id_string: str, value: dict) -> None:
+        with self._lock:
+            self._data[id_string] = value
+            if self._ttl is not None:
+                self._expires[id_string] = time() + self._ttl
+            if self._bounded:
+                self._data.move_to_end(id_string)
+                if self._max_bytes is not None:
+                    size = len(id_string) + len(json.dumps(value))
+                    self._size += size - self._sizes.get(id_string, 0)
+                    self._sizes[id_string] = size
+                self._evict()
+
+    def set_values(self, items: Iterable[Tuple[str, dict]]) -> None:
+        if self._bounded or self._ttl is not None:
+            super(InMemoryStorageManager, self).set_values(items)
+            return
+        # Without bounds and expiration, the values are stored with a single update
+        with self._lock:
+            self._data.update(items)
+
+    def delete_value(self, id_string: str) -> None:
+        with self._lock:
+            self._remove(id_string)
+
+    def get_all_keys(self) -> Iterable[str]:
+        if self._ttl is None:
+            return list(self._data.keys())
+        now = time()
+        return [id_string for id_string in list(self._data.keys()) if self._expires.get(id_string, float("inf")) > now]
+
+    def delete_storage(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+            self._sizes.clear()
+            self._size = 0
+
+    def get_stats(self) -> dict:
+        """Returns the counters of the storage.
+
+        Returns:
+            dict: the number of entries, their approximate size in bytes (if the storage is bounded by size),
+                and the number of hits, misses and evictions
+        """
+        return {"entries": len(self._data), "bytes": self._size, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+    def _evict(self) -> None:
+        # The least recently used entries are at the beginning of the OrderedDict
+        while self._data and (
+                (self._max_entries is not None and len(self._data) > self._max_entries)
+                or (self._max_bytes is not None and self._size > self._max_bytes)):
+            id_string, _ = self._data.popitem(last=False)
+            self._remove(id_string)
+            self.evictions += 1
+
+    def _remove(self, id_string: str) -> None:
+        self._data.pop(id_string, None)
+        self._expires.pop(id_string, None)
+        self._size -= self._sizes.pop(id_string, 0)
@@ -0,0 +1,157 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from threading import Lock
+from typing import Iterator
+
+from oc_idmanager.oc_data_storage.file_loader import iter_file_entries
+from oc_idmanager.oc_data_storage.overlay_manager import OverlayStorageManager
+from oc_idmanager.oc_data_storage.storage_manager import StorageManager
+
+# Header: magic string, format version, number of ids, size and modification time of the indexed file
+_HEADER = struct.Struct("<8sHQQq")
+_OFFSET = struct.Struct("<Q")
+_POSITION = struct.Struct("<QQ")
+_MAGIC = b"OCIDFIDX"
+_VERSION = 1
+
+
+class IndexedFileStorageManager(OverlayStorageManager):
+    """This class implements a read-through storage over a file like test/data/glob.json
+    (or its JSONL equivalent). The position of each id in the file is kept in a sidecar
+    index, written the first time the file is opened, which contains the ids sorted and is
+    memory-mapped, so that the ids are looked up by binary search and the file is not scanned
+    again when it is opened later. The information of each id is read from the file on demand.
+    The new information stored is kept in a separate storage, which is looked up before the file."""
+
+    def __init__(self, path: str, storage_manager: StorageManager|None = None, index_path: str|None = None, **params):
+        """Indexed file storage manager constructor.
+
+        Args:
+            path (str): the path of the file, which must not be compressed
+            storage_manager (StorageManager, optional): the storage of the new information.
+                Defaults to an InMemoryStorageManager.
+            index_path (str, optional): the path of the sidecar index, which is rebuilt if it does not
+                exist or the file has changed since it was written. Defaults to the path of the file
+                followed by ".idx".
+        """
+        super(IndexedFileStorageManager, self).__init__(storage_manager, **params)
+        if path.endswith(".gz"):
+            raise ValueError("Compressed files cannot be indexed, use load_file instead")
+        self._path = path
+        self._jsonl = path.endswith(".jsonl")
+        self._lock = Lock()
+        index_path = path + ".idx" if index_path is None else index_path
+        stat = os.stat(path)
+        self._mm = self._open_index(index_path, stat)
+        if self._mm is None:
+            build_index(path, index_path)
+            self._mm = self._open_index(index_path, stat)
+            if self._mm is None:
+                raise ValueError(f"{path} has changed while it was indexed")
+        _, _, self._count, _, _ = _HEADER.unpack_from(self._mm)
+        self._positions_start = _HEADER.size + _OFFSET.size * (self._count + 1)
+        self._ids_start = self._positions_start + _POSITION.size * self._count
+        self._fp = open(path, "rb")
+
+    @staticmethod
+    def _open_index(index_path: str, stat: os.stat_result) -> mmap.mmap|None:
+        try:
+            with open(index_path, "rb") as fp:
+                mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if len(mm) >= _HEADER.size:
+            magic, version, _, size, mtime = _HEADER.unpack_from(mm)
+            if (magic, version, size, mtime) == (_MAGIC, _VERSION, stat.st_size, stat.st_mtime_ns):
+                return mm
+        mm.close()
+        return None
+
+    def _get_id(self, i: int) -> bytes:
+        start, end = struct.unpack_from("<QQ", self._mm, _HEADER.size + _OFFSET.size * i)
+        return self._mm[self._ids_start + start:self._ids_start + end]
+
+    def _get_source_value(self, id_string: str) -> dict|None:
+        key = id_string.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_id(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self._count or self._get_id(low) != key:
+            return None
+        offset, length = _POSITION.unpack_from(self._mm, self._positions_start + _POSITION.size * low)
+        with self._lock:
+            self._fp.seek(offset)
+            raw_value = self._fp.read(length)
+        value = json.loads(raw_value)
+        return value[id_string] if self._jsonl else value
+
+    def _get_source_keys(self) -> Iterator[str]:
+        for i in range(self._count):
+            yield self._get_id(i).decode("utf-8")
+
+    def close(self) -> None:
+        super(IndexedFileStorageManager, self).close()
+        with self._lock:
+            self._fp.close()
+            self._mm.close()
+
+
+def build_index(path: str, index_path: str) -> int:
+    """Writes the sidecar index of a file like test/data/glob.json (or its JSONL equivalent),
+    containing its ids sorted, with their positions in the file.
+
+    Args:
+        path (str): the path of the file
+        index_path (str): the path of the index
+    Returns:
+        int: the number of distinct ids indexed
+    """
+    stat = os.stat(path)
+    # The last position of an id in the file wins, as when the file is loaded
+    positions = {id_string: (offset, length) for id_string, _, offset, length in iter_file_entries(path)}
+    ids = sorted((id_string.encode("utf-8"), position) for id_string, position in positions.items())
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(index_path)))
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(_HEADER.pack(_MAGIC, _VERSION, len(ids), stat.st_size, stat.st_mtime_ns))
+            offset = 0
+            fp.write(_OFFSET.pack(offset))
+            for key, _ in ids:
+                offset += len(key)
+                fp.write(_OFFSET.pack(offset))
+            for _, position in ids:
+                fp.write(_POSITION.pack(*position))
+            for key, _ in ids:
+                fp.write(key)
+        # The index is replaced atomically, so that the processes opening the file concurrently never read it partially written
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return len(ids)
@@ -0,0 +1,80 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from __future__ import annotations
+
+from abc import abstractmethod
+from typing import Iterable
+
+from oc_idmanager.oc_data_storage.in_memory_manager import InMemoryStorageManager
+from oc_idmanager.oc_data_storage.storage_manager import StorageManager
+
+
+class OverlayStorageManager(StorageManager):
+    """This is the base class of the storages that read the information about the ids
+    from a read-only source (e.g. a file), while the new information is kept in a separate
+    storage, which is looked up before the read-only source."""
+
+    def __init__(self, storage_manager: StorageManager|None = None, **params):
+        """Overlay storage manager constructor.
+
+        Args:
+            storage_manager (StorageManager, optional): the storage of the new information.
+                Defaults to an InMemoryStorageManager.
+        """
+        super(OverlayStorageManager, self).__init__(**params)
+        self.storage_manager = InMemoryStorageManager() if storage_manager is None else storage_manager
+        self._deleted = set()
+
+    @abstractmethod
+    def _get_source_value(self, id_string: str) -> dict|None:
+        pass
+
+    @abstractmethod
+    def _get_source_keys(self) -> Iterable[str]:
+        pass
+
+    def get_value(self, id_string: str) -> dict|None:
+        value = self.storage_manager.get_value(id_string)
+        if value is not None or id_string in self._deleted:
+            return value
+        return self._get_source_value(id_string)
+
+    def set_value(self, id_string: str, value: dict) -> None:
+        self.storage_manager.set_value(id_string, value)
+        self._deleted.discard(id_string)
+
+    def set_values(self, items) -> None:
+        items = list(items)
+        self.storage_manager.set_values(items)
+        self._deleted.difference_update(id_string for id_string, _ in items)
+
+    def delete_value(self, id_string: str) -> None:
+        self.storage_manager.delete_value(id_string)
+        self._deleted.add(id_string)
+
+    def get_all_keys(self) -> Iterable[str]:
+        keys = set(self.storage_manager.get_all_keys())
+        keys.update(id_string for id_string in self._get_source_keys() if id_string not in self._deleted)
+        return keys
+
+    def delete_storage(self) -> None:
+        self.storage_manager.delete_storage()
+        self._deleted.update(self._get_source_keys())
+
+    def close(self) -> None:
+        self.storage_manager.close()
@@ -0,0 +1,172 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from __future__ import annotations
+
+import json
+import struct
+import zlib
+from itertools import accumulate, compress
+from operator import itemgetter
+from typing import Iterable, Iterator, Tuple
+
+from oc_idmanager.oc_data_storage.file_loader import load_items
+from oc_idmanager.oc_data_storage.overlay_manager import OverlayStorageManager
+from oc_idmanager.oc_data_storage.storage_manager import StorageManager
+
+# Header: magic string, format version, flags, number of ids, size of the keys block,
+# size of the extra information block
+_HEADER = struct.Struct("<8sHHQQQ")
+_MAGIC = b"OCIDSNAP"
+_VERSION = 1
+_COMPRESSED = 1
+# The bits of each byte, from the least significant, used to unpack the bitmaps
+_BITS = [tuple(bool(byte >> i & 1) for i in range(8)) for byte in range(256)]
+
+
+def export_snapshot(storage_manager: StorageManager, path: str, compress: bool = True) -> int:
+    """Writes the content of a storage into a compact binary snapshot. The ids are sorted
+    and separated by NUL characters, their validity is packed into a bitmap, and the
+    remaining information, if any, is serialised as one JSON object per line (optionally
+    compressed with zlib), following the order of the ids.
+
+    Args:
+        storage_manager (StorageManager): the storage to export
+        path (str): the path of the snapshot file
+        compress (bool, optional): True to compress the extra information. Defaults to True.
+    Returns:
+        int: the number of ids exported
+    """
+    # The items are sorted by id only, since their values may not be comparable
+    items = sorted(storage_manager.items(), key=itemgetter(0))
+    count = len(items)
+    valid_bitmap = bytearray((count + 7) // 8)
+    info_bitmap = bytearray((count + 7) // 8)
+    infos = list()
+    for i, (id_string, value) in enumerate(items):
+        if "\0" in id_string:
+            raise ValueError(f"The id {id_string!r} contains a NUL character")
+        if value.get("valid"):
+            valid_bitmap[i >> 3] |= 1 << (i & 7)
+        info = {k: v for k, v in value.items() if k != "valid"}
+        if info:
+            info_bitmap[i >> 3] |= 1 << (i & 7)
+            infos.append(json.dumps(info, separators=(",", ":")))
+    keys_block = "\0".join(id_string for id_string, _ in items).encode("utf-8")
+    info_block = "\n".join(infos).encode("utf-8")
+    if compress:
+        info_block = zlib.compress(info_block)
+    with open(path, "wb") as fp:
+        fp.write(_HEADER.pack(_MAGIC, _VERSION, _COMPRESSED if compress else 0,
+                              count, len(keys_block), len(info_block)))
+        fp.write(keys_block)
+        fp.write(valid_bitmap)
+        fp.write(info_bitmap)
+        fp.write(info_block)
+    return count
+
+
+def read_snapshot(path: str) -> Iterator[Tuple[str, dict]]:
+    """Reads a snapshot written by export_snapshot.
+
+    Args:
+        path (str): the path of the snapshot file
+    Returns:
+        iterator: an iterator of (id_string, value) tuples, sorted by id
+    """
+    keys, valid_bitmap, info_bitmap, infos = _parse_snapshot(path)
+    values = [{"valid": valid} for valid in _unpack_bitmap(valid_bitmap, len(keys))]
+    if infos:
+        # The extra information is decoded with a single call, as a JSON array
+        for i, info in zip(compress(range(len(keys)), _unpack_bitmap(info_bitmap, len(keys))),
+                           json.loads("[" + ",".join(infos) + "]")):
+            values[i].update(info)
+    return zip(keys, values)
+
+
+def import_snapshot(path: str, storage_manager: StorageManager, batch_size: int = 10000) -> int:
+    """Stores the content of a snapshot written by export_snapshot into a storage.
+
+    Args:
+        path (str): the path of the snapshot file
+        storage_manager (StorageManager): the storage to fill
+        batch_size (int, optional): the number of ids passed to the storage at a time. Defaults to 10000.
+    Returns:
+        int: the number of ids imported
+    """
+    return load_items(read_snapshot(path), storage_manager, batch_size)
+
+
+class SnapshotStorageManager(OverlayStorageManager):
+    """This class implements a storage over a snapshot written by export_snapshot, which
+    is much faster to open than loading the snapshot into another storage, since the
+    information about each id is decoded only when it is requested. The new information
+    stored is kept in a separate storage, which is looked up before the snapshot."""
+
+    def __init__(self, path: str, storage_manager: StorageManager|None = None, **params):
+        """Snapshot storage manager constructor.
+
+        Args:
+            path (str): the path of the snapshot file
+            storage_manager (StorageManager, optional): the storage of the new information.
+                Defaults to an InMemoryStorageManager.
+        """
+        super(SnapshotStorageManager, self).__init__(storage_manager, **params)
+        keys, self._valid_bitmap, self._info_bitmap, self._infos = _parse_snapshot(path)
+        self._positions = dict(zip(keys, range(len(keys))))
+        # The position of the extra information of the i-th id is the number of ids with extra information before it
+        self._info_positions = list(accumulate(_unpack_bitmap(self._info_bitmap, len(keys)))) if self._infos else []
+
+    def _get_source_value(self, id_string: str) -> dict|None:
+        i = self._positions.get(id_string)
+        if i is None:
+            return None
+        # The flags are read from the bitmaps only for the ids requested
+        value = {"valid": bool(self._valid_bitmap[i >> 3] >> (i & 7) & 1)}
+        if self._info_bitmap[i >> 3] >> (i & 7) & 1:
+            value.update(json.loads(self._infos[self._info_positions[i] - 1]))
+        return value
+
+    def _get_source_keys(self) -> Iterable[str]:
+        return self._positions.keys()
+
+
+def _parse_snapshot(path: str) -> tuple:
+    with open(path, "rb") as fp:
+        content = fp.read()
+    magic, version, flags, count, keys_size, info_size = _HEADER.unpack_from(content)
+    if magic != _MAGIC:
+        raise ValueError(f"{path} is not a snapshot of a storage")
+    if version != _VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+    pos = _HEADER.size
+    keys = content[pos:pos + keys_size].decode("utf-8").split("\0") if count else []
+    pos += keys_size
+    bitmap_size = (count + 7) // 8
+    valid_bitmap = content[pos:pos + bitmap_size]
+    pos += bitmap_size
+    info_bitmap = content[pos:pos + bitmap_size]
+    pos += bitmap_size
+    info_block = content[pos:pos + info_size]
+    if flags & _COMPRESSED:
+        info_block = zlib.decompress(info_block)
+    infos = info_block.decode("utf-8").split("\n") if info_block else []
+    return keys, valid_bitmap, info_bitmap, infos
+
+
+def _unpack_bitmap(bitmap: bytes, count: int) -> list:
+    return [bit for byte in bitmap for bit in _BITS[byte]][:count]
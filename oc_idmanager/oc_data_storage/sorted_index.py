@@ -0,0 +1,143 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from __future__ import annotations
+
+import heapq
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from typing import Iterable, Iterator
+
+# Header: magic string, format version, number of ids
+_HEADER = struct.Struct("<8sHQ")
+_OFFSET = struct.Struct("<Q")
+_MAGIC = b"OCIDSIDX"
+_VERSION = 1
+
+
+class SortedIndex(object):
+    """This class implements a read-only set of ids stored in a memory-mapped file, where
+    the ids are sorted, so that their membership is checked by binary search without
+    loading the file in memory. The file contains a header, the offsets of the ids,
+    and the ids encoded in UTF-8."""
+
+    def __init__(self, path: str):
+        """Sorted index constructor.
+
+        Args:
+            path (str): the path of a file written by SortedIndex.build
+        """
+        self._fp = open(path, "rb")
+        self._mm = mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._count = _HEADER.unpack_from(self._mm)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a sorted index")
+        if version != _VERSION:
+            raise ValueError(f"Unsupported sorted index version {version}")
+        self._ids_start = _HEADER.size + _OFFSET.size * (self._count + 1)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _get(self, i: int) -> bytes:
+        start, end = struct.unpack_from("<QQ", self._mm, _HEADER.size + _OFFSET.size * i)
+        return self._mm[self._ids_start + start:self._ids_start + end]
+
+    def __contains__(self, id_string: str) -> bool:
+        key = id_string.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._get(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low < self._count and self._get(low) == key
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._count):
+            yield self._get(i).decode("utf-8")
+
+    def close(self) -> None:
+        self._mm.close()
+        self._fp.close()
+
+    @staticmethod
+    def build(ids: Iterable[str], path: str, chunk_size: int = 1000000) -> int:
+        """Writes a sorted index of the ids, which are sorted and deduplicated in chunks
+        on temporary files, then merged, so that they are never kept in memory all together.
+
+        Args:
+            ids (iterable): the ids to index, which must not contain new line characters
+            path (str): the path of the index file
+            chunk_size (int, optional): the number of ids sorted in memory at a time. Defaults to 1000000.
+        Returns:
+            int: the number of distinct ids indexed
+        """
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            chunk_paths = list()
+            chunk = set()
+            for id_string in ids:
+                chunk.add(id_string)
+                if len(chunk) >= chunk_size:
+                    chunk_paths.append(_write_chunk(chunk, tmp_dir, len(chunk_paths)))
+                    chunk = set()
+            if chunk or not chunk_paths:
+                chunk_paths.append(_write_chunk(chunk, tmp_dir, len(chunk_paths)))
+            chunk_files = [open(chunk_path, "rb") for chunk_path in chunk_paths]
+            offsets_path = os.path.join(tmp_dir, "offsets")
+            ids_path = os.path.join(tmp_dir, "ids")
+            count = 0
+            offset = 0
+            previous = None
+            try:
+                with open(offsets_path, "wb") as offsets_fp, open(ids_path, "wb") as ids_fp:
+                    offsets_fp.write(_OFFSET.pack(0))
+                    for line in heapq.merge(*chunk_files):
+                        key = line.rstrip(b"\n")
+                        if key == previous:
+                            continue
+                        previous = key
+                        ids_fp.write(key)
+                        offset += len(key)
+                        offsets_fp.write(_OFFSET.pack(offset))
+                        count += 1
+            finally:
+                for chunk_fp in chunk_files:
+                    chunk_fp.close()
+            with open(path, "wb") as fp:
+                fp.write(_HEADER.pack(_MAGIC, _VERSION, count))
+                for part_path in (offsets_path, ids_path):
+                    with open(part_path, "rb") as part_fp:
+                        shutil.copyfileobj(part_fp, fp)
+            return count
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _write_chunk(chunk: set, tmp_dir: str, number: int) -> str:
+    chunk_path = os.path.join(tmp_dir, f"chunk_{number}")
+    with open(chunk_path, "wb") as fp:
+        for id_string in sorted(chunk):
+            if "\n" in id_string:
+                raise ValueError(f"The id {id_string!r} contains a new line character")
+            fp.write(id_string.encode("utf-8") + b"\n")
+    return chunk_path
@@ -0,0 +1,123 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from threading import Lock
+from time import time
+from typing import Iterable, Iterator, Tuple
+
+from oc_idmanager.oc_data_storage.storage_manager import StorageManager
+
+
+class SqliteStorageManager(StorageManager):
+    """This class implements a storage that keeps the information about the ids
+    in a SQLite database on disk, so that it survives the restart of the process
+    and it can be shared by all the processes running on the same machine.
+    A time to live can be specified, after which the entries expire."""
+
+    def __init__(self, database: str, ttl: float|None = None, **params):
+        """SQLite storage manager constructor.
+
+        Args:
+            database (str): the path of the SQLite database file, which is created if it does not exist
+            ttl (float, optional): the number of seconds after which an entry expires and it is
+                treated as missing. Defaults to None (the entries never expire).
+        """
+        super(SqliteStorageManager, self).__init__(**params)
+        self._database = database
+        self._ttl = ttl
+        self._lock = Lock()
+        self._con = sqlite3.connect(database, timeout=30, isolation_level=None, check_same_thread=False)
+        # WAL journaling allows several processes to read while one of them is writing
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.execute("CREATE TABLE IF NOT EXISTS info (id TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)")
+        if "expires" not in {row[1] for row in self._con.execute("PRAGMA table_info(info)")}:
+            self._con.execute("ALTER TABLE info ADD COLUMN expires REAL")
+
+    def get_value(self, id_string: str) -> dict|None:
+        with self._lock:
+            row = self._con.execute(
+                "SELECT value FROM info WHERE id = ? AND (expires IS NULL OR expires > ?)",
+                (id_string, time())).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_value(self, id_string: str, value: dict) -> None:
+        with self._lock:
+            self._con.execute(
+                "INSERT OR REPLACE INTO info (id, value, expires) VALUES (?, ?, ?)",
+                (id_string, json.dumps(value), self._expires()))
+
+    def set_values(self, items: Iterable[Tuple[str, dict]]) -> None:
+        expires = self._expires()
+        rows = ((id_string, json.dumps(value), expires) for id_string, value in items)
+        with self._lock:
+            self._con.execute("BEGIN")
+            try:
+                self._con.executemany("INSERT OR REPLACE INTO info (id, value, expires) VALUES (?, ?, ?)", rows)
+            except:
+                self._con.execute("ROLLBACK")
+                raise
+            self._con.execute("COMMIT")
+
+    def delete_value(self, id_string: str) -> None:
+        with self._lock:
+            self._con.execute("DELETE FROM info WHERE id = ?", (id_string,))
+
+    def get_all_keys(self) -> Iterable[str]:
+        for id_string, _ in self._iter_rows():
+            yield id_string
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        for id_string, value in self._iter_rows():
+            yield id_string, json.loads(value)
+
+    def _iter_rows(self, page_size: int = 10000) -> Iterator[Tuple[str, str]]:
+        # Rows are read one page at a time, so that huge databases are never loaded in memory
+        # and the lock is not held while the caller processes them
+        last_id = ""
+        while True:
+            with self._lock:
+                rows = self._con.execute(
+                    "SELECT id, value, expires FROM info WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, page_size)).fetchall()
+            now = time()
+            for id_string, value, expires in rows:
+                if expires is None or expires > now:
+                    yield id_string, value
+            if len(rows) < page_size:
+                break
+            last_id = rows[-1][0]
+
+    def _expires(self) -> float|None:
+        return None if self._ttl is None else time() + self._ttl
+
+    def delete_storage(self) -> None:
+        with self._lock:
+            self._con.execute("DELETE FROM info")
+
+    def delete_expired(self) -> None:
+        """Removes the expired entries from the database file."""
+        with self._lock:
+            self._con.execute("DELETE FROM info WHERE expires IS NOT NULL AND expires <= ?", (time(),))
+
+    def close(self) -> None:
+        with self._lock:
+            self._con.close()
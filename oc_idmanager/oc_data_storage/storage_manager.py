@@ -0,0 +1,113 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from __future__ import annotations
+
+from abc import ABCMeta, abstractmethod
+from typing import Iterable, Iterator, Tuple
+
+
+class StorageManager(metaclass=ABCMeta):
+    """This is the interface that must be implemented by any storage used by the
+    identifier managers for keeping the information about the identifiers that
+    have been already validated. The keys are the normalised identifiers, including
+    their prefix (e.g. "doi:10.1108/jd-12-2013-0166"), while the values are the
+    dictionaries returned by the method is_valid (e.g. {"valid": True})."""
+
+    def __init__(self, **params):
+        """Storage manager constructor."""
+        for key in params:
+            setattr(self, key, params[key])
+
+    @abstractmethod
+    def get_value(self, id_string: str) -> dict|None:
+        """Returns the information stored about an id.
+
+        Args:
+            id_string (str): the normalised id, including its prefix
+        Returns:
+            dict: the information stored about the id, or None if the id is not stored
+        """
+        pass
+
+    def __contains__(self, id_string: str) -> bool:
+        """Returns True if some information is stored about an id, so that a storage can be
+        specified as offline_index of an identifier manager.
+
+        Args:
+            id_string (str): the normalised id, including its prefix
+        Returns:
+            bool: True if the id is stored, False otherwise
+        """
+        return self.get_value(id_string) is not None
+
+    @abstractmethod
+    def set_value(self, id_string: str, value: dict) -> None:
+        """Stores the information about an id, replacing the previous one, if any.
+
+        Args:
+            id_string (str): the normalised id, including its prefix
+            value (dict): the information about the id (e.g. {"valid": True})
+        """
+        pass
+
+    def set_values(self, items: Iterable[Tuple[str, dict]]) -> None:
+        """Stores the information about several ids at once.
+
+        Args:
+            items (iterable): an iterable of (id_string, value) tuples
+        """
+        for id_string, value in items:
+            self.set_value(id_string, value)
+
+    @abstractmethod
+    def delete_value(self, id_string: str) -> None:
+        """Removes the information stored about an id, if any.
+
+        Args:
+            id_string (str): the normalised id, including its prefix
+        """
+        pass
+
+    @abstractmethod
+    def get_all_keys(self) -> Iterable[str]:
+        """Returns all the ids stored.
+
+        Returns:
+            iterable: the normalised ids, including their prefix
+        """
+        pass
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        """Returns all the ids stored together with their information.
+
+        Returns:
+            iterator: an iterator of (id_string, value) tuples
+        """
+        for id_string in list(self.get_all_keys()):
+            value = self.get_value(id_string)
+            if value is not None:
+                yield id_string, value
+
+    @abstractmethod
+    def delete_storage(self) -> None:
+        """Removes all the information stored."""
+        pass
+
+    def close(self) -> None:
+        """Releases the resources held by the storage, if any."""
+        pass
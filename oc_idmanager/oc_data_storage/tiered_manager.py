@@ -0,0 +1,96 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Tuple
+
+from oc_idmanager.oc_data_storage.in_memory_manager import InMemoryStorageManager
+from oc_idmanager.oc_data_storage.storage_manager import StorageManager
+
+
+class TieredStorageManager(StorageManager):
+    """This class implements a storage that keeps the positive results (i.e. the ids
+    found valid) and the negative ones in two separate storages, so that they can
+    have different sizes and times to live. For instance, the negative results can
+    expire sooner, so that newly registered ids are checked again within a bounded
+    time, while still avoiding repeated lookups of invalid ids."""
+
+    def __init__(self, positive: StorageManager|None = None, negative: StorageManager|None = None,
+                 positive_ttl: float|None = None, negative_ttl: float|None = 86400, **params):
+        """Tiered storage manager constructor.
+
+        Args:
+            positive (StorageManager, optional): the storage of the valid ids. Defaults to an
+                InMemoryStorageManager with the time to live specified by positive_ttl.
+            negative (StorageManager, optional): the storage of the invalid ids. Defaults to an
+                InMemoryStorageManager with the time to live specified by negative_ttl.
+            positive_ttl (float, optional): the number of seconds after which a valid id is checked
+                again, used only if positive is not specified. Defaults to None (never).
+            negative_ttl (float, optional): the number of seconds after which an invalid id is checked
+                again, used only if negative is not specified. Defaults to 86400 (one day).
+        """
+        super(TieredStorageManager, self).__init__(**params)
+        self.positive = InMemoryStorageManager(ttl=positive_ttl) if positive is None else positive
+        self.negative = InMemoryStorageManager(ttl=negative_ttl) if negative is None else negative
+
+    def get_value(self, id_string: str) -> dict|None:
+        value = self.positive.get_value(id_string)
+        if value is None:
+            value = self.negative.get_value(id_string)
+        return value
+
+    def set_value(self, id_string: str, value: dict) -> None:
+        if value.get("valid"):
+            self.positive.set_value(id_string, value)
+            self.negative.delete_value(id_string)
+        else:
+            self.negative.set_value(id_string, value)
+            self.positive.delete_value(id_string)
+
+    def set_values(self, items: Iterable[Tuple[str, dict]]) -> None:
+        positive_items = list()
+        negative_items = list()
+        for id_string, value in items:
+            (positive_items if value.get("valid") else negative_items).append((id_string, value))
+        self.positive.set_values(positive_items)
+        self.negative.set_values(negative_items)
+        # As in set_value, an id is removed from the other storage, so that its previous result is not returned
+        for id_string, _ in positive_items:
+            self.negative.delete_value(id_string)
+        for id_string, _ in negative_items:
+            self.positive.delete_value(id_string)
+
+    def delete_value(self, id_string: str) -> None:
+        self.positive.delete_value(id_string)
+        self.negative.delete_value(id_string)
+
+    def get_all_keys(self) -> Iterable[str]:
+        yield from self.positive.get_all_keys()
+        yield from self.negative.get_all_keys()
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        yield from self.positive.items()
+        yield from self.negative.items()
+
+    def delete_storage(self) -> None:
+        self.positive.delete_storage()
+        self.negative.delete_storage()
+
+    def close(self) -> None:
+        self.positive.close()
+        self.negative.close()
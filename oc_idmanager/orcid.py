@@ -16,52 +16,24 @@
 
 
 import re
-from json import loads
 from re import match, sub
-from time import sleep
 from urllib.parse import quote
 
-from requests import ReadTimeout, get
-from requests.exceptions import ConnectionError
 
 from oc_idmanager.base import IdentifierManager
+from oc_idmanager.oc_data_storage.in_memory_manager import InMemoryStorageManager
 
 
 class ORCIDManager(IdentifierManager):
     """This class implements an identifier manager for orcid identifier."""
 
-    def __init__(self, data={}, use_api_service=True):
+    def __init__(self, data=None, use_api_service=True, storage_manager=None, **params):
         """Orcid Manager constructor."""
-        super(ORCIDManager, self).__init__()
+        super(ORCIDManager, self).__init__(**params)
         self._api = "https://pub.orcid.org/v3.0/"
         self._use_api_service = use_api_service
         self._p = "orcid:"
-        self._data = data
-
-    def is_valid(self, id_string, get_extra_info=False):
-        orcid = self.normalise(id_string, include_prefix=True)
-        if orcid is None:
-            return False
-        else:
-            if orcid not in self._data or self._data[orcid] is None:
-                if get_extra_info:
-                    info = self.exists(orcid, get_extra_info=True)
-                    self._data[orcid] = info[1]
-                    return (info[0] and self.check_digit(orcid) and self.syntax_ok(orcid)), info[1]
-                self._data[orcid] = dict()
-                self._data[orcid]["valid"] = True if (
-                    self.syntax_ok(orcid)
-                    and self.check_digit(orcid)
-                    and self.exists(orcid)
-                ) else False
-                return (
-                    self.syntax_ok(orcid)
-                    and self.check_digit(orcid)
-                    and self.exists(orcid)
-                )
-            if get_extra_info:
-                return self._data[orcid].get("valid"), self._data[orcid]
-            return self._data[orcid].get("valid")
+        self.storage_manager = InMemoryStorageManager(data) if storage_manager is None else storage_manager
 
     def normalise(self, id_string, include_prefix=False):
         try:
@@ -95,29 +67,20 @@ class ORCIDManager(IdentifierManager):
 
 
     def exists(self, orcid, get_extra_info=False, allow_extra_api=None):
+        prefiltered = self._get_prefiltered_result(orcid, get_extra_info)
+        if prefiltered is not None:
+            return prefiltered
         valid_bool = True
         if self._use_api_service:
             self._headers["Accept"] = "application/json"
             orcid = self.normalise(orcid)
             if orcid is not None:
-                tentative = 3
-                while tentative:
-                    tentative -= 1
-                    try:
-                        r = get(self._api + quote(orcid), headers=self._headers, timeout=30)
-                        if r.status_code == 200:
-                            r.encoding = "utf-8"
-                            json_res = loads(r.text)
-                            valid_bool = json_res.get("orcid-identifier").get("path") == orcid
-                            if get_extra_info:
-                                return valid_bool, self.extra_info(json_res)
-                            return valid_bool
-                    except ReadTimeout:
-                        # Do nothing, just try again
-                        pass
-                    except ConnectionError:
-                        # Sleep 5 seconds, then try again
-                        sleep(5)
+                json_res = self._call_api(self._api + quote(orcid))
+                if json_res:
+                    valid_bool = json_res.get("orcid-identifier").get("path") == orcid
+                    if get_extra_info:
+                        return valid_bool, self.extra_info(json_res)
+                    return valid_bool
                 valid_bool = False
             else:
                 if get_extra_info:
@@ -15,52 +15,37 @@
 # SOFTWARE.
 
 
-from json import loads
 from re import match, sub
-from time import sleep
-from urllib.parse import quote, unquote
+from urllib.parse import unquote
 
-from requests import ReadTimeout, get
-from requests.exceptions import ConnectionError
 
 from oc_idmanager.base import IdentifierManager
+from oc_idmanager.circuit_breaker import APIUnavailableError
+from oc_idmanager.doi import DOIManager
+from oc_idmanager.oc_data_storage.in_memory_manager import InMemoryStorageManager
+from oc_idmanager.pmid import PMIDManager
 
 
 class PMCIDManager(IdentifierManager):
     """This class implements an identifier manager for PMCID identifier"""
 
-    def __init__(self, data={}, use_api_service=True):
+    def __init__(self, data=None, use_api_service=True, storage_manager=None, **params):
         """PMCID manager constructor."""
-        super(PMCIDManager, self).__init__()
+        super(PMCIDManager, self).__init__(**params)
         self._api = "https://www.ncbi.nlm.nih.gov/pmc/utils/idconv/v1.0/"
+        # The maximum number of ids accepted by the ID Converter API in a request
+        self._batch_size = 200
         self._use_api_service = use_api_service
         self._p = "pmcid:"
-        self._data = data
+        self.storage_manager = InMemoryStorageManager(data) if storage_manager is None else storage_manager
+        # The managers normalising the ids returned by the ID Converter API, by scheme
+        self._managers = {"pmcid": self, "pmid": PMIDManager(use_api_service=False), "doi": DOIManager(use_api_service=False)}
 
         # If there's a need to obtain more metadata from a PMCID, consider using Entrez (aka E-Utilities) API (
         # https://eutils.ncbi.nlm.nih.gov/entrez/eutils/), which of course works with different parameters and
         # returns different responses.
         # The ID Converter API only provides alternative IDs (doi, pmid) for the work associated to the queried pmcid.
 
-    def is_valid(self, pmcid, get_extra_info=False):
-
-        pmcid = self.normalise(pmcid, include_prefix=True)
-
-        if pmcid is None:
-            return False
-        else:
-            if pmcid not in self._data or self._data[pmcid] is None:
-                if get_extra_info:
-                    info = self.exists(pmcid, get_extra_info=True)
-                    self._data[pmcid] = info[1]
-                    return (info[0] and self.syntax_ok(pmcid)), info[1]
-                self._data[pmcid] = dict()
-                self._data[pmcid]["valid"] = True if (self.exists(pmcid) and self.syntax_ok(pmcid)) else False
-                return self._data[pmcid].get("valid")
-            if get_extra_info:
-                return self._data[pmcid].get("valid"), self._data[pmcid]
-            return self._data[pmcid].get("valid")
-
     def normalise(self, id_string, include_prefix=False):
         try:
             if id_string.startswith(self._p):
@@ -86,50 +71,20 @@ class PMCIDManager(IdentifierManager):
         return True if match(r"^pmcid:PMC[1-9]\d+(\.\d{1,2})?$", id_string) else False
 
     def exists(self, pmcid_full, get_extra_info=False, allow_extra_api=None):
+        prefiltered = self._get_prefiltered_result(pmcid_full, get_extra_info)
+        if prefiltered is not None:
+            return prefiltered
         valid_bool = True
         if self._use_api_service:
             pmcid = self.normalise(pmcid_full)
             if pmcid is not None:
-                tentative = 3
-                while tentative:
-                    tentative -= 1
-                    try:
-                        parameters = {
-                            'ids': quote(pmcid),
-                            'format': 'json',
-                            'idtype': 'pmcid'
-                        }
-
-                        r = get(self._api, params=parameters, headers=self._headers, timeout=30)
-                        if r.status_code == 200:
-                            r.encoding = "utf-8"
-                            json_res = loads(r.text)
-                            if get_extra_info:
-                                extra_info_result = {}
-                                try:
-                                    result = True if not json_res['records'][0].get('status') =='error' else False
-                                    extra_info_result['valid'] = result
-                                    return result, extra_info_result
-                                except KeyError:
-                                    extra_info_result["valid"] = False
-                                    return False, extra_info_result
-                            try:
-                                return True if not json_res['records'][0].get('status') =='error' else False
-
-                            except KeyError:
-                                return False
-
-                        elif 400 <= r.status_code < 500:
-                            if get_extra_info:
-                                return False, {"valid": False}
-                            return False
-                    except ReadTimeout:
-                        # Do nothing, just try again
-                        pass
-                    except ConnectionError:
-                        # Sleep 5 seconds, then try again
-                        sleep(5)
-                valid_bool = False
+                results = self._idconv_exists([pmcid])
+                if pmcid not in results:
+                    raise APIUnavailableError("www.ncbi.nlm.nih.gov")
+                result = results[pmcid]
+                if get_extra_info:
+                    return result, {"valid": result}
+                return result
             else:
                 if get_extra_info:
                     return False, {"valid": False}
@@ -139,6 +94,111 @@ class PMCIDManager(IdentifierManager):
             return valid_bool, {"valid": valid_bool}
         return valid_bool
 
+    def exists_many(self, pmcids, get_extra_info=False):
+        """Returns the existence of many PMCIDs, checked through the ID Converter API with a
+        request for each batch of up to 200 PMCIDs. The PMCIDs of a batch whose request fails are
+        not in the result, since their existence is unknown.
+
+        Args:
+            pmcids (iterable): the PMCIDs
+            get_extra_info (bool, optional): True to get a dictionary with additional info about each PMCID
+        Returns:
+            dict: the result of exists for each PMCID, by normalised PMCID including its prefix
+        """
+        results = dict()
+        to_check = []
+        for pmcid in dict.fromkeys(self.normalise(pmcid) for pmcid in pmcids):
+            if pmcid is None:
+                continue
+            prefiltered = self._get_prefiltered_result(pmcid, get_extra_info)
+            if prefiltered is not None:
+                results[self._p + pmcid] = prefiltered
+            elif self._use_api_service:
+                to_check.append(pmcid)
+            else:
+                results[self._p + pmcid] = (True, {"valid": True}) if get_extra_info else True
+        for i in range(0, len(to_check), self._batch_size):
+            batch = to_check[i:i + self._batch_size]
+            try:
+                batch_results = self._idconv_exists(batch)
+            except APIUnavailableError:
+                continue
+            for pmcid, valid_bool in batch_results.items():
+                results[self._p + pmcid] = (valid_bool, {"valid": valid_bool}) if get_extra_info else valid_bool
+        return results
+
+    def convert(self, id_string, scheme):
+        """Returns the id in another scheme (pmcid, pmid or doi) of the work identified by an id.
+        The cross-walk is consulted first, and the ID Converter API is called for the ids not in it.
+
+        Args:
+            id_string (str): the id, including its prefix (e.g. "pmid:34429366")
+            scheme (str): the scheme of the id to return (e.g. "doi")
+        Returns:
+            str: the normalised id, including its prefix, or None if it is unknown
+        """
+        return self.convert_many([id_string], scheme)[id_string]
+
+    def convert_many(self, id_strings, scheme):
+        """Returns the ids in another scheme (pmcid, pmid or doi) of the works identified by many ids.
+        The cross-walk is consulted first, and the ids not in it are converted by the ID Converter API,
+        with a request for each batch of up to 200 ids of the same scheme.
+
+        Args:
+            id_strings (iterable): the ids, including their prefix
+            scheme (str): the scheme of the ids to return (e.g. "doi")
+        Returns:
+            dict: the normalised id, including its prefix, or None if it is unknown, for each id
+        """
+        results = dict()
+        missing = dict()
+        for id_string in id_strings:
+            manager = self._managers.get(id_string.split(":", 1)[0])
+            key = None if manager is None else manager.normalise(id_string, include_prefix=True)
+            results[id_string] = None if key is None else self._crosswalk.convert(key, scheme)
+            if key is not None and results[id_string] is None and self._use_api_service:
+                missing.setdefault(key.split(":", 1)[0], dict()).setdefault(key, []).append(id_string)
+        for idtype, keys in missing.items():
+            keys = list(keys.items())
+            for i in range(0, len(keys), self._batch_size):
+                batch = keys[i:i + self._batch_size]
+                self._idconv([key.split(":", 1)[1] for key, _ in batch], idtype)
+                for key, key_id_strings in batch:
+                    for id_string in key_id_strings:
+                        results[id_string] = self._crosswalk.convert(key, scheme)
+        return results
+
+    def _idconv(self, ids, idtype="pmcid"):
+        parameters = {
+            'ids': ",".join(ids),
+            'format': 'json',
+            'idtype': idtype
+        }
+        json_res = self._call_api(self._api, params=parameters)
+        # None if the request failed, as opposed to an empty list if no record was returned
+        if not isinstance(json_res, dict) or json_res.get('status') == 'error':
+            return None
+        records = json_res.get('records', [])
+        for record in records:
+            # Each record also provides the other ids of the work, which are stored in the cross-walk
+            if record.get('status') != 'error':
+                self._crosswalk.add(
+                    self._managers[scheme].normalise(record[scheme], include_prefix=True)
+                    for scheme in self._managers if record.get(scheme))
+        return records
+
+    def _idconv_exists(self, pmcids):
+        records = self._idconv(pmcids)
+        if records is None:
+            return dict()
+        found = dict()
+        for record in records:
+            # The records of the ids not found only contain the requested id
+            for key in ('requested-id', 'pmcid'):
+                if record.get(key):
+                    found.setdefault(record[key].upper(), record.get('status') != 'error')
+        return {pmcid: found.get(pmcid.upper(), found.get(pmcid.upper().split(".")[0], False)) for pmcid in pmcids}
+
     def extra_info(self, api_response, choose_api=None, info_dict={}):
         result = {}
         result["valid"] = True
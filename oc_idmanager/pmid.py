@@ -18,61 +18,52 @@
 import re
 from datetime import datetime
 from re import match, sub
-from time import sleep
 from urllib.parse import quote
 
 from bs4 import BeautifulSoup
-from requests import ReadTimeout, get
-from requests.exceptions import ConnectionError
 
 from oc_idmanager import *
 from oc_idmanager.base import IdentifierManager
+from oc_idmanager.circuit_breaker import APIUnavailableError
+from oc_idmanager.oc_data_storage.in_memory_manager import InMemoryStorageManager
+from oc_idmanager.oc_data_storage.storage_manager import StorageManager
+from oc_idmanager.support import get_rate_limiter
 
 
 class PMIDManager(IdentifierManager):
     """This class implements an identifier manager for pmid identifier"""
 
-    def __init__(self, data={}, use_api_service=True):
-        """PMID manager constructor."""
-        super(PMIDManager, self).__init__()
+    def __init__(self, data=None, use_api_service=True, storage_manager=None, use_eutils=False, api_key=None, **params):
+        """PMID manager constructor.
+
+        Args:
+            use_eutils (bool, optional): True to check the PMIDs and retrieve their MEDLINE records through
+                the NCBI E-utilities instead of the PubMed website. The E-utilities are always used to check
+                many PMIDs with exists_many (and is_valid_many). Defaults to False.
+            api_key (str, optional): the NCBI API key sent to the E-utilities. The requests made with the key are
+                allowed 10 requests per second, instead of 3, by a limit of the key in the rate limiter of the manager,
+                shared by all the managers with the same key and not followed by the requests without it. Defaults to None.
+        """
+        super(PMIDManager, self).__init__(**params)
         self._api = "https://pubmed.ncbi.nlm.nih.gov/"
+        self._eutils_api = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+        self._eutils_batch_size = 200
+        self.use_eutils = use_eutils
+        self.api_key = api_key
+        if api_key is not None:
+            rate_limiter = get_rate_limiter() if self.rate_limiter is None else self.rate_limiter
+            if not rate_limiter.has_limit("eutils.ncbi.nlm.nih.gov", api_key):
+                rate_limiter.set_limit("eutils.ncbi.nlm.nih.gov", 10, key=api_key)
         self._use_api_service = use_api_service
         self._p = "pmid:"
-        self._data = data
+        self.storage_manager = InMemoryStorageManager(data) if storage_manager is None else storage_manager
         self._im = ISSNManager()
-        #regex
-        self._doi_regex = r"(?<=^AID\s-\s).*\[doi\]\s*\n"
+        self._dm = DOIManager(use_api_service=False)
         self._pmid_regex = r"(?<=PMID-\s)[1-9]\d*"
-        self._title_regex = r"(?<=^TI\s{2}-\s)(.+?)*(\n\s{6}(.+?)*)*(?=(?:\n[A-Z]{2,4}\s{,2}-\s*|$))"
-        self._author_regex = r"(?<=^FAU\s-\s)(.+?)*(\n\s{6}(.+?)*)*(?=(?:\n[A-Z]{2,4}\s{,2}-\s*|$))"
-        self._date_regex = r"DP\s+-\s+(\d{4}(\s?(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec))?(\s?((3[0-1])|([1-2][0-9])|([0]?[1-9])))?)"
-        self._issn_regex = r"(?<=^IS\s{2}-\s)[0-9]{4}-[0-9]{3}[0-9X]"
-        self._journal_regex = r"(?<=^JT\s{2}-\s)(.+?)*(\n\s{6}(.+?)*)*(?=(?:\n[A-Z]{2,4}\s{,2}-\s*|$))"
-        self._volume_regex = r"(?<=^VI\s{2}-\s)(.+?)*(\n\s{6}(.+?)*)*(?=(?:\n[A-Z]{2,4}\s{,2}-\s*|$))"
-        self._issue_regex = r"(?<=^IP\s{2}-\s)(.+?)*(\n\s{6}(.+?)*)*(?=(?:\n[A-Z]{2,4}\s{,2}-\s*|$))"
-        self._page_regex = r"(?<=^PG\s{2}-\s)(.+?)*(\n\s{6}(.+?)*)*(?=(?:\n[A-Z]{2,4}\s{,2}-\s*|$))"
-        self._type_regex = r"(?<=^PT\s{2}-\s)(.+?)*(\n\s{6}(.+?)*)*(?=(?:\n[A-Z]{2,4}\s{,2}-\s*|$))"
-        self._publisher_regex = r"(?<=^PB\s{2}-\s)(.+?)*(\n\s{6}(.+?)*)*(?=(?:\n[A-Z]{2,4}\s{,2}-\s*|$))"
-        self._editor_regex = r"((?<=^FED\s-\s)|(?<=^ED\s{2}-\s))(.+?)*(\n\s{6}(.+?)*)*(?=(?:\n[A-Z]{2,4}\s{,2}-\s*|$))"
-
-    def is_valid(self, pmid, get_extra_info=False):
-        pmid = self.normalise(pmid, include_prefix=True)
-
-        if pmid is None:
-            return False
-        else:
-            if pmid not in self._data or self._data[pmid] is None:
-                if get_extra_info:
-                    info = self.exists(pmid, get_extra_info=True)
-                    self._data[pmid] = info[1]
-                    return (info[0] and self.syntax_ok(pmid)), info[1]
-                self._data[pmid] = dict()
-                self._data[pmid]["valid"] = True if (self.exists(pmid) and self.syntax_ok(pmid)) else False
-                return self._data[pmid].get("valid")
-
-            if get_extra_info:
-                return self._data[pmid].get("valid"), self._data[pmid]
-            return self._data[pmid].get("valid")
+        self._date_regex = r"\d{4}(\s?(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec))?(\s?((3[0-1])|([1-2][0-9])|([0]?[1-9])))?"
+        self._issn_regex = r"[0-9]{4}-[0-9]{3}[0-9X]"
+        # The MEDLINE tags whose values are extracted
+        self._medline_tags = {"TI", "FAU", "DP", "IS", "JT", "VI", "IP", "PG", "PT", "PB", "FED", "ED", "AID"}
 
     def normalise(self, id_string, include_prefix=False):
         id_string = str(id_string)
@@ -89,41 +80,28 @@ class PMIDManager(IdentifierManager):
         return True if match("^pmid:[1-9]\d*$", id_string) else False
 
     def exists(self, pmid_full, get_extra_info=False, allow_extra_api=None):
+        prefiltered = self._get_prefiltered_result(pmid_full, get_extra_info)
+        if prefiltered is not None:
+            return prefiltered
         valid_bool = True
         if self._use_api_service:
             pmid = self.normalise(pmid_full)
-            if pmid is not None:
-                tentative = 3
-                while tentative:
-                    tentative -= 1
-                    try:
-                        r = get(
-                            self._api + quote(pmid) + "/?format=pubmed",
-                            headers=self._headers,
-                            timeout=30,
-                        )
-                        if r.status_code == 200:
-                            r.encoding = "utf-8"
-                            soup = BeautifulSoup(r.text, features="lxml")
-                            txt_obj = str(soup.find(id="article-details"))
-                            match_pmid = re.finditer(self._pmid_regex, txt_obj, re.MULTILINE)
-                            for matchNum_pmid, match_p in enumerate(match_pmid, start=1):
-                                m_pmid = match_p.group()
-                                if m_pmid:
-                                    if get_extra_info:
-                                        return True, self.extra_info(txt_obj)
-                                    return True
-                        elif r.status_code == 404:
-                            if get_extra_info:
-                                return False, {"valid": False}
-                            return False
-
-                    except ReadTimeout:
-                        # Do nothing, just try again
-                        pass
-                    except ConnectionError:
-                        # Sleep 5 seconds, then try again
-                        sleep(5)
+            if pmid is not None and self.use_eutils:
+                results = self._eutils_exists([pmid], get_extra_info)
+                if pmid not in results:
+                    raise APIUnavailableError("eutils.ncbi.nlm.nih.gov")
+                valid_bool, info = results[pmid]
+                return (valid_bool, info) if get_extra_info else valid_bool
+            elif pmid is not None:
+                r = self._get_response(self._api + quote(pmid) + "/?format=pubmed")
+                if r is not None and r.status_code == 200:
+                    r.encoding = "utf-8"
+                    soup = BeautifulSoup(r.text, features="lxml")
+                    txt_obj = str(soup.find(id="article-details"))
+                    if re.search(self._pmid_regex, txt_obj, re.MULTILINE):
+                        if get_extra_info:
+                            return True, self.extra_info(txt_obj)
+                        return True
                 valid_bool = False
             else:
                 if get_extra_info:
@@ -133,236 +111,163 @@ class PMIDManager(IdentifierManager):
             return valid_bool, {"valid": valid_bool}
         return valid_bool
 
-    def extra_info(self, api_response, choose_api=None, info_dict={}):
-        result = {}
-        result["valid"] = True
-
-        try:
-            title = ""
-            match_title = re.finditer(self._title_regex, api_response, re.MULTILINE)
-            for matchNum_tit, match_tit in enumerate(match_title, start=1):
-                m_title = match_tit.group()
-                if m_title:
-                    ts = re.sub("\s+", " ", m_title)
-                    t = re.sub("\n", " ", ts)
-                    norm_title = t.strip()
-                    if norm_title is not None:
-                        title = norm_title
-                        break
-        except:
-            title = ""
-
-        result["title"] = title
-
-        try:
-            authors = set()
-            fa_aut = re.finditer(self._author_regex, api_response, re.MULTILINE)
-            for matchNum_aut, match_au in enumerate(fa_aut, start=1):
-                m_aut = match_au.group()
-                if m_aut:
-                    fau = re.sub("\s+", " ", m_aut)
-                    nlfau = re.sub("\n", " ", fau)
-                    norm_fau = nlfau.strip()
-                    if norm_fau is not None:
-                        authors.add(norm_fau)
-            authorsList = list(authors)
-        except:
-            authorsList = []
-
-        result["author"] = authorsList
-
-        try:
-            date = re.search(self._date_regex,
-                api_response,
-                re.IGNORECASE,
-            ).group(1)
-            re_search = re.search(
-                "(\d{4})\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+((3[0-1])|([1-2][0-9])|([0]?[1-9]))",
-                date,
-                re.IGNORECASE,
-            )
-            if re_search is not None:
-                src = re_search.group(0)
-                datetime_object = datetime.strptime(src, "%Y %b %d")
-                pmid_date = datetime.strftime(datetime_object, "%Y-%m-%d")
+    def exists_many(self, pmids, get_extra_info=False):
+        """Returns the existence of many PMIDs, checked through the NCBI E-utilities with a request
+        for each batch of PMIDs: their summaries are requested with esummary or, if additional info
+        is required, their MEDLINE records with efetch. The PMIDs of a batch whose request fails are
+        not in the result, since their existence is unknown.
+
+        Args:
+            pmids (iterable): the PMIDs
+            get_extra_info (bool, optional): True to get a dictionary with additional info about each PMID
+        Returns:
+            dict: the result of exists for each PMID, by normalised PMID including its prefix
+        """
+        results = dict()
+        to_check = []
+        for pmid in dict.fromkeys(self.normalise(pmid) for pmid in pmids):
+            if not pmid:
+                continue
+            prefiltered = self._get_prefiltered_result(pmid, get_extra_info)
+            if prefiltered is not None:
+                results[self._p + pmid] = prefiltered
+            elif self._use_api_service:
+                to_check.append(pmid)
             else:
-                re_search = re.search(
-                    "(\d{4})\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)",
-                    date,
-                    re.IGNORECASE,
-                )
-                if re_search is not None:
-                    src = re_search.group(0)
-                    datetime_object = datetime.strptime(src, "%Y %b")
-                    pmid_date = datetime.strftime(datetime_object, "%Y-%m")
+                results[self._p + pmid] = (True, self._get_prefiltered_info(pmid, True)) if get_extra_info else True
+        for i in range(0, len(to_check), self._eutils_batch_size):
+            batch = to_check[i:i + self._eutils_batch_size]
+            try:
+                batch_results = self._eutils_exists(batch, get_extra_info)
+            except APIUnavailableError:
+                continue
+            for pmid, (valid_bool, info) in batch_results.items():
+                results[self._p + pmid] = (valid_bool, info) if get_extra_info else valid_bool
+        return results
+
+    def _get_prefiltered_info(self, pmid, valid):
+        # An offline index built by oc_idmanager.public_data.build_pmid_index also contains the info about the PMIDs
+        if valid and isinstance(self.offline_index, StorageManager):
+            info = self.offline_index.get_value(self.normalise(pmid, include_prefix=True))
+            if info is not None:
+                return info
+        return {"valid": valid}
+
+    def _eutils_exists(self, pmids, get_extra_info=False):
+        params = {"db": "pubmed", "id": ",".join(pmids)}
+        if self.api_key is not None:
+            params["api_key"] = self.api_key
+        found = dict()
+        if get_extra_info:
+            params.update(rettype="medline", retmode="text")
+            r = self._get_response(self._eutils_api + "efetch.fcgi", params=params, rate_limit_key=self.api_key)
+            if r is None or r.status_code != 200:
+                return dict()
+            r.encoding = "utf-8"
+            for record in re.split(r"\n(?=PMID- )", r.text.strip()):
+                pmid = re.match(r"PMID- ([1-9]\d*)", record)
+                if pmid:
+                    found[pmid.group(1)] = (True, self.extra_info(record))
+            # A body without any record (e.g. empty, an error message or truncated) does not say which PMIDs exist
+            if not found:
+                return dict()
+        else:
+            params["retmode"] = "json"
+            json_res = self._call_api(self._eutils_api + "esummary.fcgi", params=params, rate_limit_key=self.api_key)
+            if not isinstance(json_res, dict) or "error" in json_res:
+                return dict()
+            result = json_res.get("result", {})
+            for pmid in result.get("uids", []):
+                if "error" not in result.get(pmid, {}):
+                    found[pmid] = (True, {"valid": True})
+        return {pmid: found.get(pmid, (False, {"valid": False})) for pmid in pmids}
+
+    def parse_medline(self, txt_obj):
+        """Parses a record in MEDLINE format in a single pass over its lines. A line
+        starts with a tag padded to four characters followed by "- ", while the lines
+        continuing a value are indented by six spaces.
+
+        Args:
+            txt_obj (str): the MEDLINE record
+        Returns:
+            dict: the values of each extracted tag, with the whitespace collapsed
+        """
+        values = dict()
+        current = None
+        for line in txt_obj.splitlines():
+            if line[4:6] == "- " and line[:4].rstrip().isupper():
+                tag = line[:4].rstrip()
+                if tag in self._medline_tags:
+                    current = [line[6:]]
+                    values.setdefault(tag, []).append(current)
                 else:
-                    re_search = re.search("(\d{4})", date)
-                    if re_search is not None:
-                        src = re.search("(\d{4})", date).group(0)
-                        datetime_object = datetime.strptime(src, "%Y")
-                        pmid_date = datetime.strftime(datetime_object, "%Y")
-                    else:
-                        pmid_date = ""
-        except:
-            pmid_date = ""
-        result["pub_date"] = pmid_date
+                    current = None
+            elif current is not None and line.startswith("      "):
+                current.append(line)
+            else:
+                current = None
+        return {tag: [" ".join(" ".join(value).split()) for value in tag_values] for tag, tag_values in values.items()}
+
+    def _parse_date(self, value):
+        date = re.match(self._date_regex, value, re.IGNORECASE)
+        if date is None:
+            return ""
+        date = date.group(0)
+        re_search = re.search(
+            r"(\d{4})\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+((3[0-1])|([1-2][0-9])|([0]?[1-9]))",
+            date,
+            re.IGNORECASE,
+        )
+        if re_search is not None:
+            return datetime.strptime(re_search.group(0), "%Y %b %d").strftime("%Y-%m-%d")
+        re_search = re.search(r"(\d{4})\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)", date, re.IGNORECASE)
+        if re_search is not None:
+            return datetime.strptime(re_search.group(0), "%Y %b").strftime("%Y-%m")
+        return datetime.strptime(date[:4], "%Y").strftime("%Y")
 
-        try:
-            issnset = set()
-            fa_issn = re.finditer(self._issn_regex, api_response, re.MULTILINE)
-            for matchNum_issn, match_issn in enumerate(fa_issn, start=1):
-                m_issn = match_issn.group()
-                if m_issn:
-                    norm_issn = self._im.normalise(m_issn, include_prefix=True)
-                    if norm_issn is not None:
-                        issnset.add(norm_issn)
-            issnlist = list(issnset)
-        except:
-            issnlist = []
+    def extra_info(self, api_response, choose_api=None, info_dict={}):
+        medline = self.parse_medline(api_response)
 
-        # CONTINUA DA QUI
+        def first(tag):
+            return next((value for value in medline.get(tag, []) if value), "")
 
-        try:
-            jur_title = ""
-            fa_jur_title = re.finditer(self._journal_regex, api_response, re.MULTILINE)
-            for matchNum_title, match_tit in enumerate(fa_jur_title, start=1):
-                m_title = match_tit.group()
-                if m_title:
-                    s_jt = re.sub("\s+", " ", m_title)
-                    n_jt = re.sub("\n", " ", s_jt)
-                    norm_jour = n_jt.strip()
-                    if norm_jour is not None:
-                        jur_title = norm_jour
-                        break
-        except:
-            jur_title = ""
+        def every(tag):
+            return list(dict.fromkeys(value for value in medline.get(tag, []) if value))
 
+        result = {}
+        result["valid"] = True
+        result["title"] = first("TI")
+        result["author"] = every("FAU")
+        try:
+            result["pub_date"] = self._parse_date(first("DP"))
+        except ValueError:
+            result["pub_date"] = ""
+
+        issnlist = []
+        for value in medline.get("IS", []):
+            m_issn = re.match(self._issn_regex, value)
+            if m_issn:
+                norm_issn = self._im.normalise(m_issn.group(0), include_prefix=True)
+                if norm_issn is not None and norm_issn not in issnlist:
+                    issnlist.append(norm_issn)
+        jur_title = first("JT")
         result["venue"] = (
             f'{jur_title} {[x for x in issnlist]}' if jur_title else str(issnlist).replace(",", "")).replace("'", "")
 
-        try:
-            volume = ""
-            fa_volume = re.finditer(self._volume_regex, api_response, re.MULTILINE)
-            for matchNum_volume, match_vol in enumerate(fa_volume, start=1):
-                m_vol = match_vol.group()
-                if m_vol:
-                    vol = re.sub("\s+", " ", m_vol)
-                    norm_volume = vol.strip()
-                    if norm_volume is not None:
-                        volume = norm_volume
-                        break
-        except:
-            volume = ""
-
-        result["volume"] = volume
-
-        try:
-            issue = ""
-            fa_issue = re.finditer(self._issue_regex, api_response, re.MULTILINE)
-            for matchNum_issue, match_issue in enumerate(fa_issue, start=1):
-                m_issue = match_issue.group()
-                if m_issue:
-                    s_issue = re.sub("\s+", " ", m_issue)
-                    n_issue = re.sub("\n", " ", s_issue)
-                    norm_issue = n_issue.strip()
-                    if norm_issue is not None:
-                        issue = norm_issue
-                        break
-        except:
-            issue = ""
-
-        result["issue"] = issue
-
-        try:
-            pag = ""
-            fa_pag = re.finditer(self._page_regex, api_response, re.MULTILINE)
-            for matchNum_pag, match_pag in enumerate(fa_pag, start=1):
-                m_pag = match_pag.group()
-                if m_pag:
-                    s_pg = re.sub("\s+", " ", m_pag)
-                    n_pg = re.sub("\n", " ", s_pg)
-                    norm_pag = n_pg.strip()
-                    if norm_pag is not None:
-                        pag = norm_pag
-                        break
-        except:
-            pag = ""
-
-        result["page"] = pag
-
-        try:
-            pub_types = set()
-            types = re.finditer(self._type_regex, api_response, re.MULTILINE)
-            for matchNum_types, match_types in enumerate(types, start=1):
-                m_type = match_types.group()
-                if m_type:
-                    s_ty = re.sub("\s+", " ", m_type)
-                    b_ty = re.sub("\n", " ", s_ty)
-                    norm_type = b_ty.strip().lower()
-                    if norm_type is not None:
-                        pub_types.add(norm_type)
-            typeslist = list(pub_types)
-        except:
-            typeslist = []
-
-        result["type"] = typeslist
-
-        try:
-            publisher = set()
-            publishers = re.finditer(self._publisher_regex, api_response, re.MULTILINE)
-            for matchNum_publishers, match_publishers in enumerate(publishers, start=1):
-                m_publishers = match_publishers.group()
-                if m_publishers:
-                    s_pbs = re.sub("\s+", " ", m_publishers)
-                    n_pbs = re.sub("\n", " ", s_pbs)
-                    norm_pbs = n_pbs.strip()
-                    if norm_pbs is not None:
-                        publisher.add(norm_pbs)
-            publisherlist = list(publisher)
-        except:
-            publisherlist = []
-
-        result["publisher"] = publisherlist
-
-        try:
-            editor = set()
-            editors = re.finditer(self._editor_regex, api_response, re.MULTILINE)
-            for matchNum_editors, match_editors in enumerate(editors, start=1):
-                m_editors = match_editors.group()
-                if m_editors:
-                    s_ed = re.sub("\s+", " ", m_editors)
-                    n_ed = re.sub("\n", " ", s_ed)
-                    norm_ed = n_ed.strip()
-                    if norm_ed is not None:
-                        editor.add(norm_ed)
-            editorlist = list(editor)
-        except:
-            editorlist = []
-
-        result["editor"] = editorlist
+        result["volume"] = first("VI")
+        result["issue"] = first("IP")
+        result["page"] = first("PG")
+        result["type"] = list(dict.fromkeys(value.lower() for value in every("PT")))
+        result["publisher"] = every("PB")
+        result["editor"] = list(dict.fromkeys(every("FED") + every("ED")))
 
         doi = ""
-        try:
-            map_doi = re.finditer(self._doi_regex, api_response, re.MULTILINE)
-            for matchNum_doi, match_doi in enumerate(map_doi, start=1):
-                m_doi = match_doi.group()
-                if m_doi:
-                    id = re.sub("\s+", " ", m_doi)
-                    n_id = re.sub("\n", " ", id)
-                    n_id_strip = n_id.strip()
-
-                    if n_id_strip.endswith('[doi]'):
-                        n_id_strip = n_id_strip[:-5]
-                    dm = DOIManager()
-                    norm_id = dm.normalise(n_id_strip)
-                    if norm_id is not None:
-                        doi = norm_id
-                        break
-                    else:
-                        doi = ""
-        except:
-            doi = ""
-
+        for value in medline.get("AID", []):
+            if value.endswith("[doi]"):
+                norm_id = self._dm.normalise(value[:-5].strip())
+                if norm_id is not None:
+                    doi = norm_id
+                    break
         result["doi"] = doi
 
         return result
@@ -0,0 +1,268 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import tarfile
+from argparse import ArgumentParser
+from calendar import month_abbr
+from typing import IO, Iterable, Iterator, Tuple
+from xml.etree.ElementTree import iterparse
+
+from oc_idmanager.doi import DOIManager
+from oc_idmanager.issn import ISSNManager
+from oc_idmanager.oc_data_storage.sorted_index import SortedIndex
+from oc_idmanager.oc_data_storage.sqlite_manager import SqliteStorageManager
+from oc_idmanager.pmid import PMIDManager
+
+
+def _iter_files(path: str) -> Iterator[Tuple[str, IO[bytes]]]:
+    if os.path.isdir(path):
+        for dir_path, dir_names, file_names in os.walk(path):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                yield from _iter_files(os.path.join(dir_path, file_name))
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path, "r|*") as archive:
+            for member in archive:
+                if member.isfile():
+                    yield member.name, archive.extractfile(member)
+    else:
+        with open(path, "rb") as fp:
+            yield path, fp
+
+
+def _iter_records(path: str) -> Iterator[dict]:
+    for name, fp in _iter_files(path):
+        if name.endswith(".gz"):
+            fp = gzip.GzipFile(fileobj=fp)
+            name = name[:-3]
+        if name.endswith(".jsonl") or name.endswith(".ndjson"):
+            for line in fp:
+                if line.strip():
+                    yield json.loads(line)
+        elif name.endswith(".json"):
+            content = json.load(fp)
+            if isinstance(content, dict):
+                content = content.get("items", content.get("data", [content]))
+            yield from content
+
+
+def iter_crossref_dois(path: str) -> Iterator[str]:
+    """Returns the DOIs of the records in the Crossref public data file, i.e. the files
+    containing the "items" of the works API, compressed with gzip or not.
+
+    Args:
+        path (str): the path of a directory, a tar archive or a file of the data file
+    Returns:
+        iterator: the DOIs, as they are in the records
+    """
+    for record in _iter_records(path):
+        doi = record.get("DOI")
+        if doi:
+            yield doi
+
+
+def iter_datacite_dois(path: str) -> Iterator[str]:
+    """Returns the DOIs of the records in the DataCite public data file, i.e. the files
+    containing the records of the DOIs API, one per line or in "data", compressed with gzip or not.
+
+    Args:
+        path (str): the path of a directory, a tar archive or a file of the data file
+    Returns:
+        iterator: the DOIs, as they are in the records
+    """
+    for record in _iter_records(path):
+        doi = record.get("attributes", {}).get("doi") or record.get("id")
+        if doi:
+            yield doi
+
+
+def build_doi_index(output: str, crossref: Iterable[str] = (), datacite: Iterable[str] = (), chunk_size: int = 1000000) -> int:
+    """Builds a SortedIndex of the normalised DOIs, including their prefix, registered in the
+    Crossref and DataCite public data files, which can be specified as offline_index of a DOIManager.
+
+    Args:
+        output (str): the path of the index file
+        crossref (iterable, optional): the paths of the Crossref public data files
+        datacite (iterable, optional): the paths of the DataCite public data files
+        chunk_size (int, optional): the number of DOIs sorted in memory at a time. Defaults to 1000000.
+    Returns:
+        int: the number of distinct DOIs indexed
+    """
+    doi_manager = DOIManager(use_api_service=False)
+
+    def iter_dois():
+        for paths, iter_path_dois in ((crossref, iter_crossref_dois), (datacite, iter_datacite_dois)):
+            for path in paths:
+                for doi in iter_path_dois(path):
+                    doi = doi_manager.normalise(doi, include_prefix=True)
+                    if doi is not None:
+                        yield doi
+
+    return SortedIndex.build(iter_dois(), output, chunk_size)
+
+
+def _text(element) -> str:
+    return "" if element is None else " ".join("".join(element.itertext()).split())
+
+
+def _pubmed_info(article, pmid_manager: PMIDManager, issn_manager: ISSNManager, doi_manager: DOIManager) -> dict:
+    # The information returned by the extra_info method of PMIDManager, taken from a PubmedArticle or a PubmedBookArticle
+    authors, editors = [], []
+    for author_list in article.iter("AuthorList"):
+        for author in author_list.iter("Author"):
+            if author.get("ValidYN") == "N":
+                continue
+            name = _text(author.find("CollectiveName")) or ", ".join(
+                filter(None, (_text(author.find("LastName")), _text(author.find("ForeName")))))
+            if name:
+                (editors if author_list.get("Type") == "editors" else authors).append(name)
+    pub_date = article.find(".//PubDate")
+    date = ""
+    if pub_date is not None:
+        date = _text(pub_date.find("MedlineDate"))
+        if not date:
+            month = _text(pub_date.find("Month"))
+            month = month_abbr[int(month)] if month.isdigit() and 0 < int(month) < 13 else month
+            date = " ".join(filter(None, (_text(pub_date.find("Year")), month, _text(pub_date.find("Day")))))
+    try:
+        date = pmid_manager._parse_date(date)
+    except ValueError:
+        date = ""
+    issns = []
+    for issn in [article.find(".//Journal/ISSN"), article.find(".//MedlineJournalInfo/ISSNLinking")]:
+        issn = issn_manager.normalise(_text(issn), include_prefix=True) if issn is not None else None
+        if issn is not None and issn not in issns:
+            issns.append(issn)
+    journal = _text(article.find(".//Journal/Title"))
+    doi = ""
+    # The ids of the cited works, in the ReferenceList, are not taken
+    elements = (article.findall("PubmedData/ArticleIdList/ArticleId[@IdType='doi']") +
+                article.findall("PubmedBookData/ArticleIdList/ArticleId[@IdType='doi']") +
+                article.findall("MedlineCitation/Article/ELocationID[@EIdType='doi']") +
+                article.findall("BookDocument/ELocationID[@EIdType='doi']"))
+    for element in elements:
+        doi = doi_manager.normalise(_text(element)) or ""
+        if doi:
+            break
+    return {
+        "valid": True,
+        "title": _text(article.find(".//ArticleTitle")) or _text(article.find(".//BookTitle")),
+        "author": list(dict.fromkeys(authors)),
+        "pub_date": date,
+        "venue": (f'{journal} {[x for x in issns]}' if journal else str(issns).replace(",", "")).replace("'", ""),
+        "volume": _text(article.find(".//JournalIssue/Volume")),
+        "issue": _text(article.find(".//JournalIssue/Issue")),
+        "page": _text(article.find(".//Pagination/MedlinePgn")),
+        "type": list(dict.fromkeys(_text(pub_type).lower() for pub_type in article.iter("PublicationType"))),
+        "publisher": [_text(publisher) for publisher in article.findall(".//Publisher/PublisherName")],
+        "editor": list(dict.fromkeys(editors)),
+        "doi": doi
+    }
+
+
+def iter_pubmed_records(path: str) -> Iterator[Tuple[str, dict|None]]:
+    """Returns the records of the PubMed baseline and update files, i.e. the XML files of the
+    PubmedArticleSet, compressed with gzip or not. The files are parsed incrementally, so that
+    the memory used does not depend on their size.
+
+    Args:
+        path (str): the path of a directory, a tar archive or a file of the PubMed files
+    Returns:
+        iterator: the normalised PMIDs, including their prefix, with the information returned by
+            PMIDManager.extra_info, or with None if the citation has been deleted
+    """
+    pmid_manager = PMIDManager(use_api_service=False)
+    issn_manager = ISSNManager()
+    doi_manager = DOIManager(use_api_service=False)
+    for name, fp in _iter_files(path):
+        if name.endswith(".gz"):
+            fp = gzip.GzipFile(fileobj=fp)
+            name = name[:-3]
+        if not name.endswith(".xml"):
+            continue
+        root = None
+        for event, element in iterparse(fp, events=("start", "end")):
+            if root is None:
+                root = element
+            if event != "end":
+                continue
+            if element.tag in ("PubmedArticle", "PubmedBookArticle"):
+                pmid = element.find("MedlineCitation/PMID")
+                pmid = element.find("BookDocument/PMID") if pmid is None else pmid
+                pmid = pmid_manager.normalise(_text(pmid), include_prefix=True) if pmid is not None else None
+                if pmid is not None and pmid_manager.syntax_ok(pmid):
+                    yield pmid, _pubmed_info(element, pmid_manager, issn_manager, doi_manager)
+            elif element.tag == "DeleteCitation":
+                for pmid in element.iter("PMID"):
+                    yield pmid_manager.normalise(_text(pmid), include_prefix=True), None
+            else:
+                continue
+            # The records already parsed are removed from the tree
+            root.clear()
+
+
+def build_pmid_index(output: str, pubmed: Iterable[str], batch_size: int = 10000) -> int:
+    """Builds a SqliteStorageManager containing the normalised PMIDs, including their prefix, of the
+    records in the PubMed baseline and update files, with the information returned by
+    PMIDManager.extra_info, which can be specified as offline_index of a PMIDManager. The files are
+    processed in the order specified, so that the update files replace and delete the records of
+    the previous ones, and they can also be added to an existing index.
+
+    Args:
+        output (str): the path of the SQLite database file
+        pubmed (iterable): the paths of the PubMed baseline and update files
+        batch_size (int, optional): the number of records stored at a time. Defaults to 10000.
+    Returns:
+        int: the number of records stored, including the ones replaced
+    """
+    storage_manager = SqliteStorageManager(output)
+    stored = 0
+    batch = []
+    try:
+        for path in pubmed:
+            for pmid, info in iter_pubmed_records(path):
+                if info is not None:
+                    batch.append((pmid, info))
+                    stored += 1
+                if len(batch) >= batch_size or (info is None and batch):
+                    storage_manager.set_values(batch)
+                    batch = []
+                if info is None:
+                    storage_manager.delete_value(pmid)
+        storage_manager.set_values(batch)
+    finally:
+        storage_manager.close()
+    return stored
+
+
+if __name__ == "__main__":
+    arg_parser = ArgumentParser(description="Build the offline index of the DOIs registered in the Crossref and DataCite public data files, or of the PMIDs in the PubMed baseline and update files")
+    arg_parser.add_argument("-o", "--output", required=True, help="The path of the index file")
+    arg_parser.add_argument("-c", "--crossref", nargs="*", default=[], help="The paths of the Crossref public data files")
+    arg_parser.add_argument("-d", "--datacite", nargs="*", default=[], help="The paths of the DataCite public data files")
+    arg_parser.add_argument("-p", "--pubmed", nargs="*", default=[], help="The paths of the PubMed baseline and update files, in the order in which they must be applied. If specified, the index of the PMIDs is built")
+    arg_parser.add_argument("-s", "--chunk_size", type=int, default=1000000, help="The number of DOIs sorted in memory at a time")
+    args = arg_parser.parse_args()
+    if args.pubmed:
+        print(build_pmid_index(args.output, args.pubmed))
+    else:
+        print(build_doi_index(args.output, args.crossref, args.datacite, args.chunk_size))
@@ -0,0 +1,141 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from __future__ import annotations
+
+from threading import Lock
+from time import monotonic, sleep
+from urllib.parse import urlsplit
+
+# The number of requests per second (and the burst capacity, if any) allowed by the APIs without an API key
+DEFAULT_RATE_LIMITS = {
+    "www.ncbi.nlm.nih.gov": 3,
+    "eutils.ncbi.nlm.nih.gov": 3,
+    "pubmed.ncbi.nlm.nih.gov": 3,
+    "api.crossref.org": 50,
+    "pub.orcid.org": (24, 40),
+    "export.arxiv.org": 1 / 3,
+    "api.ror.org": 6,
+}
+
+
+class TokenBucket(object):
+    """This class implements a token bucket, which allows a given number of requests per
+    second on average and bursts of requests up to its capacity."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        """Token bucket constructor.
+
+        Args:
+            rate (float): the number of tokens added per second
+            capacity (float, optional): the maximum number of tokens. Defaults to None, i.e. the rate, or 1
+                if the rate is lower than 1.
+        """
+        self.rate = rate
+        self.capacity = max(rate, 1) if capacity is None else capacity
+        self._tokens = self.capacity
+        self._updated = monotonic()
+        self._lock = Lock()
+
+    def acquire(self, max_wait: float | None = None) -> float:
+        """Takes a token, waiting until one is available.
+
+        Args:
+            max_wait (float, optional): the maximum time to wait, in seconds. Defaults to None, i.e. no limit.
+        Returns:
+            float: the time waited, in seconds
+        Raises:
+            TimeoutError: if a token would not be available in time, in which case no token is taken
+        """
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # The token is reserved even if it is not available yet, so that the waiting callers are served in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if max_wait is not None and wait > max_wait:
+                self._tokens += 1
+                raise TimeoutError(f"No token is available in {max_wait} seconds")
+        if wait:
+            sleep(wait)
+        return wait
+
+
+class RateLimiter(object):
+    """This class keeps a token bucket for each API host, so that all the requests to the
+    same host, from any thread, do not exceed the rate allowed by the host."""
+
+    def __init__(self, limits: dict | None = None, default_rate: float | None = None):
+        """Rate limiter constructor.
+
+        Args:
+            limits (dict, optional): the number of requests per second allowed by each host, or a tuple
+                (requests per second, burst capacity). Defaults to None, i.e. DEFAULT_RATE_LIMITS.
+            default_rate (float, optional): the number of requests per second allowed by the hosts not in
+                limits. Defaults to None, i.e. no limit.
+        """
+        self.default_rate = default_rate
+        self._buckets = dict()
+        self._lock = Lock()
+        for host, limit in (DEFAULT_RATE_LIMITS if limits is None else limits).items():
+            self.set_limit(host, *(limit if isinstance(limit, tuple) else (limit,)))
+
+    def set_limit(self, host: str, rate: float | None, capacity: float | None = None, key: str | None = None) -> None:
+        """Sets the number of requests per second allowed by a host.
+
+        Args:
+            host (str): the host name, e.g. "api.crossref.org"
+            rate (float): the number of requests per second, or None to remove the limit
+            capacity (float, optional): the maximum number of requests in a burst. Defaults to None, i.e. the rate.
+            key (str, optional): the API key whose requests are allowed this rate, in a token bucket shared by all
+                the requests made with the key only. Defaults to None, i.e. the requests without a key of their own.
+        """
+        with self._lock:
+            self._buckets[host if key is None else (host, key)] = None if rate is None else TokenBucket(rate, capacity)
+
+    def has_limit(self, host: str, key: str | None = None) -> bool:
+        """Returns True if a limit was set for a host, or for the requests to a host made with an API key."""
+        return (host if key is None else (host, key)) in self._buckets
+
+    def acquire(self, url: str, max_wait: float | None = None, key: str | None = None) -> float:
+        """Waits until a request to the host of the URL is allowed.
+
+        Args:
+            url (str): the URL to request
+            max_wait (float, optional): the maximum time to wait, in seconds. Defaults to None, i.e. no limit.
+            key (str, optional): the API key sent with the request. If a limit was set for the key, the request
+                follows it instead of the limit of the host. Defaults to None.
+        Returns:
+            float: the time waited, in seconds
+        Raises:
+            TimeoutError: if the request would not be allowed in time
+        """
+        host = urlsplit(url).hostname or ""
+        bucket = self._buckets.get((host, key), False) if key is not None else False
+        if bucket is False:
+            bucket = self._buckets.get(host, False)
+        if bucket is False:
+            # Nothing is stored for the hosts without a limit, which may be countless (e.g. those of the URLs)
+            if self.default_rate is None:
+                return 0.0
+            with self._lock:
+                bucket = self._buckets.get(host, False)
+                if bucket is False:
+                    bucket = TokenBucket(self.default_rate)
+                    self._buckets[host] = bucket
+        return 0.0 if bucket is None else bucket.acquire(max_wait)
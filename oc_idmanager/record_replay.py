@@ -0,0 +1,177 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from __future__ import annotations
+
+import base64
+import json
+import os
+from threading import Lock
+from time import sleep
+from typing import Callable, Iterable
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from requests import PreparedRequest, Response, Session
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+RECORD = "record"
+REPLAY = "replay"
+AUTO = "auto"
+
+# The query parameters removed from the recorded requests, since the fixture files are meant to be committed
+SECRET_PARAMS = frozenset(("api_key", "apikey", "access_token", "token", "key"))
+
+
+class MissingRecordError(Exception):
+    """This exception is raised when a request is replayed, but no response was recorded for it."""
+
+
+class RecordReplayAdapter(BaseAdapter):
+    """This class implements a transport adapter which records the responses of the APIs in
+    fixture files, one JSON Lines file per host, and replays them without calling the APIs, so
+    that the identifier managers can be tested and benchmarked deterministically and offline.
+    Each new response is appended to its fixture file as soon as it is recorded, and the secrets
+    in the query of the requests (e.g. the API keys) are never written."""
+
+    def __init__(self, directory: str, mode: str = REPLAY, adapter: BaseAdapter | None = None,
+                 latency: float | Callable[[PreparedRequest], float] = 0.0, secret_params: Iterable[str] = SECRET_PARAMS):
+        """Record/replay adapter constructor.
+
+        Args:
+            directory (str): the directory of the fixture files
+            mode (str, optional): "record" to call the APIs and record their responses, "replay" to replay
+                the recorded responses only, "auto" to replay the recorded responses and record the others.
+                Defaults to "replay".
+            adapter (BaseAdapter, optional): the adapter calling the APIs. Defaults to None, i.e. an HTTPAdapter.
+            latency (float or callable, optional): the time, in seconds, waited before replaying a response,
+                or a function returning it for a request. Defaults to 0.0.
+            secret_params (iterable, optional): the names of the query parameters removed from the requests
+                identifying the recorded responses. Defaults to SECRET_PARAMS.
+        """
+        super(RecordReplayAdapter, self).__init__()
+        if mode not in (RECORD, REPLAY, AUTO):
+            raise ValueError(f"Unknown mode {mode}")
+        self.directory = directory
+        self.mode = mode
+        self.adapter = HTTPAdapter() if adapter is None else adapter
+        self.latency = latency
+        self.secret_params = frozenset(name.lower() for name in secret_params)
+        self._records = dict()
+        # The hosts whose fixture files contain responses recorded again, which are rewritten by save
+        self._overwritten = set()
+        self._lock = Lock()
+
+    def install(self, session: Session) -> Session:
+        """Mounts the adapter on all the prefixes of a session, including those of specific hosts.
+
+        Args:
+            session (Session): the session
+        Returns:
+            Session: the same session
+        """
+        for prefix in list(session.adapters) or ["https://", "http://"]:
+            session.mount(prefix, self)
+        return session
+
+    def _get_path(self, host: str) -> str:
+        return os.path.join(self.directory, f"{host}.jsonl")
+
+    def _get_host_records(self, host: str) -> dict:
+        records = self._records.get(host)
+        if records is None:
+            path = self._get_path(host)
+            records = dict()
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as fp:
+                    for line in fp:
+                        if line.strip():
+                            entry = json.loads(line)
+                            # The last response recorded for a request replaces the previous ones
+                            records[entry["request"]] = entry["response"]
+            self._records[host] = records
+        return records
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        host = urlsplit(request.url).hostname or ""
+        key = f"{request.method} {request.headers.get('Accept', '')} {self._strip_secrets(request.url)}"
+        with self._lock:
+            record = self._get_host_records(host).get(key)
+        if record is not None and self.mode != RECORD:
+            latency = self.latency(request) if callable(self.latency) else self.latency
+            if latency:
+                sleep(latency)
+            return self._build_response(request, record)
+        if self.mode == REPLAY:
+            raise MissingRecordError(f"No response recorded for {key}")
+        response = self.adapter.send(request, **kwargs)
+        record = {"status": response.status_code, "reason": response.reason, "headers": dict(response.headers)}
+        try:
+            record["text"] = response.content.decode("utf-8")
+        except UnicodeDecodeError:
+            record["base64"] = base64.b64encode(response.content).decode("ascii")
+        line = json.dumps({"request": key, "response": record}, ensure_ascii=False, sort_keys=True) + "\n"
+        with self._lock:
+            records = self._get_host_records(host)
+            if key in records:
+                self._overwritten.add(host)
+            records[key] = record
+            # The response is appended at once, so that the recorded responses survive a session never closed
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._get_path(host), "a", encoding="utf-8") as fp:
+                fp.write(line)
+        return response
+
+    def _strip_secrets(self, url: str) -> str:
+        parts = urlsplit(url)
+        if not parts.query:
+            return url
+        query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                 if name.lower() not in self.secret_params]
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+    @staticmethod
+    def _build_response(request: PreparedRequest, record: dict) -> Response:
+        response = Response()
+        response.status_code = record["status"]
+        response.reason = record.get("reason")
+        response.headers = CaseInsensitiveDict(record["headers"])
+        # The body was stored decoded, so the headers about its transfer encoding do not apply anymore
+        for header in ("Content-Encoding", "Transfer-Encoding"):
+            response.headers.pop(header, None)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = record["text"].encode("utf-8") if "text" in record else base64.b64decode(record["base64"])
+        response.url = request.url
+        response.request = request
+        return response
+
+    def save(self) -> None:
+        """Rewrites the fixture files containing responses recorded again, so that they only keep
+        the last response recorded for each request."""
+        with self._lock:
+            for host in self._overwritten:
+                path = self._get_path(host)
+                with open(path + ".tmp", "w", encoding="utf-8") as fp:
+                    for key, record in sorted(self._records[host].items()):
+                        fp.write(json.dumps({"request": key, "response": record}, ensure_ascii=False, sort_keys=True) + "\n")
+                os.replace(path + ".tmp", path)
+            self._overwritten.clear()
+
+    def close(self) -> None:
+        self.save()
+        self.adapter.close()
@@ -15,45 +15,24 @@
 # SOFTWARE.
 
 
-from json import loads
 from re import match, sub
-from time import sleep
 from urllib.parse import quote, unquote
 
-from requests import ReadTimeout, get
-from requests.exceptions import ConnectionError
 
 from oc_idmanager.base import IdentifierManager
+from oc_idmanager.oc_data_storage.in_memory_manager import InMemoryStorageManager
 
 
 class RORManager(IdentifierManager):
     """This class implements an identifier manager for ROR identifier"""
 
-    def __init__(self, data={}, use_api_service=True):
+    def __init__(self, data=None, use_api_service=True, storage_manager=None, **params):
         """PMCID manager constructor."""
-        super(RORManager, self).__init__()
+        super(RORManager, self).__init__(**params)
         self._api = "https://api.ror.org/organizations/"
         self._use_api_service = use_api_service
         self._p = "ror:"
-        self._data = data
-
-    def is_valid(self, ror_id, get_extra_info=False):
-        ror_id = self.normalise(ror_id, include_prefix=True)
-
-        if ror_id is None:
-            return False
-        else:
-            if ror_id not in self._data or self._data[ror_id] is None:
-                if get_extra_info:
-                    info = self.exists(ror_id, get_extra_info=True)
-                    self._data[ror_id] = info[1]
-                    return (info[0] and self.syntax_ok(ror_id)), info[1]
-                self._data[ror_id] = dict()
-                self._data[ror_id]["valid"] = True if (self.exists(ror_id) and self.syntax_ok(ror_id)) else False
-                return self._data[ror_id].get("valid")
-            if get_extra_info:
-                return self._data[ror_id].get("valid"), self._data[ror_id]
-            return self._data[ror_id].get("valid")
+        self.storage_manager = InMemoryStorageManager(data) if storage_manager is None else storage_manager
 
     def normalise(self, id_string, include_prefix=False):
         try:
@@ -79,42 +58,22 @@ class RORManager(IdentifierManager):
         return True if match(r"^ror:((https:\/\/)?ror\.org\/)?0[a-hj-km-np-tv-z|0-9]{6}[0-9]{2}$", id_string) else False
 
     def exists(self, ror_id_full, get_extra_info=False, allow_extra_api=None):
+        prefiltered = self._get_prefiltered_result(ror_id_full, get_extra_info)
+        if prefiltered is not None:
+            return prefiltered
         valid_bool = True
         if self._use_api_service:
             ror_id = self.normalise(ror_id_full)
             if ror_id is not None:
-                tentative = 3
-                while tentative:
-                    tentative -= 1
+                json_res = self._call_api(self._api + ror_id)
+                if json_res:
                     try:
-                        r = get(self._api + ror_id, headers=self._headers, timeout=30)
-                        if r.status_code == 200:
-                            r.encoding = "utf-8"
-                            json_res = loads(r.text)
-                            if get_extra_info:
-                                extra_info_result = {}
-                                try:
-                                    result = True if json_res['id'] else False
-                                    extra_info_result['valid'] = result
-                                    return result, extra_info_result
-                                except KeyError:
-                                    extra_info_result["valid"] = False
-                                    return False, extra_info_result
-                            try:
-                                return True if json_res['id'] else False
-                            except KeyError:
-                                return False
-
-                        elif 400 <= r.status_code < 500:
-                            if get_extra_info:
-                                return False, {"valid": False}
-                            return False
-                    except ReadTimeout:
-                        # Do nothing, just try again
-                        pass
-                    except ConnectionError:
-                        # Sleep 5 seconds, then try again
-                        sleep(5)
+                        result = True if json_res['id'] else False
+                    except KeyError:
+                        result = False
+                    if get_extra_info:
+                        return result, {"valid": result}
+                    return result
                 valid_bool = False
             else:
                 if get_extra_info:
@@ -0,0 +1,90 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+from __future__ import annotations
+
+from threading import Event, Lock
+from time import monotonic
+from typing import Any, Callable, Hashable, Tuple, Type
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """This class coalesces the concurrent calls with the same key: the first caller runs
+    the function, while the others wait for it and get the same result (or exception)."""
+
+    def __init__(self):
+        self._calls = dict()
+        self._lock = Lock()
+
+    def do(self, key: Hashable, function: Callable, *args, wait_timeout: float | None = None,
+           retry_on: Tuple[Type[BaseException], ...] = (), **kwargs) -> Any:
+        """Runs the function, unless another thread is already running it with the same key,
+        in which case its result is waited for and returned.
+
+        Args:
+            key (hashable): the key identifying the call
+            function (callable): the function to run
+            *args: the positional arguments of the function
+            wait_timeout (float, optional): the maximum time, in seconds, waited for the result of the
+                function run by another thread. Defaults to None, i.e. no limit.
+            retry_on (tuple, optional): the exceptions raised by the function run by another thread which
+                depend on that thread only (e.g. its deadline), after which the function is run again,
+                instead of raising them. Defaults to (), i.e. all the exceptions are raised.
+            **kwargs: the keyword arguments of the function
+        Returns:
+            the result of the function
+        Raises:
+            TimeoutError: if the result of the function run by another thread is not ready in time
+        """
+        expires = None if wait_timeout is None else monotonic() + wait_timeout
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+            if leader:
+                break
+            remaining = None if expires is None else max(0.0, expires - monotonic())
+            if not call.done.wait(remaining):
+                raise TimeoutError(f"The call {key!r} did not end in {wait_timeout} seconds")
+            if call.error is None:
+                return call.result
+            if not isinstance(call.error, retry_on):
+                raise call.error
+        try:
+            call.result = function(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        """Returns the number of calls currently running."""
+        with self._lock:
+            return len(self._calls)
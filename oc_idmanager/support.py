@@ -17,29 +17,402 @@
 
 from __future__ import annotations
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from json import loads
-from requests import get, ReadTimeout
-from requests.exceptions import ConnectionError
-from time import sleep
+from random import uniform
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ChunkedEncodingError, ConnectionError, Timeout
+from threading import Lock
+from time import monotonic, sleep
+from typing import Iterable, Iterator, Tuple
+from urllib.parse import urlsplit
 
+from oc_idmanager.circuit_breaker import APIUnavailableError, CircuitBreaker
+from oc_idmanager.crosswalk import CrossWalk
+from oc_idmanager.http_cache import CachingAdapter, HTTPCache
+from oc_idmanager.rate_limiter import RateLimiter
+from oc_idmanager.single_flight import SingleFlight
 
-def call_api(url:str, headers:str, r_format:str="json") -> dict|None:
-    tentative = 3
-    while tentative:
-        tentative -= 1
+# The connect and read timeouts of the API calls, in seconds
+DEFAULT_TIMEOUT = (10.0, 30.0)
+# The number of threads running the checks of the asynchronous methods, i.e. the maximum number of them in flight
+ASYNC_WORKERS = 32
+
+_session = None
+_session_lock = Lock()
+_deadline = ContextVar("deadline", default=None)
+
+
+def create_session(pool_connections:int=10, pool_maxsize:int=10, host_pool_maxsize:dict|None=None,
+                   http_cache:HTTPCache|None=None) -> Session:
+    """Returns an HTTP session keeping the connections alive in pools, one per host.
+
+    Args:
+        pool_connections (int, optional): the number of hosts whose pools are kept. Defaults to 10.
+        pool_maxsize (int, optional): the number of connections kept for each host. Defaults to 10.
+        host_pool_maxsize (dict, optional): the number of connections kept for specific hosts
+            (e.g. {"api.crossref.org": 50}), overriding pool_maxsize. Defaults to None.
+        http_cache (HTTPCache, optional): the cache where the responses are stored and revalidated with
+            conditional requests. Defaults to None, i.e. no cache.
+    Returns:
+        Session: the HTTP session
+    """
+    def create_adapter(pool_connections, pool_maxsize):
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        return adapter if http_cache is None else CachingAdapter(http_cache, adapter)
+
+    session = Session()
+    adapter = create_adapter(pool_connections, pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    for host, maxsize in (host_pool_maxsize or {}).items():
+        host_adapter = create_adapter(1, maxsize)
+        session.mount(f"https://{host}", host_adapter)
+        session.mount(f"http://{host}", host_adapter)
+    return session
+
+
+def get_session() -> Session:
+    """Returns the HTTP session shared by all the identifier managers without a session of their own,
+    creating it with the default pool sizes on the first call."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def set_session(session:Session|None) -> None:
+    """Replaces the HTTP session shared by all the identifier managers without a session of their own.
+
+    Args:
+        session (Session): the new shared session, or None to create it again with the default pool sizes
+    """
+    global _session
+    with _session_lock:
+        _session = session
+
+
+class RetryPolicy(object):
+    """This class implements the policy followed to retry the failed API calls, i.e. those
+    raising a connection error or a timeout and those answered with a transient status:
+    each call is attempted again after an exponential backoff with jitter, or after the time
+    required by the Retry-After header of the response, if any."""
+
+    def __init__(self, max_attempts:int=3, backoff_factor:float=1.0, max_backoff:float=30.0, jitter:bool=True,
+                 retry_statuses:Iterable[int]=(429, 500, 502, 503, 504), respect_retry_after:bool=True,
+                 max_retry_after:float=120.0):
+        """Retry policy constructor.
+
+        Args:
+            max_attempts (int, optional): the maximum number of attempts of each call. Defaults to 3.
+            backoff_factor (float, optional): the backoff before the second attempt, in seconds, which is
+                doubled before each following attempt. Defaults to 1.0.
+            max_backoff (float, optional): the maximum backoff, in seconds. Defaults to 30.0.
+            jitter (bool, optional): True to wait a random time between zero and the backoff ("full jitter"),
+                so that the clients failing together do not retry together. Defaults to True.
+            retry_statuses (iterable, optional): the statuses of the responses to retry. Defaults to
+                (429, 500, 502, 503, 504).
+            respect_retry_after (bool, optional): True to wait at least the time required by the Retry-After
+                header of the responses. Defaults to True.
+            max_retry_after (float, optional): the maximum time waited because of a Retry-After header, in
+                seconds. Defaults to 120.0.
+        """
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+
+    def should_retry(self, response:Response) -> bool:
+        return response.status_code in self.retry_statuses
+
+    def get_backoff(self, attempt:int, response:Response|None=None) -> float:
+        """Returns the time to wait before the next attempt of a call.
+
+        Args:
+            attempt (int): the number of attempts already made
+            response (Response, optional): the response to the last attempt, if any
+        Returns:
+            float: the time to wait, in seconds
+        """
+        backoff = min(self.max_backoff, self.backoff_factor * 2 ** (attempt - 1))
+        if self.jitter:
+            backoff = uniform(0, backoff)
+        if self.respect_retry_after and response is not None:
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                backoff = max(backoff, min(retry_after, self.max_retry_after))
+        return backoff
+
+
+def _parse_retry_after(value:str|None) -> float|None:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+_retry_policy = RetryPolicy()
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Returns the retry policy followed by all the identifier managers without a policy of their own."""
+    return _retry_policy
+
+
+def set_retry_policy(retry_policy:RetryPolicy) -> None:
+    """Replaces the retry policy followed by all the identifier managers without a policy of their own.
+
+    Args:
+        retry_policy (RetryPolicy): the new shared retry policy
+    """
+    global _retry_policy
+    _retry_policy = retry_policy
+
+
+_rate_limiter = RateLimiter()
+_single_flight = SingleFlight()
+_circuit_breaker = CircuitBreaker()
+_crosswalk = CrossWalk()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Returns the rate limiter followed by all the identifier managers without a rate limiter of their own."""
+    return _rate_limiter
+
+
+def set_rate_limiter(rate_limiter:RateLimiter) -> None:
+    """Replaces the rate limiter followed by all the identifier managers without a rate limiter of their own.
+
+    Args:
+        rate_limiter (RateLimiter): the new shared rate limiter
+    """
+    global _rate_limiter
+    _rate_limiter = rate_limiter
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Returns the circuit breaker followed by all the identifier managers without a circuit breaker of their own."""
+    return _circuit_breaker
+
+
+def set_circuit_breaker(circuit_breaker:CircuitBreaker) -> None:
+    """Replaces the circuit breaker followed by all the identifier managers without a circuit breaker of their own.
+
+    Args:
+        circuit_breaker (CircuitBreaker): the new shared circuit breaker
+    """
+    global _circuit_breaker
+    _circuit_breaker = circuit_breaker
+
+
+def get_crosswalk() -> CrossWalk:
+    """Returns the cross-walk consulted by all the identifier managers without a cross-walk of their own."""
+    return _crosswalk
+
+
+def set_crosswalk(crosswalk:CrossWalk) -> None:
+    """Replaces the cross-walk consulted by all the identifier managers without a cross-walk of their own.
+
+    Args:
+        crosswalk (CrossWalk): the new shared cross-walk
+    """
+    global _crosswalk
+    _crosswalk = crosswalk
+
+
+_async_executor = None
+_async_workers = ASYNC_WORKERS
+_async_executor_lock = Lock()
+
+
+def get_async_executor() -> Tuple[ThreadPoolExecutor, int]:
+    """Returns the executor running the checks of the asynchronous methods of all the identifier managers
+    without an executor of their own, creating it on the first call, with the number of its threads."""
+    global _async_executor
+    with _async_executor_lock:
+        if _async_executor is None:
+            _async_executor = ThreadPoolExecutor(max_workers=_async_workers, thread_name_prefix="oc_idmanager")
+        return _async_executor, _async_workers
+
+
+def set_async_workers(max_workers:int) -> None:
+    """Sets the number of threads running the checks of the asynchronous methods of all the identifier
+    managers without an executor of their own, i.e. the maximum number of those checks in flight. The
+    checks already running are completed by the previous threads.
+
+    Args:
+        max_workers (int): the number of threads
+    """
+    global _async_executor, _async_workers
+    with _async_executor_lock:
+        if _async_executor is not None:
+            _async_executor.shutdown(wait=False)
+        _async_executor = None
+        _async_workers = max_workers
+
+
+class RetriesExhaustedError(APIUnavailableError):
+    """This exception is raised when an API call fails in all the attempts allowed by the retry
+    policy, because of transport errors or of responses with a status to retry (e.g. 503): the
+    API did not answer, hence the ids depending on it are neither valid nor invalid, but unknown."""
+
+    def __init__(self, url:str, response:Response|None=None):
+        Exception.__init__(self, f"The call to {url} failed in all the attempts allowed")
+        self.host = urlsplit(url).hostname
+        self.response = response
+
+
+class DeadlineExceededError(APIUnavailableError):
+    """This exception is raised when an API is not called, or its call is interrupted, because the
+    deadline set by the caller has expired: as for an unavailable API, the ids depending on it are
+    neither valid nor invalid, but unknown."""
+
+    def __init__(self, url:str):
+        Exception.__init__(self, f"The deadline expired before getting {url}")
+        self.host = urlsplit(url).hostname
+
+
+@contextmanager
+def deadline(seconds:float) -> Iterator[None]:
+    """Sets a deadline for all the API calls made in the context, including their retries and the
+    calls to fallback APIs. The nested deadlines cannot extend the enclosing ones.
+
+    Args:
+        seconds (float): the time available, in seconds
+    """
+    expires = monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(expires if current is None else min(current, expires))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def get_remaining_time() -> float|None:
+    """Returns the time left before the deadline of the current context, in seconds, or None if there is no deadline."""
+    expires = _deadline.get()
+    return None if expires is None else expires - monotonic()
+
+
+def get_response(url:str, headers:dict, params:dict|None=None, session:Session|None=None,
+                 retry_policy:RetryPolicy|None=None, rate_limiter:RateLimiter|None=None,
+                 circuit_breaker:CircuitBreaker|None=None, timeout:float|tuple|None=None,
+                 rate_limit_key:str|None=None) -> Response:
+    """Calls an API, retrying the call according to the retry policy. The concurrent calls with
+    the same URL, parameters, headers, session, retry policy and timeout are coalesced into a
+    single call, whose response is returned to all the callers. The attempts, the backoffs and the timeouts are limited by the
+    deadline of the context, if any.
+
+    Args:
+        url (str): the URL to get
+        headers (dict): the headers of the request
+        params (dict, optional): the query parameters of the request. Defaults to None.
+        session (Session, optional): the HTTP session. Defaults to None, i.e. the shared session.
+        retry_policy (RetryPolicy, optional): the retry policy. Defaults to None, i.e. the shared policy.
+        rate_limiter (RateLimiter, optional): the rate limiter. Defaults to None, i.e. the shared rate limiter.
+        circuit_breaker (CircuitBreaker, optional): the circuit breaker. Defaults to None, i.e. the shared
+            circuit breaker.
+        timeout (float or tuple, optional): the timeout of each attempt, in seconds, or a tuple with the
+            connect and the read timeouts. Defaults to None, i.e. DEFAULT_TIMEOUT.
+        rate_limit_key (str, optional): the API key sent with the request, whose limit in the rate limiter,
+            if any, is followed instead of the limit of the host. Defaults to None.
+    Returns:
+        Response: the response
+    Raises:
+        APIUnavailableError: if the circuit of the host of the URL is open
+        RetriesExhaustedError: if the call failed in all the attempts allowed, because of transport
+            errors or of responses with a status to retry
+        DeadlineExceededError: if the deadline expires before getting a response
+    """
+    session = get_session() if session is None else session
+    retry_policy = get_retry_policy() if retry_policy is None else retry_policy
+    # The calls through different sessions (e.g. with a cache or a record/replay adapter) or policies are not coalesced
+    key = (url, repr(sorted((params or {}).items())), repr(sorted(headers.items())), id(session), id(retry_policy),
+           repr(timeout))
+    try:
+        # A caller waiting for a call interrupted by the deadline of another caller makes the call itself
+        return _single_flight.do(key, _get_response, url, headers, params, session, retry_policy, rate_limiter,
+                                 circuit_breaker, timeout, rate_limit_key, wait_timeout=get_remaining_time(),
+                                 retry_on=(TimeoutError,))
+    except TimeoutError:
+        raise DeadlineExceededError(url)
+
+
+def _get_timeout(timeout:float|tuple|None) -> Tuple[float, float]:
+    connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    remaining = get_remaining_time()
+    if remaining is None:
+        return connect_timeout, read_timeout
+    if remaining <= 0:
+        raise TimeoutError
+    return min(connect_timeout, remaining), min(read_timeout, remaining)
+
+
+def _get_response(url:str, headers:dict, params:dict|None, session:Session|None, retry_policy:RetryPolicy|None,
+                  rate_limiter:RateLimiter|None, circuit_breaker:CircuitBreaker|None,
+                  timeout:float|tuple|None, rate_limit_key:str|None=None) -> Response:
+    session = get_session() if session is None else session
+    retry_policy = get_retry_policy() if retry_policy is None else retry_policy
+    rate_limiter = get_rate_limiter() if rate_limiter is None else rate_limiter
+    circuit_breaker = get_circuit_breaker() if circuit_breaker is None else circuit_breaker
+    timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+    attempt = 0
+    while True:
+        attempt += 1
+        r = None
+        # The token is taken before the circuit is checked, so that a deadline expiring while waiting for it
+        # is not recorded as a failure of the host
+        rate_limiter.acquire(url, max_wait=get_remaining_time(), key=rate_limit_key)
+        attempt_timeout = _get_timeout(timeout)
+        circuit_breaker.before_call(url)
+        failed = True
         try:
-            r = get(url, headers=headers, timeout=30)
-            if r.status_code == 200:
-                r.encoding = "utf-8"
-                return loads(r.text) if r_format == "json" else BeautifulSoup(r.text, 'xml')
-            elif r.status_code == 404:
-                return None
-        except ReadTimeout:
-            # Do nothing, just try again
+            r = session.get(url, headers=headers, params=params, timeout=attempt_timeout)
+            failed = r.status_code in circuit_breaker.failure_statuses
+            if not retry_policy.should_retry(r):
+                return r
+        except (ConnectionError, Timeout, ChunkedEncodingError):
             pass
-        except ConnectionError:
-            # Sleep 5 seconds, then try again
-            sleep(5)
+        finally:
+            circuit_breaker.record(url, failed)
+        if attempt >= retry_policy.max_attempts:
+            raise RetriesExhaustedError(url, r)
+        backoff = retry_policy.get_backoff(attempt, r)
+        remaining = get_remaining_time()
+        if remaining is not None and backoff >= remaining:
+            raise TimeoutError
+        sleep(backoff)
+
+
+def call_api(url:str, headers:dict, r_format:str="json", session:Session|None=None, params:dict|None=None,
+             retry_policy:RetryPolicy|None=None, rate_limiter:RateLimiter|None=None,
+             circuit_breaker:CircuitBreaker|None=None, timeout:float|tuple|None=None,
+             rate_limit_key:str|None=None) -> dict|BeautifulSoup|None:
+    r = get_response(url, headers, params=params, session=session, retry_policy=retry_policy, rate_limiter=rate_limiter,
+                     circuit_breaker=circuit_breaker, timeout=timeout, rate_limit_key=rate_limit_key)
+    if r is not None and r.status_code == 200:
+        r.encoding = "utf-8"
+        return loads(r.text) if r_format == "json" else BeautifulSoup(r.text, 'xml')
     return None
 
 def extract_info(api_response:dict, choose_api:str|None=None) -> dict:
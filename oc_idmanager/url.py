@@ -16,46 +16,27 @@
 
 
 import urllib.parse
-from time import sleep
 
 import validators
-from requests import ReadTimeout, get
-from requests.exceptions import ConnectionError
 
 from oc_idmanager import *
 from oc_idmanager.base import IdentifierManager
+from oc_idmanager.oc_data_storage.in_memory_manager import InMemoryStorageManager
+from oc_idmanager.support import RetriesExhaustedError
 
 
 class URLManager(IdentifierManager):
     """This class implements an identifier manager for url identifier"""
 
-    def __init__(self, data={}, use_api_service=True):
+    def __init__(self, data=None, use_api_service=True, storage_manager=None, **params):
         """URL manager constructor."""
-        super(URLManager, self).__init__()
+        super(URLManager, self).__init__(**params)
         self._use_api_service = use_api_service
         self._p = "url:"
-        self._data = data
+        self.storage_manager = InMemoryStorageManager(data) if storage_manager is None else storage_manager
         self._scheme_https = "https://"
         self._scheme_http = "http://"
 
-    def is_valid(self, url, get_extra_info=False):
-        url = self.normalise(url, include_prefix=True)
-        if url is None:
-            return False
-        else:
-            if url not in self._data or self._data[url] is None:
-                if get_extra_info:
-                    info = self.exists(url, get_extra_info=True)
-                    self._data[url] = info[1]
-                    return (info[0] and self.syntax_ok(url)), info[1]
-                self._data[url] = dict()
-                self._data[url]["valid"] = True if (self.exists(url) and self.syntax_ok(url)) else False
-                return self._data[url].get("valid")
-
-            if get_extra_info:
-                return self._data[url].get("valid"), self._data[url]
-            return self._data[url].get("valid")
-
     def normalise(self, id_string, include_prefix=False):
         id_string = str(id_string)
         url_string = id_string.strip()
@@ -82,18 +63,22 @@ class URLManager(IdentifierManager):
         return True if validators.url(self._scheme_https + id_string) else False
 
     def exists(self, url_full, get_extra_info=False, allow_extra_api=None):
+        prefiltered = self._get_prefiltered_result(url_full, get_extra_info)
+        if prefiltered is not None:
+            return prefiltered
         valid_bool = True
         if self._use_api_service:
             url = self.normalise(url_full)
             if url is not None:
-                tentative = 3
-                while tentative:
-                    tentative -= 1
+                for scheme in (self._scheme_https, self._scheme_http):
                     try:
-                        r = get(self._scheme_https + url,
-                            headers=self._headers,
-                            timeout=30,
-                        )
+                        r = self._get_response(scheme + url)
+                    except RetriesExhaustedError as e:
+                        # The host of the URL cannot be reached, while an error status means it is unavailable
+                        if e.response is not None:
+                            raise
+                        r = None
+                    if r is not None:
                         if r.status_code == 200:
                             if get_extra_info:
                                 return True, {"valid": True}
@@ -102,34 +87,6 @@ class URLManager(IdentifierManager):
                             if get_extra_info:
                                 return False, {"valid": False}
                             return False
-
-                    except ReadTimeout:
-                        # Do nothing, just try again
-                        pass
-                    except ConnectionError:
-                        # Sleep 5 seconds, then try again
-                        sleep(5)
-
-                try:
-                    r = get(self._scheme_http + url,
-                            headers=self._headers,
-                            timeout=30,
-                            )
-                    if r.status_code == 200:
-                        if get_extra_info:
-                            return True, {"valid": True}
-                        return True
-                    elif r.status_code == 404:
-                        if get_extra_info:
-                            return False, {"valid": False}
-                        return False
-                except ReadTimeout:
-                    # Do nothing, just try again
-                    pass
-                except ConnectionError:
-                    # Sleep 5 seconds, then try again
-                    sleep(5)
-
                 valid_bool = False
 
             else:
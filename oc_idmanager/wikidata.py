@@ -15,45 +15,24 @@
 # SOFTWARE.
 
 
-from json import loads
 from re import match, sub
-from time import sleep
 from urllib.parse import quote, unquote
 
-from requests import ReadTimeout, get
-from requests.exceptions import ConnectionError
 
 from oc_idmanager.base import IdentifierManager
+from oc_idmanager.oc_data_storage.in_memory_manager import InMemoryStorageManager
 
 
 class WikidataManager(IdentifierManager):
     """This class implements an identifier manager for wikidata identifier"""
 
-    def __init__(self, data={}, use_api_service=True):
+    def __init__(self, data=None, use_api_service=True, storage_manager=None, **params):
         """Wikidata manager constructor."""
-        super(WikidataManager, self).__init__()
+        super(WikidataManager, self).__init__(**params)
         self._api = "https://www.wikidata.org/wiki/Special:EntityData/"
         self._use_api_service = use_api_service
         self._p = "wikidata:"
-        self._data = data
-
-    def is_valid(self, wikidata_id, get_extra_info=False):
-        wikidata_id = self.normalise(wikidata_id, include_prefix=True)
-
-        if wikidata_id is None:
-            return False
-        else:
-            if wikidata_id not in self._data or self._data[wikidata_id] is None:
-                if get_extra_info:
-                    info = self.exists(wikidata_id, get_extra_info=True)
-                    self._data[wikidata_id] = info[1]
-                    return (info[0] and self.syntax_ok(wikidata_id)), info[1]
-                self._data[wikidata_id] = dict()
-                self._data[wikidata_id]["valid"] = True if (self.exists(wikidata_id) and self.syntax_ok(wikidata_id)) else False
-                return self._data[wikidata_id].get("valid")
-            if get_extra_info:
-                return self._data[wikidata_id].get("valid"), self._data[wikidata_id]
-            return self._data[wikidata_id].get("valid")
+        self.storage_manager = InMemoryStorageManager(data) if storage_manager is None else storage_manager
 
     def normalise(self, id_string, include_prefix=False):
         try:
@@ -78,44 +57,22 @@ class WikidataManager(IdentifierManager):
         return True if match("^wikidata:Q[1-9]\\d*$", id_string) else False
 
     def exists(self, wikidata_id_full, get_extra_info=False, allow_extra_api=None):
+        prefiltered = self._get_prefiltered_result(wikidata_id_full, get_extra_info)
+        if prefiltered is not None:
+            return prefiltered
         valid_bool = True
         if self._use_api_service:
             wikidata_id = self.normalise(wikidata_id_full)
             if wikidata_id is not None:
-                tentative = 3
-                while tentative:
-                    tentative -= 1
+                json_res = self._call_api(self._api + quote(wikidata_id))
+                if json_res:
                     try:
-                        r = get(self._api + quote(wikidata_id), headers=self._headers, timeout=30)
-                        if r.status_code == 200:
-                            r.encoding = "utf-8"
-                            json_res = loads(r.text)
-                            if get_extra_info:
-                                extra_info_result = {}
-                                try:
-                                    result = True if json_res['entities'][f"{wikidata_id}"]['id'] == str(wikidata_id) else False
-                                    extra_info_result['valid'] = result
-                                    return result, extra_info_result
-                                except KeyError:
-                                    extra_info_result["valid"] = False
-                                    return False, extra_info_result
-                                # return True if json_res['entities'][f"{wikidata_id}"]['id'] == str(
-                                #     wikidata_id) else False, self.extra_info(json_res)
-                            try:
-                                return True if json_res['entities'][f"{wikidata_id}"]['id'] == str(wikidata_id) else False
-                            except KeyError:
-                                return False
-
-                        elif 400 <= r.status_code < 500:
-                            if get_extra_info:
-                                return False, {"valid": False}
-                            return False
-                    except ReadTimeout:
-                        # Do nothing, just try again
-                        pass
-                    except ConnectionError:
-                        # Sleep 5 seconds, then try again
-                        sleep(5)
+                        result = True if json_res['entities'][f"{wikidata_id}"]['id'] == str(wikidata_id) else False
+                    except KeyError:
+                        result = False
+                    if get_extra_info:
+                        return result, {"valid": result}
+                    return result
                 valid_bool = False
             else:
                 if get_extra_info:
@@ -15,47 +15,24 @@
 # SOFTWARE.
 
 
-from json import loads
 from re import match, sub
-from time import sleep
 from urllib.parse import unquote
 
-from requests import ReadTimeout, get
-from requests.exceptions import ConnectionError
 
 from oc_idmanager.base import IdentifierManager
+from oc_idmanager.oc_data_storage.in_memory_manager import InMemoryStorageManager
 
 
 class WikipediaManager(IdentifierManager):
     """This class implements an identifier manager for wikidata identifier"""
 
-    def __init__(self, data={}, use_api_service=True):
+    def __init__(self, data=None, use_api_service=True, storage_manager=None, **params):
         """Wikipedia manager constructor."""
-        super(WikipediaManager, self).__init__()
+        super(WikipediaManager, self).__init__(**params)
         self._api = "https://en.wikipedia.org/w/api.php/"
         self._use_api_service = use_api_service
         self._p = "wikipedia:"
-        self._data = data
-
-    def is_valid(self, wikipedia_id, get_extra_info=False):
-
-        wikipedia_id = self.normalise(wikipedia_id, include_prefix=True)
-
-        if wikipedia_id is None:
-            return False
-        else:
-            if wikipedia_id not in self._data or self._data[wikipedia_id] is None:
-                if get_extra_info:
-                    info = self.exists(wikipedia_id, get_extra_info=True)
-                    self._data[wikipedia_id] = info[1]
-                    return (info[0] and self.syntax_ok(wikipedia_id)), info[1]
-                self._data[wikipedia_id] = dict()
-                self._data[wikipedia_id]["valid"] = True if (self.exists(wikipedia_id) and self.syntax_ok(
-                    wikipedia_id)) else False
-                return self._data[wikipedia_id].get("valid")
-            if get_extra_info:
-                return self._data[wikipedia_id].get("valid"), self._data[wikipedia_id]
-            return self._data[wikipedia_id].get("valid")
+        self.storage_manager = InMemoryStorageManager(data) if storage_manager is None else storage_manager
 
     def normalise(self, id_string, include_prefix=False):
         try:
@@ -80,49 +57,28 @@ class WikipediaManager(IdentifierManager):
         return True if match("^wikipedia:[1-9][0-9]*$", id_string) else False
 
     def exists(self, wikipedia_id_full, get_extra_info=False, allow_extra_api=None):
+        prefiltered = self._get_prefiltered_result(wikipedia_id_full, get_extra_info)
+        if prefiltered is not None:
+            return prefiltered
         valid_bool = True
         if self._use_api_service:
             wikipedia_id = self.normalise(wikipedia_id_full)
             if wikipedia_id is not None:
-                tentative = 3
-                while tentative:
-                    tentative -= 1
+                query_params = {
+                    "action": "query",
+                    "pageids" : wikipedia_id,
+                    "format": "json",
+                    "formatversion": "1",  # format of json output (current version 1; might be replaced w/ v.2)
+                }
+                json_res = self._call_api(self._api, params=query_params)
+                if json_res:
                     try:
-                        query_params = {
-                            "action": "query",
-                            "pageids" : wikipedia_id,
-                            "format": "json",
-                            "formatversion": "1",  # format of json output (current version 1; might be replaced w/ v.2)
-                        }
-
-                        r = get(self._api, params=query_params, headers=self._headers, timeout=30)  # controlla
-                        if r.status_code == 200:
-                            r.encoding = "utf-8"
-                            json_res = loads(r.text)
-                            if get_extra_info:
-                                extra_info_result = {}
-                                try:
-                                    result = True if 'title' in json_res['query']['pages'][wikipedia_id].keys() else False
-                                    extra_info_result["valid"] = result
-                                    return result, extra_info_result
-                                except KeyError:
-                                    extra_info_result["valid"] = False
-                                    return False, extra_info_result
-                            try:
-                                return True if 'title' in json_res['query']['pages'][wikipedia_id].keys() else False
-                            except KeyError:
-                                return False
-
-                        elif 400 <= r.status_code < 500:
-                            if get_extra_info:
-                                return False, {"valid": False}
-                            return False
-                    except ReadTimeout:
-                        # Do nothing, just try again
-                        pass
-                    except ConnectionError:
-                        # Sleep 5 seconds, then try again
-                        sleep(5)
+                        result = True if 'title' in json_res['query']['pages'][wikipedia_id].keys() else False
+                    except KeyError:
+                        result = False
+                    if get_extra_info:
+                        return result, {"valid": result}
+                    return result
                 valid_bool=False
             else:
                 if get_extra_info:
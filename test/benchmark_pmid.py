@@ -0,0 +1,58 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+
+
+"""Measures the cost of PMIDManager.extra_info on MEDLINE records with many authors.
+
+Run it with ``python -m test.benchmark_pmid [n_authors ...]``.
+"""
+
+import sys
+from timeit import Timer
+
+from oc_idmanager import PMIDManager
+
+
+def medline_record(n_authors):
+    lines = [
+        '<pre class="article-details" id="article-details">PMID- 2942070', "OWN - NLM", "STAT- MEDLINE",
+        "DP  - 1986 Mar 15", "TI  - Comparison of the effects of some drugs on the",
+        "      uptake of a model compound in isolated rat hepatocytes.", "PG  - 1081-5",
+        "IS  - 0006-2952 (Print)", "IS  - 1873-2968 (Electronic)", "VI  - 35", "IP  - 6",
+        "AB  - An abstract that goes on", "      and on over several lines."]
+    for i in range(n_authors):
+        lines += [
+            f"FAU - Surname{i}, Given Name", f"AU  - Surname{i} GN",
+            f"AD  - Department {i}, University,", "      City, Country."]
+    lines += [
+        "LA  - eng", "PT  - Journal Article", "PL  - England", "TA  - Biochem Pharmacol",
+        "JT  - Biochemical pharmacology", "AID - 0006-2952(86)90143-7 [pii]",
+        "AID - 10.1016/0006-2952(86)90143-7 [doi]", "SO  - Biochem Pharmacol. 1986 Mar 15;35(6):1081-5.</pre>"]
+    return "\n".join(lines)
+
+
+def main(sizes):
+    pm = PMIDManager(use_api_service=False)
+    for n_authors in sizes:
+        record = medline_record(n_authors)
+        number, total = Timer(lambda: pm.extra_info(record)).autorange()
+        print(f"{n_authors:>6} authors: {total / number * 1000:.3f} ms per record")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [10, 100, 500, 1000])
@@ -0,0 +1,313 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+import gzip
+import json
+import unittest
+from os.path import basename, getmtime, join
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from oc_idmanager import *
+from oc_idmanager.public_data import build_doi_index, build_pmid_index
+from oc_idmanager.oc_data_storage import (BloomFilter, IndexedFileStorageManager, InMemoryStorageManager, SnapshotStorageManager,
+                                          SortedIndex, SqliteStorageManager, TieredStorageManager,
+                                          export_snapshot, import_snapshot, load_file)
+
+
+class StorageManagerTest(unittest.TestCase):
+    """This class aim at testing the storages of the identifier managers."""
+
+    def setUp(self):
+        self.tmp_dir = mkdtemp()
+        self.db_path = join(self.tmp_dir, "storage.db")
+        with open(join("test", "data", "glob.json"), encoding="utf-8") as fp:
+            self.data = json.load(fp)
+        self.glob_path = join("test", "data", "glob.json")
+        self.jsonl_path = join(self.tmp_dir, "glob.jsonl")
+        with open(self.jsonl_path, "w", encoding="utf-8") as fp:
+            for id_string, value in self.data.items():
+                fp.write(json.dumps({id_string: value}) + "\n")
+        self.valid_doi = "doi:10.1108/jd-12-2013-0166"
+        self.invalid_doi = "doi:10.1108/12-2013-0166"
+
+    def tearDown(self):
+        rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_in_memory_storage(self):
+        sm = InMemoryStorageManager(self.data)
+        self.assertEqual(sm.get_value(self.valid_doi), self.data[self.valid_doi])
+        self.assertIsNone(sm.get_value("doi:10.1000/missing"))
+        sm.set_value("doi:10.1000/new", {"valid": True})
+        self.assertTrue("doi:10.1000/new" in self.data)
+        sm.delete_value("doi:10.1000/new")
+        self.assertIsNone(sm.get_value("doi:10.1000/new"))
+
+    def test_bounded_in_memory_storage(self):
+        sm = InMemoryStorageManager(max_entries=2)
+        sm.set_value("doi:10.1000/a", {"valid": True})
+        sm.set_value("doi:10.1000/b", {"valid": True})
+        self.assertEqual(sm.get_value("doi:10.1000/a"), {"valid": True})
+        sm.set_value("doi:10.1000/c", {"valid": False})
+        self.assertIsNone(sm.get_value("doi:10.1000/b"))
+        self.assertEqual(set(sm.get_all_keys()), {"doi:10.1000/a", "doi:10.1000/c"})
+        self.assertEqual(sm.get_stats(), {"entries": 2, "bytes": 0, "hits": 1, "misses": 1, "evictions": 1})
+
+        sm = InMemoryStorageManager(self.data, max_bytes=100)
+        self.assertLessEqual(sm.get_stats()["bytes"], 100)
+        self.assertLess(len(list(sm.get_all_keys())), len(self.data))
+
+    def test_tiered_storage(self):
+        sm = TieredStorageManager(negative_ttl=0)
+        sm.set_values(self.data.items())
+        self.assertEqual(sm.get_value(self.valid_doi), self.data[self.valid_doi])
+        self.assertIsNone(sm.get_value(self.invalid_doi))
+        self.assertIsNotNone(sm.positive.get_value(self.valid_doi))
+
+        sm = TieredStorageManager(negative=SqliteStorageManager(self.db_path, ttl=3600))
+        sm.set_value(self.invalid_doi, {"valid": False})
+        self.assertEqual(sm.get_value(self.invalid_doi), {"valid": False})
+        sm.set_value(self.invalid_doi, {"valid": True})
+        self.assertIsNone(sm.negative.get_value(self.invalid_doi))
+        self.assertEqual(sm.get_value(self.invalid_doi), {"valid": True})
+        sm.set_values([(self.invalid_doi, {"valid": False})])
+        self.assertIsNone(sm.positive.get_value(self.invalid_doi))
+        self.assertEqual(sm.get_value(self.invalid_doi), {"valid": False})
+        sm.set_values([(self.invalid_doi, {"valid": True})])
+        self.assertIsNone(sm.negative.get_value(self.invalid_doi))
+        self.assertEqual(sm.get_value(self.invalid_doi), {"valid": True})
+        sm.close()
+
+    def test_managers_do_not_share_storage(self):
+        om_1 = ORCIDManager(use_api_service=False)
+        om_2 = ORCIDManager(use_api_service=False)
+        om_1.is_valid("0000-0003-0530-4305")
+        self.assertIsNotNone(om_1.storage_manager.get_value("orcid:0000-0003-0530-4305"))
+        self.assertIsNone(om_2.storage_manager.get_value("orcid:0000-0003-0530-4305"))
+
+    def test_sqlite_storage(self):
+        sm = SqliteStorageManager(self.db_path)
+        sm.set_values(self.data.items())
+        sm.set_value("doi:10.1000/new", {"valid": False})
+        sm.close()
+
+        sm = SqliteStorageManager(self.db_path)
+        self.assertEqual(sm.get_value(self.valid_doi), self.data[self.valid_doi])
+        self.assertEqual(sm.get_value("doi:10.1000/new"), {"valid": False})
+        self.assertEqual(set(sm.get_all_keys()), set(self.data) | {"doi:10.1000/new"})
+        self.assertEqual(dict(sm.items())[self.invalid_doi], self.data[self.invalid_doi])
+        sm.delete_storage()
+        self.assertEqual(list(sm.get_all_keys()), [])
+        sm.close()
+
+    def test_manager_with_storage(self):
+        sm = SqliteStorageManager(self.db_path)
+        sm.set_values(self.data.items())
+        dm = DOIManager(use_api_service=False, storage_manager=sm)
+        self.assertTrue(dm.is_valid(self.valid_doi))
+        self.assertFalse(dm.is_valid(self.invalid_doi))
+        self.assertTrue(dm.is_valid("10.1000/not-stored"))
+        self.assertEqual(sm.get_value("doi:10.1000/not-stored"), {"valid": True})
+        sm.close()
+
+    def test_load_file(self):
+        for path in (self.glob_path, self.jsonl_path):
+            sm = InMemoryStorageManager()
+            self.assertEqual(load_file(path, sm, batch_size=5), len(self.data))
+            self.assertEqual(dict(sm.items()), self.data)
+
+    def test_indexed_file_storage(self):
+        for path in (self.glob_path, self.jsonl_path):
+            index_path = join(self.tmp_dir, basename(path) + ".idx")
+            sm = IndexedFileStorageManager(path, index_path=index_path)
+            self.assertEqual(sm.get_value(self.valid_doi), self.data[self.valid_doi])
+            self.assertIsNone(sm.get_value("doi:10.1000/missing"))
+            self.assertEqual(set(sm.get_all_keys()), set(self.data))
+            sm.set_value(self.valid_doi, {"valid": False})
+            self.assertEqual(sm.get_value(self.valid_doi), {"valid": False})
+            sm.delete_value(self.invalid_doi)
+            self.assertIsNone(sm.get_value(self.invalid_doi))
+            dm = DOIManager(use_api_service=False, storage_manager=sm)
+            self.assertFalse(dm.is_valid(self.valid_doi))
+            sm.close()
+
+        # The sidecar index is reused until the file changes
+        index_path = self.jsonl_path + ".idx"
+        IndexedFileStorageManager(self.jsonl_path).close()
+        index_mtime = getmtime(index_path)
+        sm = IndexedFileStorageManager(self.jsonl_path)
+        self.assertEqual(getmtime(index_path), index_mtime)
+        sm.close()
+        with open(self.jsonl_path, "a", encoding="utf-8") as fp:
+            fp.write(json.dumps({"doi:10.1000/new": {"valid": True}}) + "\n")
+        sm = IndexedFileStorageManager(self.jsonl_path)
+        self.assertEqual(sm.get_value("doi:10.1000/new"), {"valid": True})
+        self.assertEqual(sm.get_value(self.valid_doi), self.data[self.valid_doi])
+        sm.close()
+
+    def test_snapshot(self):
+        snapshot_path = join(self.tmp_dir, "storage.snapshot")
+        for compress in (True, False):
+            self.assertEqual(export_snapshot(InMemoryStorageManager(self.data), snapshot_path, compress), len(self.data))
+            sm = InMemoryStorageManager()
+            self.assertEqual(import_snapshot(snapshot_path, sm), len(self.data))
+            self.assertEqual(dict(sm.items()), self.data)
+            sm = SnapshotStorageManager(snapshot_path)
+            self.assertEqual({id_string: sm.get_value(id_string) for id_string in self.data}, self.data)
+            self.assertEqual(set(sm.get_all_keys()), set(self.data))
+
+        # The items are sorted by id only, even if an id is returned twice with values that cannot be compared
+        class DuplicateStorageManager(InMemoryStorageManager):
+            def items(self):
+                return iter([("doi:10.1000/1", {"valid": True}), ("doi:10.1000/1", {"valid": False})])
+
+        self.assertEqual(export_snapshot(DuplicateStorageManager(), snapshot_path), 2)
+        with open(snapshot_path, "r+b") as fp:
+            fp.write(b"NOTASNAP")
+        with self.assertRaises(ValueError):
+            import_snapshot(snapshot_path, InMemoryStorageManager())
+
+    def test_bloom_filter(self):
+        dump_path = join(self.tmp_dir, "dois.txt")
+        with open(dump_path, "w", encoding="utf-8") as fp:
+            fp.write("10.1108/JD-12-2013-0166\nhttps://doi.org/10.1130/2015.2513(00)\n")
+        dm = DOIManager()
+        bloom_filter = BloomFilter.from_dump(dump_path, lambda x: dm.normalise(x, include_prefix=True))
+        bloom_filter_path = join(self.tmp_dir, "dois.bloom")
+        bloom_filter.save(bloom_filter_path)
+        bloom_filter = BloomFilter.load(bloom_filter_path)
+        self.assertTrue(self.valid_doi in bloom_filter)
+        self.assertTrue("doi:10.1130/2015.2513(00)" in bloom_filter)
+        self.assertFalse(self.invalid_doi in bloom_filter)
+
+        dm = DOIManager(prefilter=bloom_filter, trust_prefilter=True)
+        self.assertTrue(dm.exists(self.valid_doi))
+        self.assertFalse(dm.exists(self.invalid_doi))
+        self.assertEqual(dm.exists(self.invalid_doi, get_extra_info=True),
+                         (False, {"id": "10.1108/12-2013-0166", "valid": False, "ra": "unknown"}))
+        self.assertFalse(dm.is_valid(self.invalid_doi))
+
+    def test_sorted_index(self):
+        index_path = join(self.tmp_dir, "ids.index")
+        ids = ["doi:10.1000/%d" % i for i in range(1000)]
+        self.assertEqual(SortedIndex.build(ids + ids[:10], index_path, chunk_size=100), 1000)
+        index = SortedIndex(index_path)
+        self.assertEqual(len(index), 1000)
+        self.assertEqual(list(index), sorted(ids))
+        self.assertTrue(all(id_string in index for id_string in ids))
+        self.assertFalse("doi:10.1000/1000" in index)
+        self.assertFalse("doi:10.1000/" in index)
+        self.assertFalse("" in index)
+        index.close()
+        SortedIndex.build([], index_path)
+        self.assertFalse(self.valid_doi in SortedIndex(index_path))
+
+    def test_offline_doi_index(self):
+        crossref_path = join(self.tmp_dir, "crossref.json.gz")
+        with gzip.open(crossref_path, "wt", encoding="utf-8") as fp:
+            json.dump({"items": [{"DOI": "10.1108/JD-12-2013-0166"}, {"DOI": "10.1130/2015.2513(00)"}]}, fp)
+        datacite_path = join(self.tmp_dir, "datacite.jsonl")
+        with open(datacite_path, "w", encoding="utf-8") as fp:
+            fp.write(json.dumps({"id": "10.5281/zenodo.1", "attributes": {"doi": "10.5281/zenodo.1"}}) + "\n")
+        index_path = join(self.tmp_dir, "dois.index")
+        self.assertEqual(build_doi_index(index_path, [crossref_path], [datacite_path]), 3)
+        dm = DOIManager(offline_index=SortedIndex(index_path))
+        self.assertTrue(dm.exists(self.valid_doi))
+        self.assertTrue(dm.exists("https://doi.org/10.5281/ZENODO.1"))
+        self.assertFalse(dm.exists(self.invalid_doi))
+        self.assertEqual(dm.exists(self.valid_doi, get_extra_info=True),
+                         (True, {"id": "10.1108/jd-12-2013-0166", "valid": True, "ra": "unknown"}))
+        self.assertFalse(dm.is_valid(self.invalid_doi))
+
+    def test_offline_pmid_index(self):
+        baseline_path = join(self.tmp_dir, "pubmed_baseline.xml.gz")
+        with gzip.open(baseline_path, "wt", encoding="utf-8") as fp:
+            fp.write("""<?xml version="1.0" encoding="utf-8"?>
+<PubmedArticleSet>
+  <PubmedArticle>
+    <MedlineCitation Status="MEDLINE" Owner="NLM">
+      <PMID Version="1">2942070</PMID>
+      <Article PubModel="Print">
+        <Journal>
+          <ISSN IssnType="Print">0006-2952</ISSN>
+          <JournalIssue CitedMedium="Print">
+            <Volume>35</Volume>
+            <Issue>6</Issue>
+            <PubDate><Year>1986</Year><Month>Mar</Month><Day>15</Day></PubDate>
+          </JournalIssue>
+          <Title>Biochemical pharmacology</Title>
+        </Journal>
+        <ArticleTitle>Comparison of the effects of some <i>drugs</i> on the uptake.</ArticleTitle>
+        <Pagination><MedlinePgn>1081-5</MedlinePgn></Pagination>
+        <AuthorList CompleteYN="Y">
+          <Author ValidYN="Y"><LastName>Surname</LastName><ForeName>Given Name</ForeName></Author>
+          <Author ValidYN="Y"><CollectiveName>A Group</CollectiveName></Author>
+        </AuthorList>
+        <PublicationTypeList><PublicationType UI="D016428">Journal Article</PublicationType></PublicationTypeList>
+      </Article>
+      <MedlineJournalInfo><ISSNLinking>0006-2952</ISSNLinking></MedlineJournalInfo>
+    </MedlineCitation>
+    <PubmedData>
+      <ArticleIdList>
+        <ArticleId IdType="pubmed">2942070</ArticleId>
+        <ArticleId IdType="doi">10.1016/0006-2952(86)90143-7</ArticleId>
+      </ArticleIdList>
+    </PubmedData>
+  </PubmedArticle>
+  <PubmedArticle>
+    <MedlineCitation><PMID Version="1">1509982</PMID>
+      <Article><Journal><JournalIssue><PubDate><MedlineDate>1992 Jun-Jul</MedlineDate></PubDate></JournalIssue></Journal>
+        <ArticleTitle>Old title.</ArticleTitle></Article>
+    </MedlineCitation>
+  </PubmedArticle>
+  <PubmedArticle>
+    <MedlineCitation><PMID Version="1">1000</PMID><Article><ArticleTitle>Deleted.</ArticleTitle></Article></MedlineCitation>
+  </PubmedArticle>
+</PubmedArticleSet>""")
+        update_path = join(self.tmp_dir, "pubmed_update.xml")
+        with open(update_path, "w", encoding="utf-8") as fp:
+            fp.write("""<?xml version="1.0" encoding="utf-8"?>
+<PubmedArticleSet>
+  <PubmedArticle>
+    <MedlineCitation><PMID Version="1">1509982</PMID>
+      <Article><Journal><JournalIssue><PubDate><Year>1992</Year><Month>06</Month></PubDate></JournalIssue></Journal>
+        <ArticleTitle>New title.</ArticleTitle></Article>
+    </MedlineCitation>
+    <PubmedData>
+      <ArticleIdList><ArticleId IdType="pubmed">1509982</ArticleId></ArticleIdList>
+      <ReferenceList><Reference><Citation>A cited paper.</Citation>
+        <ArticleIdList><ArticleId IdType="doi">10.9999/cited.paper</ArticleId></ArticleIdList></Reference></ReferenceList>
+    </PubmedData>
+  </PubmedArticle>
+  <DeleteCitation><PMID Version="1">1000</PMID></DeleteCitation>
+</PubmedArticleSet>""")
+        index_path = join(self.tmp_dir, "pmids.db")
+        self.assertEqual(build_pmid_index(index_path, [baseline_path, update_path]), 4)
+        index = SqliteStorageManager(index_path)
+        pm = PMIDManager(offline_index=index)
+        self.assertEqual(pm.exists("2942070", get_extra_info=True), (True, {
+            "valid": True, "title": "Comparison of the effects of some drugs on the uptake.",
+            "author": ["Surname, Given Name", "A Group"], "pub_date": "1986-03-15",
+            "venue": "Biochemical pharmacology [issn:0006-2952]", "volume": "35", "issue": "6", "page": "1081-5",
+            "type": ["journal article"], "publisher": [], "editor": [], "doi": "10.1016/0006-2952(86)90143-7"}))
+        self.assertEqual(pm.exists("1509982", get_extra_info=True)[1]["title"], "New title.")
+        self.assertEqual(pm.exists("1509982", get_extra_info=True)[1]["pub_date"], "1992-06")
+        self.assertEqual(pm.exists("1509982", get_extra_info=True)[1]["doi"], "")
+        self.assertFalse(pm.exists("1000"))
+        self.assertEqual(pm.exists_many(["2942070", "1000"]), {"pmid:2942070": True, "pmid:1000": False})
+        self.assertTrue(pm.is_valid("pmid:2942070"))
+        index.close()
@@ -0,0 +1,679 @@
+#!python
+# Copyright 2019, Silvio Peroni <essepuntato@gmail.com>
+# Copyright 2022, Giuseppe Grieco <giuseppe.grieco3@unibo.it>, Arianna Moretti <arianna.moretti4@unibo.it>, Elia Rizzetto <elia.rizzetto@studio.unibo.it>, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+
+import asyncio
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from os import remove
+from os.path import exists, join
+from shutil import rmtree
+from tempfile import mkdtemp
+from threading import current_thread
+from time import monotonic, sleep
+
+from requests import Response
+from requests.adapters import BaseAdapter
+
+from oc_idmanager import *
+from oc_idmanager.circuit_breaker import APIUnavailableError, CircuitBreaker
+from oc_idmanager.crosswalk import CrossWalk
+from oc_idmanager.http_cache import CachingAdapter, HTTPCache
+from oc_idmanager.rate_limiter import RateLimiter, TokenBucket
+from oc_idmanager.record_replay import MissingRecordError, RecordReplayAdapter
+from oc_idmanager.single_flight import SingleFlight
+from oc_idmanager.support import (ASYNC_WORKERS, DeadlineExceededError, RetriesExhaustedError, RetryPolicy, call_api, create_session, deadline, get_crosswalk, get_remaining_time,
+                                  get_rate_limiter, get_response, get_session, set_async_workers, set_circuit_breaker, set_crosswalk, set_session)
+
+
+class StubAdapter(BaseAdapter):
+    """A transport adapter answering each request with the next of the given responses, the last one
+    being repeated."""
+
+    def __init__(self, *responses):
+        super(StubAdapter, self).__init__()
+        self.responses = list(responses)
+        self.requests = list()
+        self.sent = list()
+        self.delay = 0
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        self.timeout = kwargs.get("timeout")
+        sleep(self.delay)
+        status_code, content, headers = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        response = Response()
+        response.status_code = status_code
+        response._content = content.encode("utf-8") if isinstance(content, str) else json.dumps(content).encode("utf-8")
+        response.raw = BytesIO(response._content)
+        response.headers.update(headers)
+        response.url = request.url
+        response.request = request
+        self.sent.append(response)
+        return response
+
+    def close(self):
+        pass
+
+
+def stub_session(*responses):
+    session = create_session()
+    adapter = StubAdapter(*responses)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session, adapter
+
+
+class SupportTest(unittest.TestCase):
+    """This class aim at testing the HTTP support shared by the identifier managers."""
+
+    def setUp(self):
+        self.tmp_dir = mkdtemp()
+        set_circuit_breaker(CircuitBreaker())
+        set_crosswalk(CrossWalk())
+        self.orcid = "0000-0003-0530-4305"
+        self.orcid_response = (200, {"orcid-identifier": {"path": self.orcid}}, {})
+
+    def tearDown(self):
+        set_session(None)
+        rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_shared_session(self):
+        self.assertIs(get_session(), get_session())
+        session, adapter = stub_session(self.orcid_response, self.orcid_response)
+        set_session(session)
+        self.assertTrue(ORCIDManager().exists(self.orcid))
+        self.assertTrue(ORCIDManager().exists(self.orcid))
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_manager_session(self):
+        session, adapter = stub_session(self.orcid_response, (200, {"responseCode": 1}, {}))
+        om = ORCIDManager(session=session)
+        self.assertTrue(om.exists(self.orcid))
+        self.assertTrue(call_api("https://doi.org/api/handles/10.1000/1", {}, session=session))
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_create_session(self):
+        session = create_session(pool_maxsize=4, host_pool_maxsize={"api.crossref.org": 20})
+        self.assertEqual(session.get_adapter("https://api.crossref.org/works")._pool_maxsize, 20)
+        self.assertEqual(session.get_adapter("https://doi.org/api")._pool_maxsize, 4)
+
+    def test_retry_policy(self):
+        policy = RetryPolicy(backoff_factor=1, max_backoff=4, jitter=False)
+        self.assertEqual([policy.get_backoff(attempt) for attempt in range(1, 5)], [1, 2, 4, 4])
+        policy = RetryPolicy(backoff_factor=1, jitter=True)
+        self.assertTrue(all(0 <= policy.get_backoff(3) <= 4 for _ in range(100)))
+        session, adapter = stub_session((429, "", {"Retry-After": "7"}), (503, "", {"Retry-After": "1000"}))
+        self.assertEqual(policy.get_backoff(1, session.get("https://api.crossref.org")), 7)
+        self.assertEqual(RetryPolicy(max_retry_after=60).get_backoff(1, session.get("https://api.crossref.org")), 60)
+
+    def test_get_response(self):
+        policy = RetryPolicy(backoff_factor=0)
+        session, adapter = stub_session((503, "", {}), (502, "", {}), (200, {"responseCode": 1}, {}))
+        self.assertEqual(get_response("https://doi.org/api", {}, session=session, retry_policy=policy).status_code, 200)
+        self.assertEqual(len(adapter.requests), 3)
+        session, adapter = stub_session((503, "", {}), (503, "", {}), (503, "", {}))
+        with self.assertRaises(RetriesExhaustedError) as context:
+            get_response("https://doi.org/api", {}, session=session, retry_policy=policy)
+        self.assertEqual(context.exception.response.status_code, 503)
+        self.assertEqual(len(adapter.requests), 3)
+        session, adapter = stub_session((404, "", {}))
+        self.assertEqual(get_response("https://doi.org/api", {}, session=session, retry_policy=policy).status_code, 404)
+        self.assertEqual(len(adapter.requests), 1)
+        session, adapter = stub_session((503, "", {}), self.orcid_response)
+        self.assertTrue(ORCIDManager(session=session, retry_policy=policy).exists(self.orcid))
+        session, adapter = stub_session((404, "", {}))
+        self.assertFalse(ORCIDManager(session=session, retry_policy=policy).exists(self.orcid))
+        self.assertEqual(len(adapter.requests), 1)
+        # An outage is not stored as an invalid id
+        session, adapter = stub_session((503, "", {}))
+        om = ORCIDManager(session=session, retry_policy=policy)
+        self.assertRaises(RetriesExhaustedError, om.is_valid, self.orcid)
+        self.assertIsNone(om.storage_manager.get_value("orcid:" + self.orcid))
+        self.assertEqual(om.is_valid_many([self.orcid]), [None])
+
+    def test_async_methods(self):
+        session, adapter = stub_session(self.orcid_response)
+        om = ORCIDManager(session=session)
+
+        async def check():
+            return await asyncio.gather(om.aexists(self.orcid), om.ais_valid(self.orcid),
+                                        om.ais_valid("orcid:0000-0003-0530-4306"), om.aexists(self.orcid, get_extra_info=True))
+
+        exists, valid, invalid, (exists_extra, info) = asyncio.run(check())
+        self.assertTrue(exists)
+        self.assertTrue(valid)
+        self.assertFalse(invalid)
+        self.assertTrue(exists_extra)
+
+        # The checks beyond the threads of the shared executor wait in the event loop
+        set_async_workers(4)
+        session, adapter = stub_session(self.orcid_response)
+        adapter.delay = 0.05
+        threads = set()
+        send = adapter.send
+
+        def send_in_thread(request, **kwargs):
+            threads.add(current_thread().name)
+            return send(request, **kwargs)
+
+        adapter.send = send_in_thread
+        om = ORCIDManager(session=session)
+        orcids = ["0000-0003-0530-%04d" % i for i in range(20)]
+
+        async def check_many():
+            return await asyncio.gather(*(om.aexists(orcid) for orcid in orcids))
+
+        try:
+            self.assertEqual(len(asyncio.run(check_many())), 20)
+        finally:
+            set_async_workers(ASYNC_WORKERS)
+        self.assertEqual(len(adapter.requests), 20)
+        self.assertLessEqual(len(threads), 4)
+        self.assertTrue(all(name.startswith("oc_idmanager") for name in threads))
+
+    def test_is_valid_many(self):
+        session, adapter = stub_session(self.orcid_response)
+        om = ORCIDManager(session=session)
+        om.storage_manager.set_value("orcid:0000-0002-8420-0696", {"valid": False})
+        orcids = [self.orcid, "https://orcid.org/" + self.orcid, "orcid:0000-0003-0530-4306", "0000-0002-8420-0696", self.orcid]
+        self.assertEqual(om.is_valid_many(orcids, workers=4), [True, True, False, False, True])
+        self.assertEqual(om.is_valid_many(orcids, workers=1), [True, True, False, False, True])
+        self.assertEqual(om.storage_manager.get_value("orcid:" + self.orcid), {"valid": True})
+        self.assertEqual(om.is_valid_many([]), [])
+        valid, info = om.is_valid_many([self.orcid], get_extra_info=True)[0]
+        self.assertTrue(valid)
+
+    def test_rate_limiter(self):
+        bucket = TokenBucket(20, capacity=2)
+        start = monotonic()
+        waited = [bucket.acquire() for _ in range(6)]
+        self.assertEqual(waited[:2], [0.0, 0.0])
+        self.assertGreaterEqual(monotonic() - start, 0.18)
+        rate_limiter = RateLimiter({"api.crossref.org": (20, 1)})
+        self.assertEqual(rate_limiter.acquire("https://api.crossref.org/works/10.1000/1"), 0.0)
+        self.assertGreater(rate_limiter.acquire("https://api.crossref.org/works/10.1000/2"), 0.0)
+        self.assertEqual([rate_limiter.acquire("https://doi.org/api/handles/10.1000/1") for _ in range(10)], [0.0] * 10)
+        self.assertNotIn("doi.org", rate_limiter._buckets)
+        rate_limiter.set_limit("api.crossref.org", None)
+        self.assertEqual(rate_limiter.acquire("https://api.crossref.org/works/10.1000/3"), 0.0)
+        session, adapter = stub_session(self.orcid_response)
+        om = ORCIDManager(session=session, rate_limiter=RateLimiter({"pub.orcid.org": (10, 1)}))
+        start = monotonic()
+        self.assertEqual([om.exists(self.orcid) for _ in range(4)], [True] * 4)
+        self.assertGreaterEqual(monotonic() - start, 0.3)
+
+    def test_single_flight(self):
+        single_flight = SingleFlight()
+        calls = list()
+
+        def slow_call(value):
+            calls.append(value)
+            sleep(0.2)
+            return value * 2
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda value: single_flight.do("key", slow_call, value), [1] * 8))
+        self.assertEqual(results, [2] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(single_flight.in_flight(), 0)
+        with self.assertRaises(ZeroDivisionError):
+            single_flight.do("key", lambda: 1 / 0)
+        self.assertEqual(single_flight.do("key", slow_call, 2), 4)
+
+        session, adapter = stub_session(self.orcid_response)
+        adapter.delay = 0.2
+        om = ORCIDManager(session=session)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(om.exists, [self.orcid] * 8))
+        self.assertEqual(results, [True] * 8)
+        self.assertEqual(len(adapter.requests), 1)
+
+        # The calls through different sessions are not coalesced
+        other_session, other_adapter = stub_session((404, "", {}))
+        other_adapter.delay = 0.2
+        other_om = ORCIDManager(session=other_session)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(lambda manager: manager.exists(self.orcid), [om, other_om]))
+        self.assertEqual(results, [True, False])
+        self.assertEqual(len(adapter.requests), 2)
+        self.assertEqual(len(other_adapter.requests), 1)
+
+    def test_http_cache(self):
+        cache_path = join(self.tmp_dir, "http_cache.db")
+        if exists(cache_path):
+            remove(cache_path)
+        record = {"orcid-identifier": {"path": self.orcid}, "person": {"name": "Name"}}
+        adapter = StubAdapter((200, record, {"ETag": '"v1"'}), (304, "", {}), (200, {}, {}), (200, {}, {}))
+        url = "https://pub.orcid.org/v3.0/" + self.orcid
+        session = create_session(http_cache=HTTPCache(cache_path))
+        self.assertIsInstance(session.get_adapter(url), CachingAdapter)
+        session.mount("https://", CachingAdapter(session.get_adapter(url).cache, adapter))
+        self.assertEqual(session.get(url).json(), record)
+        response = session.get(url)
+        self.assertEqual(adapter.requests[-1].headers["If-None-Match"], '"v1"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), record)
+        self.assertTrue(response.from_cache)
+        self.assertTrue(adapter.sent[-1].raw.closed)
+        self.assertEqual(session.get(url, headers={"Accept": "application/xml"}).json(), {})
+        self.assertNotIn("If-None-Match", adapter.requests[-1].headers)
+        self.assertEqual(len(adapter.requests), 3)
+
+        cache = HTTPCache(cache_path, max_age=3600)
+        session.mount("https://", CachingAdapter(cache, adapter))
+        self.assertEqual(session.get(url).json(), record)
+        self.assertEqual(len(adapter.requests), 3)
+        cache.clear()
+        self.assertEqual(session.get(url).json(), {})
+        self.assertEqual(len(adapter.requests), 4)
+
+        # The stored validators are found whatever the case of their headers
+        cache.max_age = 0
+        cache.set(" https://example.org/x", {"last-modified": "Wed, 21 Oct 2015 07:28:00 GMT"}, b"{}")
+        self.assertEqual(cache.get(" https://example.org/x")[0]["Last-Modified"], "Wed, 21 Oct 2015 07:28:00 GMT")
+        session.get("https://example.org/x", headers={"Accept": ""})
+        self.assertEqual(adapter.requests[-1].headers["If-Modified-Since"], "Wed, 21 Oct 2015 07:28:00 GMT")
+
+    def test_circuit_breaker(self):
+        circuit_breaker = CircuitBreaker(failure_rate=0.5, window=4, min_calls=4, reset_timeout=0.2)
+        policy = RetryPolicy(backoff_factor=0)
+        session, adapter = stub_session((200, {}, {}), (503, "", {}), (503, "", {}), (503, "", {}), self.orcid_response)
+        om = ORCIDManager(session=session, retry_policy=policy, circuit_breaker=circuit_breaker)
+        self.assertFalse(om.exists("0000-0002-8420-0696"))
+        self.assertEqual(circuit_breaker.get_state("pub.orcid.org"), "closed")
+        self.assertRaises(RetriesExhaustedError, om.exists, self.orcid)
+        self.assertEqual(circuit_breaker.get_state("pub.orcid.org"), "open")
+        self.assertRaises(APIUnavailableError, om.exists, self.orcid)
+        self.assertEqual(len(adapter.requests), 4)
+        self.assertRaises(APIUnavailableError, om.is_valid, self.orcid)
+        self.assertIsNone(om.storage_manager.get_value("orcid:" + self.orcid))
+        self.assertEqual(om.is_valid_many([self.orcid, "0000-0003-0530-4306"]), [None, False])
+        self.assertEqual(len(adapter.requests), 4)
+        self.assertTrue(call_api("https://doi.org/api/handles/10.1000/1", {}, session=session, circuit_breaker=circuit_breaker))
+        sleep(0.2)
+        self.assertEqual(circuit_breaker.get_state("pub.orcid.org"), "half-open")
+        self.assertTrue(om.exists(self.orcid))
+        self.assertEqual(circuit_breaker.get_state("pub.orcid.org"), "closed")
+
+        # The healthy circuits and the least recently called ones are dropped
+        circuit_breaker = CircuitBreaker(window=2, min_calls=2, max_hosts=3)
+        for i in range(10):
+            circuit_breaker.record(f"https://host{i}.org/", failed=False)
+            circuit_breaker.record(f"https://host{i}.org/", failed=False)
+        self.assertEqual(len(circuit_breaker._circuits), 0)
+        for i in range(10):
+            circuit_breaker.record(f"https://host{i}.org/", failed=True)
+        self.assertEqual(list(circuit_breaker._circuits), ["host7.org", "host8.org", "host9.org"])
+        circuit_breaker.record("https://host9.org/", failed=True)
+        self.assertEqual(circuit_breaker.get_state("host9.org"), "open")
+
+    def test_record_replay(self):
+        fixtures_path = join(self.tmp_dir, "fixtures")
+        rmtree(fixtures_path, ignore_errors=True)
+        stub, adapter = stub_session(self.orcid_response, (404, "", {}))
+        recorder = RecordReplayAdapter(fixtures_path, mode="record", adapter=adapter)
+        session = recorder.install(create_session(host_pool_maxsize={"pub.orcid.org": 20}))
+        om = ORCIDManager(session=session)
+        self.assertTrue(om.exists(self.orcid))
+        self.assertFalse(om.exists("0000-0002-8420-0696"))
+        session.close()
+        self.assertTrue(exists(join(fixtures_path, "pub.orcid.org.jsonl")))
+
+        replayer = RecordReplayAdapter(fixtures_path, latency=0.1)
+        om = ORCIDManager(session=replayer.install(create_session()))
+        start = monotonic()
+        self.assertTrue(om.exists(self.orcid))
+        self.assertFalse(om.exists("0000-0002-8420-0696"))
+        self.assertGreaterEqual(monotonic() - start, 0.2)
+        self.assertEqual(len(adapter.requests), 2)
+        self.assertRaises(MissingRecordError, om.exists, "0000-0001-5506-523X")
+        self.assertRaises(ValueError, RecordReplayAdapter, fixtures_path, mode="other")
+
+        # The responses are written as soon as they are recorded, without the secrets of the requests
+        stub, adapter = stub_session((200, {"result": {}}, {}))
+        recorder = RecordReplayAdapter(fixtures_path, mode="auto", adapter=adapter)
+        session = recorder.install(create_session())
+        url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
+        get_response(url, {}, params={"id": "1", "api_key": "secret"}, session=session)
+        with open(join(fixtures_path, "eutils.ncbi.nlm.nih.gov.jsonl"), encoding="utf-8") as fp:
+            fixture = fp.read()
+        self.assertIn("esummary.fcgi?id=1", fixture)
+        self.assertNotIn("secret", fixture)
+        replayer = RecordReplayAdapter(fixtures_path)
+        response = get_response(url, {}, params={"id": "1", "api_key": "other"}, session=replayer.install(create_session()))
+        self.assertEqual(response.json(), {"result": {}})
+
+        # The responses recorded again replace the previous ones, which are removed from the fixture files by save
+        stub, adapter = stub_session((200, {"result": {"uids": []}}, {}))
+        recorder = RecordReplayAdapter(fixtures_path, mode="record", adapter=adapter)
+        get_response(url, {}, params={"id": "1"}, session=recorder.install(create_session()))
+        fixture_path = join(fixtures_path, "eutils.ncbi.nlm.nih.gov.jsonl")
+        with open(fixture_path, encoding="utf-8") as fp:
+            self.assertEqual(len(fp.readlines()), 2)
+        recorder.close()
+        with open(fixture_path, encoding="utf-8") as fp:
+            self.assertEqual(len(fp.readlines()), 1)
+        response = get_response(url, {}, params={"id": "1"}, session=RecordReplayAdapter(fixtures_path).install(create_session()))
+        self.assertEqual(response.json(), {"result": {"uids": []}})
+
+    def test_deadline(self):
+        self.assertIsNone(get_remaining_time())
+        with deadline(10):
+            with deadline(20):
+                self.assertLessEqual(get_remaining_time(), 10)
+        self.assertIsNone(get_remaining_time())
+        policy = RetryPolicy(backoff_factor=1, jitter=False)
+        session, adapter = stub_session((503, "", {}), self.orcid_response)
+        om = ORCIDManager(session=session, retry_policy=policy, timeout=(2, 20))
+        start = monotonic()
+        with deadline(0.5):
+            self.assertRaises(DeadlineExceededError, om.exists, self.orcid)
+        self.assertLess(monotonic() - start, 0.5)
+        self.assertLessEqual(adapter.timeout[0], 0.5)
+        self.assertLessEqual(adapter.timeout[1], 0.5)
+        self.assertTrue(om.exists(self.orcid))
+        self.assertEqual(adapter.timeout, (2, 20))
+        with deadline(0):
+            self.assertRaises(DeadlineExceededError, om.exists, self.orcid)
+        self.assertEqual(len(adapter.requests), 2)
+        session, adapter = stub_session((503, "", {}), self.orcid_response)
+        om = ORCIDManager(session=session, retry_policy=policy)
+        self.assertEqual(om.is_valid_many([self.orcid, "0000-0003-0530-4306"], deadline=0.5), [None, False])
+        self.assertIsNone(om.storage_manager.get_value("orcid:" + self.orcid))
+
+        async def check():
+            with deadline(0):
+                return await om.aexists(self.orcid)
+
+        self.assertRaises(DeadlineExceededError, asyncio.run, check())
+
+        # Waiting for the rate limiter is bounded by the deadline
+        session, adapter = stub_session(self.orcid_response)
+        om = ORCIDManager(session=session, rate_limiter=RateLimiter({"pub.orcid.org": 0.5}))
+        self.assertTrue(om.exists(self.orcid))
+        start = monotonic()
+        with deadline(0.2):
+            self.assertRaises(DeadlineExceededError, om.exists, self.orcid)
+        self.assertLess(monotonic() - start, 0.2)
+        self.assertEqual(len(adapter.requests), 1)
+
+        # A caller waiting for a call interrupted by the deadline of another caller makes the call itself
+        session, adapter = stub_session((503, "", {}), self.orcid_response)
+        adapter.delay = 0.3
+        om = ORCIDManager(session=session, retry_policy=policy)
+
+        def exists_within(seconds):
+            with deadline(seconds):
+                return om.exists(self.orcid)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            short = executor.submit(exists_within, 0.1)
+            sleep(0.05)
+            long = executor.submit(exists_within, 5)
+            self.assertRaises(DeadlineExceededError, short.result)
+            self.assertTrue(long.result())
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_validation_pipeline(self):
+        session, adapter = stub_session(self.orcid_response)
+        om = ORCIDManager(session=session)
+        self.assertTrue(om.is_valid(self.orcid))
+        self.assertEqual(len(adapter.requests), 1)
+        self.assertTrue(om.is_valid(self.orcid))
+        self.assertEqual(om.is_valid(self.orcid, get_extra_info=True), (True, {"valid": True}))
+        self.assertFalse(om.is_valid("0000-0003-0530-4306"))
+        self.assertFalse(om.is_valid("0000-0003-0530-430"))
+        self.assertEqual(len(adapter.requests), 1)
+        self.assertIsNone(om.storage_manager.get_value("orcid:0000-0003-0530-4306"))
+
+        session, adapter = stub_session((200, {"responseCode": 1}, {}))
+        dm = DOIManager(session=session)
+        self.assertTrue(dm.is_valid("10.1108/jd-12-2013-0166"))
+        self.assertFalse(dm.is_valid("10.1108"))
+        self.assertEqual(len(adapter.requests), 1)
+        self.assertEqual(dm.is_valid("10.1108/jd-12-2013-0166", get_extra_info=True),
+                         (True, {"valid": True}))
+        self.assertTrue(ISSNManager().is_valid("0003-987X"))
+        self.assertEqual(ISSNManager().is_valid("0003-987X", get_extra_info=True), (True, {"valid": True}))
+
+    def test_doi_registration_agencies(self):
+        handle_response = (200, {"responseCode": 1}, {})
+        ra_response = (200, [{"DOI": "10.1108/jd-12-2013-0166", "RA": "Crossref"}, {"DOI": "10.5281/zenodo.1", "RA": "DataCite"},
+                             {"DOI": "10.9999/missing", "status": "DOI does not exist"}], {})
+        crossref_response = (200, {"status": "ok", "message": {"items": [{
+            "DOI": "10.1108/jd-12-2013-0166", "type": "journal-article", "title": ["Setting our bibliographic references free"],
+            "author": [{"given": "Silvio", "family": "Peroni"}], "issued": {"date-parts": [[2015, 3, 9]]}}]}}, {})
+        session, adapter = stub_session(ra_response, handle_response, crossref_response, handle_response, handle_response)
+        dm = DOIManager(session=session)
+        self.assertEqual(dm.get_registration_agencies(["10.1108/JD-12-2013-0166", "10.1108/jd-12-2013-0167", "10.5281/zenodo.1",
+                                                       "10.9999/missing"]),
+                         {"10.1108/jd-12-2013-0166": "crossref", "10.1108/jd-12-2013-0167": "crossref", "10.5281/zenodo.1": "datacite"})
+        self.assertEqual(len(adapter.requests), 1)
+        self.assertEqual(adapter.requests[0].url, "https://doi.org/ra/10.1108/jd-12-2013-0166,10.5281/zenodo.1,10.9999/missing")
+        self.assertEqual(dm.ra_storage_manager.get_value("10.1108"), {"ra": "crossref"})
+
+        valid, info = dm.exists("10.1108/jd-12-2013-0166", get_extra_info=True, allow_extra_api=["crossref"])
+        self.assertTrue(valid)
+        self.assertEqual((info["ra"], info["title"], info["author"]), ("crossref", "Setting our bibliographic references free", "Peroni, Silvio"))
+        self.assertIn("filter=doi%3A10.1108%2Fjd-12-2013-0166&select=DOI%2Ctype", adapter.requests[-1].url)
+        self.assertEqual(dm.exists("10.5281/zenodo.1", get_extra_info=True, allow_extra_api="crossref"),
+                         (True, {"id": "10.5281/zenodo.1", "valid": True, "ra": "datacite"}))
+        self.assertEqual(dm.exists("10.1108/jd-12-2013-0166", get_extra_info=True),
+                         (True, {"id": "10.1108/jd-12-2013-0166", "valid": True, "ra": "unknown"}))
+        self.assertEqual(len(adapter.requests), 5)
+
+    def test_doi_registration_agencies_retry(self):
+        session, adapter = stub_session(
+            (200, [{"DOI": "10.1234/missing", "status": "DOI does not exist"}, {"DOI": "10.5281/zenodo.1", "RA": "DataCite"}], {}),
+            (200, [{"DOI": "10.1234/found", "RA": "mEDRA"}], {}))
+        dm = DOIManager(session=session)
+        self.assertEqual(dm.get_registration_agencies(["10.1234/missing", "10.5281/zenodo.1", "10.1234/found", "10.5281/zenodo.2"]),
+                         {"10.1234/missing": "medra", "10.1234/found": "medra", "10.5281/zenodo.1": "datacite",
+                          "10.5281/zenodo.2": "datacite"})
+        self.assertEqual([request.url for request in adapter.requests],
+                         ["https://doi.org/ra/10.1234/missing,10.5281/zenodo.1", "https://doi.org/ra/10.1234/found"])
+        self.assertEqual(dm.ra_storage_manager.get_value("10.1234"), {"ra": "medra"})
+
+    def test_crossref_metadata(self):
+        items = [{"DOI": "10.1108/JD-12-2013-0166", "type": "journal-article", "title": ["Setting our bibliographic references free"]},
+                 {"DOI": "10.1130/2015.2513(00)", "type": "book", "title": ["Field Guide"]}]
+        session, adapter = stub_session((200, {"status": "ok", "message": {"items": items}}, {}))
+        dm = DOIManager(session=session)
+        dm._crossref_batch_size = 2
+        metadata = dm.get_crossref_metadata(["10.1108/jd-12-2013-0166", "doi:10.1130/2015.2513(00)", "10.1108/JD-12-2013-0166",
+                                             "10.1000/missing"])
+        self.assertEqual(metadata["10.1108/jd-12-2013-0166"]["title"], "Setting our bibliographic references free")
+        self.assertEqual(metadata["10.1130/2015.2513(00)"]["type"], "book")
+        self.assertEqual(len(adapter.requests), 2)
+        request = adapter.requests[0]
+        self.assertIn("filter=doi%3A10.1108%2Fjd-12-2013-0166%2Cdoi%3A10.1130%2F2015.2513%2800%29", request.url)
+        self.assertIn("select=DOI%2Ctype%2CISBN", request.url)
+        self.assertIn("rows=2", request.url)
+
+    def test_doi_exists_many(self):
+        handle_response = (200, {"responseCode": 1}, {})
+        ra_response = (200, [{"DOI": "10.1108/jd-12-2013-0166", "RA": "Crossref"}, {"DOI": "10.5281/zenodo.1", "RA": "DataCite"}], {})
+        items = [{"DOI": "10.1108/JD-12-2013-0166", "type": "journal-article", "title": ["First"]},
+                 {"DOI": "10.1108/JD-12-2013-0167", "type": "journal-article", "title": ["Second"]}]
+        session, adapter = stub_session(handle_response, handle_response, handle_response, (503, "", {}), ra_response,
+                                        (200, {"status": "ok", "message": {"items": items}}, {}))
+        dm = DOIManager(session=session, retry_policy=RetryPolicy(max_attempts=1))
+        results = dm.exists_many(["10.1108/jd-12-2013-0166", "10.1108/jd-12-2013-0167", "10.5281/zenodo.1", "10.1000/down"],
+                                 get_extra_info=True, allow_extra_api="crossref", workers=1)
+        self.assertEqual(results["doi:10.1108/jd-12-2013-0166"][1]["title"], "First")
+        self.assertEqual(results["doi:10.1108/jd-12-2013-0167"][1]["title"], "Second")
+        self.assertEqual(results["doi:10.5281/zenodo.1"], (True, {"id": "10.5281/zenodo.1", "valid": True, "ra": "datacite"}))
+        self.assertNotIn("doi:10.1000/down", results)
+        # The metadata of both the Crossref DOIs are retrieved with a request
+        self.assertEqual(len(adapter.requests), 6)
+        self.assertIn("filter=doi%3A10.1108%2Fjd-12-2013-0166%2Cdoi%3A10.1108%2Fjd-12-2013-0167", adapter.requests[-1].url)
+
+        session, adapter = stub_session(handle_response, (200, {"responseCode": 100}, {}))
+        dm = DOIManager(session=session)
+        self.assertEqual(dm.is_valid_many(["10.1108/jd-12-2013-0166", "10.1108/jd-12-2013-0167"], workers=1), [True, False])
+        self.assertEqual(dm.storage_manager.get_value("doi:10.1108/jd-12-2013-0167"), {"valid": False})
+
+    def test_pmid_extra_info(self):
+        pm = PMIDManager(use_api_service=False)
+        record = "\n".join([
+            '<pre class="article-details" id="article-details">PMID- 2942070', "DP  - 1986 Mar 15",
+            "TI  - Comparison of the effects of some drugs on the",
+            "      uptake of a model compound in isolated rat hepatocytes.", "PG  - 1081-5", "IS  - 0006-2952 (Print)",
+            "IS  - 1873-2968 (Electronic)", "VI  - 35", "IP  - 6", "FAU - Surname0, Given Name", "AU  - Surname0 GN",
+            "FAU - Surname1, Given Name", "AD  - Department,", "      City.", "FAU - Surname2, Given Name",
+            "PT  - Journal Article", "JT  - Biochemical pharmacology", "AID - 0006-2952(86)90143-7 [pii]",
+            "AID - 10.1016/0006-2952(86)90143-7 [doi]", "SO  - Biochem Pharmacol. 1986 Mar 15;35(6):1081-5.</pre>"])
+        info = pm.extra_info(record)
+        self.assertEqual(info["title"], "Comparison of the effects of some drugs on the uptake of a model compound in "
+                                        "isolated rat hepatocytes.")
+        self.assertEqual(info["author"], ["Surname0, Given Name", "Surname1, Given Name", "Surname2, Given Name"])
+        self.assertEqual(info["pub_date"], "1986-03-15")
+        self.assertEqual(info["venue"], "Biochemical pharmacology [issn:0006-2952, issn:1873-2968]")
+        self.assertEqual((info["volume"], info["issue"], info["page"]), ("35", "6", "1081-5"))
+        self.assertEqual(info["type"], ["journal article"])
+        self.assertEqual(info["doi"], "10.1016/0006-2952(86)90143-7")
+        self.assertEqual(pm.extra_info("PMID- 1\nDP  - 2001 Feb")["pub_date"], "2001-02")
+        self.assertEqual(pm.extra_info("PMID- 1\nDP  - unknown")["pub_date"], "")
+
+    def test_pmid_eutils(self):
+        summary = {"result": {"uids": ["2942070", "1509982", "174777777777"], "2942070": {"uid": "2942070"},
+                              "1509982": {"uid": "1509982"}, "174777777777": {"error": "cannot get document summary"}}}
+        session, adapter = stub_session((200, summary, {}))
+        pm = PMIDManager(session=session, api_key="key")
+        self.assertEqual(pm.is_valid_many(["2942070", "pmid:1509982", "174777777777", "0", "2942070"]),
+                         [True, True, False, False, True])
+        self.assertEqual(len(adapter.requests), 1)
+        self.assertIn("esummary.fcgi", adapter.requests[0].url)
+        self.assertIn("id=2942070%2C1509982%2C174777777777", adapter.requests[0].url)
+        self.assertIn("api_key=key", adapter.requests[0].url)
+        # The requests with the key share a limit of their own, while those without it keep the limit of the host
+        bucket = get_rate_limiter()._buckets[("eutils.ncbi.nlm.nih.gov", "key")]
+        self.assertEqual(bucket.rate, 10)
+        PMIDManager(api_key="key")
+        self.assertIs(get_rate_limiter()._buckets[("eutils.ncbi.nlm.nih.gov", "key")], bucket)
+        self.assertEqual(get_rate_limiter()._buckets["eutils.ncbi.nlm.nih.gov"].rate, 3)
+        rate_limiter = RateLimiter({"eutils.ncbi.nlm.nih.gov": (3, 1)})
+        PMIDManager(rate_limiter=rate_limiter, api_key="other")
+        self.assertEqual(rate_limiter.acquire("https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"), 0.0)
+        self.assertEqual(rate_limiter.acquire("https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi", key="other"), 0.0)
+        self.assertGreater(rate_limiter.acquire("https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"), 0.0)
+        self.assertTrue(pm.is_valid("1509982"))
+        self.assertEqual(len(adapter.requests), 1)
+
+        medline = "\n".join(["PMID- 2942070", "TI  - First title.", "", "PMID- 1509982", "TI  - Second",
+                             "      title."])
+        session, adapter = stub_session((200, medline, {}), (200, medline, {}), (200, summary, {}))
+        pm = PMIDManager(session=session, use_eutils=True)
+        pm._eutils_batch_size = 2
+        results = pm.exists_many(["2942070", "1509982", "174777777777"], get_extra_info=True)
+        self.assertEqual(results["pmid:2942070"][1]["title"], "First title.")
+        self.assertEqual(results["pmid:1509982"][1]["title"], "Second title.")
+        self.assertEqual(results["pmid:174777777777"], (False, {"valid": False}))
+        self.assertEqual(len(adapter.requests), 2)
+        self.assertIn("efetch.fcgi", adapter.requests[0].url)
+        self.assertIn("rettype=medline", adapter.requests[0].url)
+        self.assertTrue(pm.exists("2942070"))
+        self.assertIn("esummary.fcgi", adapter.requests[2].url)
+
+        session, adapter = stub_session((500, {}, {}), (400, {"error": "invalid request"}, {}), (200, summary, {}))
+        pm = PMIDManager(session=session, retry_policy=RetryPolicy(max_attempts=1))
+        pm._eutils_batch_size = 1
+        self.assertEqual(pm.is_valid_many(["2942070", "1509982", "174777777777"]), [None, None, False])
+        self.assertEqual(len(adapter.requests), 3)
+        self.assertIsNone(pm.storage_manager.get_value("pmid:2942070"))
+        self.assertIsNone(pm.storage_manager.get_value("pmid:1509982"))
+        self.assertEqual(pm.storage_manager.get_value("pmid:174777777777"), {"valid": False})
+        session, adapter = stub_session((400, {"error": "invalid request"}, {}))
+        pm = PMIDManager(session=session, use_eutils=True)
+        self.assertRaises(APIUnavailableError, pm.exists, "2942070")
+        self.assertIsNone(pm.is_valid_many(["2942070"])[0])
+        session, adapter = stub_session((200, "", {}), (200, "<ERROR>Unable to obtain query</ERROR>", {}))
+        pm = PMIDManager(session=session)
+        self.assertEqual(pm.is_valid_many(["2942070"], get_extra_info=True), [None])
+        self.assertEqual(pm.is_valid_many(["2942070"], get_extra_info=True), [None])
+        self.assertIsNone(pm.storage_manager.get_value("pmid:2942070"))
+
+    def test_pmcid_batch(self):
+        records = {"status": "ok", "records": [
+            {"pmcid": "PMC8384044", "pmid": "34429366", "doi": "10.1186/s12889-021-11637-1"},
+            {"requested-id": "PMC1000000", "pmcid": "PMC1000000", "live": "false", "status": "error",
+             "errmsg": "invalid article id"},
+            {"requested-id": "PMC6716460.1", "pmcid": "PMC6716460", "pmid": "31477047"}]}
+        session, adapter = stub_session((200, records, {}))
+        pm = PMCIDManager(session=session)
+        self.assertEqual(pm.is_valid_many(["PMC8384044", "pmcid:PMC1000000", "PMC6716460.1", "PMC1", "PMC8384044"],
+                                          get_extra_info=True),
+                         [(True, {"valid": True}), (False, {"valid": False}), (True, {"valid": True}),
+                          (False, {"valid": False}), (True, {"valid": True})])
+        self.assertEqual(len(adapter.requests), 1)
+        self.assertIn("ids=PMC8384044%2CPMC1000000%2CPMC6716460.1", adapter.requests[0].url)
+        self.assertFalse(pm.is_valid("PMC1000000"))
+        self.assertEqual(len(adapter.requests), 1)
+
+        session, adapter = stub_session((200, records, {}))
+        pm = PMCIDManager(session=session, crosswalk=CrossWalk())
+        pm._batch_size = 2
+        self.assertEqual(pm.exists_many(["PMC8384044", "PMC1000000", "PMC6716460.1"]),
+                         {"pmcid:PMC8384044": True, "pmcid:PMC1000000": False, "pmcid:PMC6716460.1": True})
+        self.assertEqual(len(adapter.requests), 2)
+
+        error = {"status": "error", "responseDate": "2024-01-01 00:00:00", "message": "Internal error"}
+        session, adapter = stub_session((200, error, {}), (200, records, {}))
+        pm = PMCIDManager(session=session, crosswalk=CrossWalk())
+        pm._batch_size = 2
+        self.assertEqual(pm.is_valid_many(["PMC8384044", "PMC1000000", "PMC6716460.1"]), [None, None, True])
+        self.assertIsNone(pm.storage_manager.get_value("pmcid:PMC1000000"))
+        session, adapter = stub_session((400, "", {}))
+        pm = PMCIDManager(session=session, crosswalk=CrossWalk())
+        self.assertRaises(APIUnavailableError, pm.exists, "PMC8384044")
+        self.assertIsNone(pm.convert("pmcid:PMC8384044", "pmid"))
+
+    def test_crosswalk(self):
+        records = {"status": "ok", "records": [
+            {"pmcid": "PMC8384044", "pmid": "34429366", "doi": "10.1186/S12889-021-11637-1"},
+            {"requested-id": "PMC1000000", "pmcid": "PMC1000000", "live": "false", "status": "error"}]}
+        session, adapter = stub_session((200, records, {}))
+        pm = PMCIDManager(session=session)
+        self.assertTrue(pm.exists("PMC8384044"))
+        self.assertFalse(pm.exists("PMC1000000"))
+        self.assertEqual(len(adapter.requests), 2)
+        self.assertEqual(get_crosswalk().get("pmid:34429366"), {
+            "pmcid": "pmcid:PMC8384044", "pmid": "pmid:34429366", "doi": "doi:10.1186/s12889-021-11637-1"})
+
+        # The sibling ids are known to be registered, unless additional info is required
+        pmid_session, pmid_adapter = stub_session((500, "", {}))
+        self.assertTrue(PMIDManager(session=pmid_session).is_valid("34429366"))
+        self.assertTrue(DOIManager(session=pmid_session).exists("doi:10.1186/s12889-021-11637-1"))
+        self.assertEqual(len(pmid_adapter.requests), 0)
+
+        self.assertEqual(pm.convert("pmid:34429366", "doi"), "doi:10.1186/s12889-021-11637-1")
+        self.assertEqual(pm.convert("doi:10.1186/S12889-021-11637-1", "pmcid"), "pmcid:PMC8384044")
+        self.assertEqual(len(adapter.requests), 2)
+
+        session, adapter = stub_session((200, {"status": "ok", "records": [
+            {"requested-id": "23193287", "pmcid": "PMC3531190", "pmid": "23193287", "doi": "10.1093/nar/gks1195"},
+            {"requested-id": "1", "pmid": "1", "status": "error"}]}, {}))
+        pm = PMCIDManager(session=session, crosswalk=CrossWalk())
+        self.assertEqual(pm.convert_many(["pmid:23193287", "pmid:1", "issn:0006-2952", "pmid:023193287"], "pmcid"), {
+            "pmid:23193287": "pmcid:PMC3531190", "pmid:1": None, "issn:0006-2952": None,
+            "pmid:023193287": "pmcid:PMC3531190"})
+        self.assertEqual(len(adapter.requests), 1)
+        self.assertIn("ids=23193287%2C1", adapter.requests[0].url)
+        self.assertIn("idtype=pmid", adapter.requests[0].url)
+        self.assertIsNone(get_crosswalk().get("pmid:23193287").get("pmcid"))